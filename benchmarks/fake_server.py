@@ -0,0 +1,420 @@
+import re
+import json
+import hashlib
+import time
+import uuid
+import threading
+import urllib.parse
+import http.server
+import email.utils
+from xml.sax.saxutils import escape
+
+# 进程内的坚果云 /d/ajax/* 模拟服务，用于性能测试
+## latency 为每个请求附加的延迟（秒）；数据集为 depth 层、每层 dirs 个子目录、每个目录 files 个文件的目录树，
+## 以及 events 条操作历史；/dav/ 下提供同一数据集的 WebDAV 接口，allow_infinity 为 False 时拒绝 Depth: infinity
+class FakeJianguoServer(object):
+    SANDBOX_ID = "1000"
+    SANDBOX_MAGIC = "magic"
+    SANDBOX_DAV_NAME = "我的坚果云"
+    EVENT_PAGE_SIZE = 100
+
+    def __init__(self, latency=0.0, depth=2, dirs=4, files=50, events=1000, move_polls=1, allow_infinity=True):
+        self.latency = latency
+        self.move_polls = move_polls
+        self.allow_infinity = allow_infinity
+        self._lock = threading.Lock()
+        self._rev = 0
+        self._entries = {"": {"name": "", "isDir": True, "rev": 0, "size": 0, "mtime": 0}}
+        self._children = {"": set()}
+        self._trash = {}
+        self._shares = {}
+        self._operations = {}
+        self._contents = {}
+        self._versions = {}
+        self.requests = 0
+
+        self._build_tree("", depth, dirs, files)
+        self._events = [self._event("/f" + str(i), "CREATE", 1600000000000 + i) for i in range(events)]
+        self._events.reverse()
+
+        handler = self._make_handler()
+        self._httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return "http://127.0.0.1:" + str(self._httpd.server_port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    ## 数据集
+
+    def _next_rev(self) -> int:
+        self._rev += 1
+        return self._rev
+
+    def _add(self, path, is_dir, size=0, content=None):
+        parent, name = path.rsplit("/", 1)
+        self._entries[path] = {"name": name, "isDir": is_dir, "rev": self._next_rev(), "size": size, "mtime": int(time.time() * 1000)}
+        self._children.setdefault(parent, set()).add(name)
+        if is_dir: self._children.setdefault(path, set())
+        if content is not None:
+            self._entries[path]["hash"] = hashlib.sha1(content).hexdigest()
+            self._contents[path] = content
+            self._versions.setdefault(path, []).append({"version": self._entries[path]["rev"], "size": size, "mtime": self._entries[path]["mtime"], "content": content})
+
+    def _remove(self, path):
+        entry = self._entries.pop(path, None)
+        if entry is None: return None
+        parent, name = path.rsplit("/", 1)
+        self._children.get(parent, set()).discard(name)
+        for child in list(self._children.get(path, ())): self._remove(path + "/" + child)
+        self._children.pop(path, None)
+        self._contents.pop(path, None)
+        return entry
+
+    def _build_tree(self, path, depth, dirs, files):
+        for i in range(files):
+            content = ("file " + path + "/file" + str(i) + ".txt\n").encode("utf-8") * 8
+            self._add(path + "/file" + str(i) + ".txt", False, len(content), content)
+        if depth == 0: return
+        for i in range(dirs):
+            self._add(path + "/dir" + str(i), True)
+            self._build_tree(path + "/dir" + str(i), depth - 1, dirs, files)
+
+    def _event(self, path, op_type, timestamp=None, is_dir=False) -> dict:
+        if timestamp is None: timestamp = int(time.time() * 1000)
+        return {"path": path, "opType": op_type, "timestamp": timestamp, "isdir": is_dir, "isdel": op_type == "DELETE", "version": self._rev}
+
+    def _record(self, path, op_type, is_dir=False):
+        self._events.insert(0, self._event(path, op_type, is_dir=is_dir))
+
+    def file_count(self) -> int:
+        return sum(1 for entry in self._entries.values() if not entry["isDir"])
+
+    def paths(self, parent="", is_dir=False) -> list:
+        return sorted(parent + "/" + name for name in self._children.get(parent, ()) if self._entries[parent + "/" + name]["isDir"] == is_dir)
+
+    ## 接口
+
+    def _user_info(self, query, form) -> str:
+        sandboxes = [{"name": "", "sandboxId": self.SANDBOX_ID, "magic": self.SANDBOX_MAGIC, "id": self.SANDBOX_ID}]
+        return '{"userName":"bench","sandboxes":' + json.dumps(sandboxes) + ',"freeUpRate":0}'
+
+    def _browse(self, path, query, is_deleted=False) -> dict:
+        if is_deleted:
+            contents = [entry for key, entry in self._trash.items() if key.rsplit("/", 1)[0] == path]
+            return {"contents": contents}
+        if path not in self._children: return {"contents": []}
+        return {"contents": [self._entries[path + "/" + name] for name in sorted(self._children[path])]}
+
+    def _events_page(self, query) -> dict:
+        start = int(query.get("marker", "0") or 0)
+        page = self._events[start:start + self.EVENT_PAGE_SIZE]
+        end = start + self.EVENT_PAGE_SIZE
+        return {"events": page, "marker": end if end < len(self._events) else 1}
+
+    def _delete(self, form) -> dict:
+        for path, rev in form.items():
+            entry = self._entries.get(path)
+            if entry is None or str(entry["rev"]) != rev: continue
+            self._remove(path)
+            self._trash[path] = dict(entry, version=entry["rev"])
+            self._record(path, "DELETE", entry["isDir"])
+        return {}
+
+    def _rename(self, form) -> dict:
+        path = form["path"]
+        entry = self._entries.get(path)
+        if entry is None: return {"error": "not found"}
+        new_path = path.rsplit("/", 1)[0] + "/" + form["destName"]
+        self._move_entry(path, new_path)
+        self._record(path, "RENAME", entry["isDir"])
+        return {}
+
+    def _move_entry(self, path, new_path, is_copy=False):
+        entry = self._entries[path]
+        if entry["isDir"]:
+            self._add(new_path, True)
+            for child in list(self._children.get(path, ())): self._move_entry(path + "/" + child, new_path + "/" + child, is_copy)
+            if not is_copy: self._remove(path)
+        else:
+            self._add(new_path, False, entry["size"], self._contents.get(path))
+            if not is_copy: self._remove(path)
+
+    def _submit_move(self, form, is_copy) -> dict:
+        path = form["srcPath"]
+        if path in self._entries:
+            self._move_entry(path, form["dstDir"].rstrip("/") + "/" + path.rsplit("/", 1)[1], is_copy)
+            self._record(path, "COPY" if is_copy else "MOVE")
+        return self._new_operation()
+
+    def _new_operation(self) -> dict:
+        operation_id = uuid.uuid4().hex
+        self._operations[operation_id] = self.move_polls
+        return {"uuid": operation_id}
+
+    def _progress(self, query) -> dict:
+        remaining = self._operations.get(query.get("uuid"), 0)
+        if remaining > 1:
+            self._operations[query["uuid"]] = remaining - 1
+            return {"state": "RUNNING"}
+        return {"state": "SUCCESS"}
+
+    def _create(self, form, is_dir) -> dict:
+        if form["path"] not in self._entries:
+            self._add(form["path"], is_dir, 0, None if is_dir else b"")
+            self._record(form["path"], "CREATE", is_dir)
+        return {}
+
+    def _upload(self, query, body) -> dict:
+        path = query["path"]
+        if path in self._entries: self._remove(path)
+        self._add(path, False, len(body), body)
+        self._record(path, "UPLOAD")
+        return {}
+
+    def _restore(self, form) -> dict:
+        for path in form:
+            entry = self._trash.pop(path, None)
+            if entry is not None:
+                self._add(path, entry["isDir"], entry["size"])
+                self._record(path, "RESTORE", entry["isDir"])
+        return self._new_operation()
+
+    # 撤销删除时从回收站恢复（父目录必须存在），撤销新建和上传时删除，其他操作不做处理
+    def _undo(self, form) -> tuple:
+        path = form["path"]
+        if form["optype"] == "DELETE":
+            entry = self._trash.get(path)
+            if entry is None: return 404, {"error": "not found"}
+            if path.rsplit("/", 1)[0] not in self._children: return 409, {"error": "parent not found"}
+            del self._trash[path]
+            self._add(path, entry["isDir"], entry["size"])
+        elif form["optype"] in ("CREATE", "UPLOAD"):
+            entry = self._remove(path)
+            if entry is None: return 404, {"error": "not found"}
+            self._trash[path] = dict(entry, version=entry["rev"])
+        return 200, {}
+
+    def _purge(self, form) -> dict:
+        for path in form: self._trash.pop(path, None)
+        return {}
+
+    def _share_list(self, query) -> dict:
+        return {"objects": list(self._shares.values())}
+
+    def _share(self, form) -> dict:
+        path = form["path"]
+        entry = self._entries.get(path, {"isDir": False})
+        self._shares[path] = {"path": path, "type": "directory" if entry["isDir"] else "file", "acl": form.get("acl", "1")}
+        return {"url": "/p/" + uuid.uuid4().hex}
+
+    def _revoke(self, form) -> dict:
+        for key in form: self._shares.pop(key.rsplit("|", 1)[0], None)
+        return {}
+
+    def _version_list(self, path) -> dict:
+        return {"versions": [{key: value for key, value in version.items() if key != "content"} for version in reversed(self._versions.get(path, []))]}
+
+    def _dlink(self, query) -> dict:
+        url = "/d/file" + urllib.parse.quote(query["path"])
+        if query.get("ver"): url += "?ver=" + query["ver"]
+        return {"url": url}
+
+    def _file(self, path, query) -> bytes:
+        if not query.get("ver"): return self._contents.get(path, b"")
+        for version in self._versions.get(path, []):
+            if str(version["version"]) == query["ver"]: return version["content"]
+        return b""
+
+    ## WebDAV
+
+    def _dav_path(self, path) -> str:
+        path = path[len("/dav"):].rstrip("/")
+        if path == "": return None
+        return path[len("/" + self.SANDBOX_DAV_NAME):]
+
+    def _dav_response(self, href, entry) -> str:
+        prop = "<d:resourcetype><d:collection/></d:resourcetype>" if entry["isDir"] else "<d:resourcetype/><d:getcontentlength>" + str(entry["size"]) + "</d:getcontentlength>"
+        prop += "<d:getlastmodified>" + email.utils.formatdate(entry["mtime"] / 1000, usegmt=True) + "</d:getlastmodified>"
+        prop += "<d:getetag>\"" + str(entry["rev"]) + "\"</d:getetag>"
+        return "<d:response><d:href>" + escape(urllib.parse.quote(href)) + "</d:href><d:propstat><d:prop>" + prop + "</d:prop><d:status>HTTP/1.1 200 OK</d:status></d:propstat></d:response>"
+
+    def _propfind(self, path, depth) -> tuple:
+        if depth == "infinity" and not self.allow_infinity: return 403, "<d:error xmlns:d=\"DAV:\"><d:propfind-finite-depth/></d:error>"
+        root = "/dav/" + self.SANDBOX_DAV_NAME
+        if path is None:
+            responses = [self._dav_response("/dav/", self._entries[""])]
+            if depth != "0": responses.append(self._dav_response(root + "/", self._entries[""]))
+        elif path not in self._entries:
+            return 404, ""
+        else:
+            responses = [self._dav_response(root + path + ("/" if self._entries[path]["isDir"] else ""), self._entries[path])]
+            pending = [path] if depth != "0" else []
+            while pending:
+                parent = pending.pop()
+                for name in sorted(self._children.get(parent, ())):
+                    child = parent + "/" + name
+                    entry = self._entries[child]
+                    responses.append(self._dav_response(root + child + ("/" if entry["isDir"] else ""), entry))
+                    if depth == "infinity" and entry["isDir"]: pending.append(child)
+        return 207, "<?xml version=\"1.0\" encoding=\"utf-8\"?><d:multistatus xmlns:d=\"DAV:\">" + "".join(responses) + "</d:multistatus>"
+
+    def _dav(self, method, path, headers, body) -> tuple:
+        if headers.get("Authorization") is None: return 401, ""
+        path = self._dav_path(path)
+        if method == "PROPFIND": return self._propfind(path, headers.get("Depth", "infinity"))
+        if path is None: return 405, ""
+        parent = path.rsplit("/", 1)[0]
+
+        if method == "GET":
+            if path not in self._entries or self._entries[path]["isDir"]: return 404, ""
+            return 200, self._contents.get(path, b"")
+        if method == "PUT":
+            if parent not in self._children: return 409, ""
+            is_new = path not in self._entries
+            if not is_new: self._remove(path)
+            self._add(path, False, len(body), body)
+            self._record(path, "UPLOAD")
+            return (201 if is_new else 204), ""
+        if method == "MKCOL":
+            if path in self._entries: return 405, ""
+            if parent not in self._children: return 409, ""
+            self._add(path, True)
+            self._record(path, "CREATE", True)
+            return 201, ""
+        if method == "DELETE":
+            entry = self._remove(path)
+            if entry is None: return 404, ""
+            self._record(path, "DELETE", entry["isDir"])
+            return 204, ""
+        if method in ("MOVE", "COPY"):
+            if path not in self._entries: return 404, ""
+            destination = self._dav_path(urllib.parse.unquote(urllib.parse.urlsplit(headers.get("Destination", "")).path))
+            if destination is None or destination.rsplit("/", 1)[0] not in self._children: return 409, ""
+            is_new = destination not in self._entries
+            if not is_new:
+                if headers.get("Overwrite", "T") == "F": return 412, ""
+                self._remove(destination)
+            self._move_entry(path, destination, method == "COPY")
+            self._record(path, method)
+            return (201 if is_new else 204), ""
+        return 405, ""
+
+    ## 请求分发
+
+    def _handle(self, method, raw_path, body, headers=None):
+        parts = urllib.parse.urlsplit(raw_path)
+        path = urllib.parse.unquote(parts.path)
+        query = dict(urllib.parse.parse_qsl(parts.query, keep_blank_values=True))
+        form = {}
+        if method == "POST" and not path.startswith("/d/ajax/fileops/uploadXHRV2"):
+            form = dict(urllib.parse.parse_qsl(body.decode("utf-8"), keep_blank_values=True))
+
+        with self._lock:
+            self.requests += 1
+            if path == "/dav" or path.startswith("/dav/"): return self._dav(method, path, headers or {}, body)
+            if path == "/d/ajax/userop/getUserInfo": return 200, self._user_info(query, form)
+            if path == "/d/ajax/sandbox/listTrash": return 200, {"sandboxes": []}
+            if path.startswith("/d/ajax/browse"): return 200, self._browse(path[len("/d/ajax/browse"):].rstrip("/"), query)
+            if path.startswith("/d/ajax/listTrashDir"): return 200, self._browse(path[len("/d/ajax/listTrashDir"):].rstrip("/"), query, True)
+            if path == "/d/ajax/getEvents": return 200, self._events_page(query)
+            if path in ("/d/ajax/fileops/delete", "/d/ajax/dirops/delete"): return 200, self._delete(form)
+            if path == "/d/ajax/rename": return 200, self._rename(form)
+            if path == "/d/ajax/submitMove": return 200, self._submit_move(form, False)
+            if path == "/d/ajax/submitCopy": return 200, self._submit_move(form, True)
+            if path in ("/d/ajax/moveProgress", "/d/ajax/restoreProgress"): return 200, self._progress(query)
+            if path == "/d/ajax/fileops/create": return 200, self._create(form, False)
+            if path == "/d/ajax/dirops/create": return 200, self._create(form, True)
+            if path == "/d/ajax/fileops/uploadXHRV2": return 200, self._upload(query, body)
+            if path == "/d/ajax/restoreDel": return 200, self._restore(form)
+            if path == "/d/ajax/purge": return 200, self._purge(form)
+            if path == "/d/ajax/fileops/undoEvents": return self._undo(form)
+            if path.rstrip("/") == "/d/ajax/pubops/list": return 200, self._share_list(query)
+            if path == "/d/ajax/dirops/pub": return 200, self._share(form)
+            if path == "/d/ajax/pubops/revoke": return 200, self._revoke(form)
+            if path == "/d/ajax/pubInfo": return 200, self._shares.get(query.get("path"), {})
+            if path == "/d/ajax/dlink": return 200, self._dlink(query)
+            if path.startswith("/d/ajax/versions"): return 200, self._version_list(path[len("/d/ajax/versions"):])
+            if path.startswith("/d/file/"): return 200, self._file(path[len("/d/file"):], query)
+        return 404, {"error": "not found"}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _respond(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                if server.latency: time.sleep(server.latency)
+
+                status, payload = server._handle(method, self.path, body, self.headers)
+                if isinstance(payload, bytes): data = payload
+                elif isinstance(payload, str): data = payload.encode("utf-8")
+                else: data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+                ## 文件内容支持 Range 请求，起点超出内容时返回 416（空文件的任何区间都不满足）
+                match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+                if isinstance(payload, bytes) and match and status == 200 and int(match.group(1)) >= len(data):
+                    self.send_response(416)
+                    self.send_header("Content-Range", "bytes */" + str(len(data)))
+                    data = b""
+                elif isinstance(payload, bytes) and match and status == 200:
+                    start = int(match.group(1))
+                    end = int(match.group(2)) if match.group(2) else len(data) - 1
+                    self.send_response(206)
+                    self.send_header("Content-Range", "bytes " + str(start) + "-" + str(end) + "/" + str(len(data)))
+                    data = data[start:end + 1]
+                else:
+                    self.send_response(status)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+            ## WebDAV
+            def do_PROPFIND(self):
+                self._respond("PROPFIND")
+
+            def do_PUT(self):
+                self._respond("PUT")
+
+            def do_MKCOL(self):
+                self._respond("MKCOL")
+
+            def do_DELETE(self):
+                self._respond("DELETE")
+
+            def do_MOVE(self):
+                self._respond("MOVE")
+
+            def do_COPY(self):
+                self._respond("COPY")
+
+        return Handler
@@ -0,0 +1,150 @@
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import platform
+import subprocess
+from jianguo.api import Jianguo
+from benchmarks.fake_server import FakeJianguoServer
+
+ROOT = Jianguo.DEFAULT_SANDBOX_NAME
+
+# 计算分位数
+def percentile(values, p) -> float:
+    if values == []: return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+# 重复执行 func(i) 并统计每次的耗时和请求数
+def measure(client, name, func, count) -> dict:
+    latencies = []
+    with client.count_requests() as counter:
+        begin = time.perf_counter()
+        for i in range(count):
+            start = time.perf_counter()
+            func(i)
+            latencies.append(time.perf_counter() - start)
+        elapsed = time.perf_counter() - begin
+
+    result = {
+        "ops": count,
+        "elapsed": elapsed,
+        "ops_per_sec": count / elapsed if elapsed > 0 else 0.0,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "requests": counter["requests"],
+        "requests_per_op": counter["requests"] / count if count else 0.0,
+    }
+    print("%-24s %10.1f ops/s  p50 %8.2f ms  p99 %8.2f ms  %6.2f req/op" % (name, result["ops_per_sec"], result["p50"] * 1000, result["p99"] * 1000, result["requests_per_op"]))
+    return result
+
+def new_client(server) -> Jianguo:
+    client = Jianguo()
+    client._host_url = server.url
+    return client
+
+def bench_path_cut(server, args) -> dict:
+    client = new_client(server)
+    results = {"path_cut": measure(client, "path_cut", lambda i: client.path_cut(ROOT + "/dir0/file" + str(i % args.files) + ".txt"), args.ops)}
+    client.set_sandbox_cache_ttl(0)
+    results["path_cut_uncached"] = measure(client, "path_cut (no cache)", lambda i: client.path_cut(ROOT + "/dir0/file" + str(i % args.files) + ".txt"), args.ops)
+    return results
+
+def bench_get_file_info(server, args) -> dict:
+    client = new_client(server)
+    results = {"get_file_info": measure(client, "get_file_info", lambda i: client.get_file_info(ROOT + "/dir0/file" + str(i % args.files) + ".txt"), args.ops)}
+    client.enable_list_cache(poll_interval=60)
+    results["get_file_info_cached"] = measure(client, "get_file_info (cache)", lambda i: client.get_file_info(ROOT + "/dir0/file" + str(i % args.files) + ".txt"), args.ops)
+    return results
+
+def bench_events(server, args) -> dict:
+    client = new_client(server)
+    count = max(1, args.ops // 50)
+    ## get_event 按页数翻页（原有接口），iter_events 逐条流式获取，两者都读取全部页
+    pages = max(1, -(-args.events // server.EVENT_PAGE_SIZE))
+    return {
+        "get_event": measure(client, "get_event (" + str(pages) + " pages)", lambda i: len(client.get_event(ROOT, page_num=pages)[0]), count),
+        "iter_events": measure(client, "iter_events (all pages)", lambda i: sum(1 for _ in client.iter_events(ROOT)), count),
+    }
+
+def bench_walk(server, args) -> dict:
+    client = new_client(server)
+    results = {}
+    for workers in (1, args.workers):
+        results["walk_" + str(workers)] = measure(client, "walk (" + str(workers) + " workers)", lambda i: sum(len(files) for _, _, files in client.walk(ROOT, max_workers=workers)), max(1, args.ops // 100))
+    return results
+
+def bench_delete(server, args) -> dict:
+    client = new_client(server)
+    results = {}
+    directories = server.paths("", is_dir=True)
+
+    ## 每轮删除一个目录中的全部文件
+    def delete_loop(i):
+        for path in server.paths(directories[0], is_dir=False): client.delete(ROOT + path)
+    def delete_many(i):
+        client.delete_many([ROOT + path for path in server.paths(directories[1], is_dir=False)])
+
+    results["delete_loop"] = measure(client, "delete (loop, per dir)", delete_loop, 1)
+    results["delete_many"] = measure(client, "delete_many (per dir)", delete_many, 1)
+    return results
+
+def bench_export_versions(server, args) -> dict:
+    client = new_client(server)
+    dest = tempfile.mkdtemp()
+    try:
+        results = {"export_versions": measure(client, "export_versions (full)", lambda i: client.export_versions(ROOT + "/dir0", dest, max_workers=args.workers), 1)}
+        results["export_versions_incremental"] = measure(client, "export_versions (rerun)", lambda i: client.export_versions(ROOT + "/dir0", dest, max_workers=args.workers), 1)
+    finally:
+        shutil.rmtree(dest)
+    return results
+
+BENCHMARKS = {
+    "path_cut": bench_path_cut,
+    "get_file_info": bench_get_file_info,
+    "events": bench_events,
+    "walk": bench_walk,
+    "delete": bench_delete,
+    "export_versions": bench_export_versions,
+}
+
+def git_version() -> str:
+    try:
+        return subprocess.check_output(["git", "describe", "--always", "--dirty"], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return "unknown"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="坚果云 API 性能测试（使用本地模拟服务）")
+    parser.add_argument("--latency", type=float, default=0.002, help="每个请求附加的服务端延迟（秒）")
+    parser.add_argument("--depth", type=int, default=2, help="目录树层数")
+    parser.add_argument("--dirs", type=int, default=4, help="每个目录下的子目录数")
+    parser.add_argument("--files", type=int, default=100, help="每个目录下的文件数")
+    parser.add_argument("--events", type=int, default=2000, help="操作历史条数")
+    parser.add_argument("--ops", type=int, default=200, help="每项测试的操作次数")
+    parser.add_argument("--workers", type=int, default=8, help="并发测试的线程数")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="只运行指定的测试，可重复")
+    parser.add_argument("--output", default="bench_result.json", help="结果 JSON 文件路径")
+    args = parser.parse_args(argv)
+
+    report = {
+        "version": git_version(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("only", "output")},
+        "results": {},
+    }
+    for name in args.only or BENCHMARKS:
+        ## 每项测试使用新的数据集，避免相互影响
+        with FakeJianguoServer(args.latency, args.depth, args.dirs, args.files, args.events) as server:
+            report["results"].update(BENCHMARKS[name](server, args))
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print("results saved to " + args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
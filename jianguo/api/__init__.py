@@ -1,3 +1,15 @@
 from jianguo.api.core import Jianguo
+from jianguo.api.aio import AsyncJianguo
+from jianguo.api.archive import VersionExporter
+from jianguo.api.download import Downloader
+from jianguo.api.index import Index
+from jianguo.api.metrics import Metrics
+from jianguo.api.progress import OperationTracker, AsyncOperationTracker
+from jianguo.api.ratelimit import RequestScheduler, AsyncRequestScheduler, RequestError
+from jianguo.api.query import ResultSet, Range, Prefix
+from jianguo.api.sync import SyncEngine
+from jianguo.api.webdav import WebDAV
+from jianguo.api.transport import Transport, UrllibTransport, PooledTransport
+from jianguo.api.aiotransport import AsyncTransport
 
-__all__ = ["utils", "Jianguo"]
+__all__ = ["utils", "Jianguo", "AsyncJianguo", "Downloader", "SyncEngine", "VersionExporter", "Index", "ResultSet", "Range", "Prefix", "OperationTracker", "AsyncOperationTracker", "Metrics", "RequestScheduler", "AsyncRequestScheduler", "RequestError", "WebDAV", "Transport", "UrllibTransport", "PooledTransport", "AsyncTransport"]
@@ -0,0 +1,973 @@
+import os
+import json
+import time
+import asyncio
+import functools
+import threading
+import urllib.error
+import urllib.parse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from jianguo.api.core import Jianguo
+from jianguo.api.events import EventCursor, ListingPoll, UndoScheduler
+from jianguo.api.query import matcher
+from jianguo.api.progress import AsyncOperationTracker
+from jianguo.api.metrics import AsyncMeteredResponse
+from jianguo.api.jsonstream import JsonArrayStream, StreamDecoder
+from jianguo.api.ratelimit import RequestScheduler, AsyncRequestScheduler, AdaptiveLimiter, RequestError
+from jianguo.api.transport import PooledTransport
+from jianguo.api.aiotransport import AsyncTransport
+from jianguo.api.utils import logger
+from jianguo.api.webdav import WebDAV
+
+# 将 Jianguo 的同名方法包装为协程，用共享状态的同步客户端（见 AsyncJianguo.client）在 max_blocking_workers 个线程的线程池中执行
+## 只用于读写本地文件的传输类方法，见 AsyncJianguo 的说明
+def _blocking(name):
+    method = getattr(Jianguo, name)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(method, self.client, *args, **kwargs))
+
+    return wrapper
+
+# 坚果云 API 的 asyncio 版本，方法与 Jianguo 一一对应，发出请求的方法为协程，路径解析、结果筛选、缓存和请求统计继承 Jianguo 的实现
+## 请求通过 AsyncTransport（基于 asyncio.open_connection 的连接池）在事件循环中发出，不占用线程，
+## 同时进行的请求数由 AsyncRequestScheduler 的自适应并发上限控制（初始和最大为 max_concurrency），可同时发起成千上万个调用
+## 异步操作（移动、复制、恢复）由 AsyncOperationTracker 轮询，submit_move、submit_recovery 和 track_operation 返回 asyncio.Task
+## download、sync、upload、upload_many、export_versions 读写本地文件，仍在线程池中调用同步版本，使用同步的连接池和调度器；
+## open_webdav、open_index 返回的对象同样使用同步的连接池和调度器
+## 连接池和调度器属于第一次使用它们的事件循环，同一个实例不能跨事件循环使用
+class AsyncJianguo(Jianguo):
+    def __init__(self, max_concurrency=64, transport=None, max_blocking_workers=4):
+        super().__init__(transport or AsyncTransport(pool_size=max_concurrency))
+        self._scheduler = AsyncRequestScheduler(limiter=AdaptiveLimiter(max_concurrency, 1, max_concurrency))
+        self._scheduler.on_retry = self._metrics.record_retry
+        self._sync_transport = PooledTransport()
+        self._sync_transport.on_retry = self._metrics.record_retry
+        self._sync_scheduler = RequestScheduler()
+        self._sync_scheduler.on_retry = self._metrics.record_retry
+        self._max_concurrency = max_concurrency
+        self._max_blocking_workers = max_blocking_workers
+        self._executor = None
+        self._sandbox_fetches = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # 获取共用登录状态、缓存和请求统计的同步客户端，使用同步的连接池和调度器
+    ## 每次获取时按当前状态创建，之后登录或开关列表缓存不会影响已获取的客户端
+    @property
+    def client(self) -> Jianguo:
+        client = Jianguo.__new__(Jianguo)
+        client.__dict__.update(self.__dict__)
+        client._transport = self._sync_transport
+        client._scheduler = self._sync_scheduler
+        client._tracker = None
+        client._tracker_lock = threading.Lock()
+        return client
+
+    # 关闭连接池、线程池和进度跟踪
+    def close(self):
+        self._transport.close()
+        self._sync_transport.close()
+        if self._executor is not None: self._executor.shutdown(wait=False)
+        if self._tracker is not None: self._tracker.close()
+
+    # 同步方法使用的线程池，首次使用时创建
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None: self._executor = ThreadPoolExecutor(max_workers=self._max_blocking_workers, thread_name_prefix="jianguo")
+        return self._executor
+
+    # 通过调度器发送请求（限速、并发控制和重试），重试后仍失败时抛出 RequestError
+    async def _request(self, method, url, headers, body=None):
+        return await self._scheduler.execute(method, url, lambda: self._send_request(method, url, headers, body))
+
+    # 发送一次请求并记录统计信息
+    async def _send_request(self, method, url, headers, body=None):
+        if hasattr(body, "seek"): body.seek(0)
+        self._metrics.before(method, url, headers)
+        begin = time.monotonic()
+        try:
+            response = await self._transport.request(method, url, headers, body)
+        except Exception as e:
+            elapsed = time.monotonic() - begin
+            logger.debug("%s %s failed after %.3fs: %r", method, url, elapsed, e)
+            self._metrics.record(method, url, elapsed, status=getattr(e, "code", None), error=repr(e))
+            raise
+
+        elapsed = time.monotonic() - begin
+        logger.debug("%s %s %d %dB %.3fs", method, url, response.status, len(response.body), elapsed)
+        self._metrics.record(method, url, elapsed, len(response.body), response.status)
+        return response
+
+    # 建立一次流式 GET 请求，返回 (response, 开始时间)
+    async def _open_stream(self, url, headers) -> tuple:
+        self._metrics.before("GET", url, headers)
+        begin = time.monotonic()
+        try:
+            return await self._transport.open("GET", url, headers), begin
+        except Exception as e:
+            elapsed = time.monotonic() - begin
+            logger.debug("GET %s failed after %.3fs: %r", url, elapsed, e)
+            self._metrics.record("GET", url, elapsed, status=getattr(e, "code", None), error=repr(e))
+            raise
+
+    # 通过调度器建立流式 GET 请求，返回 AsyncMeteredResponse，规则同 Jianguo._open
+    async def _open(self, url, headers) -> AsyncMeteredResponse:
+        response, begin = await self._scheduler.execute("GET", url, lambda: self._open_stream(url, headers))
+        return AsyncMeteredResponse(response, self._metrics, "GET", url, begin)
+
+    # 流式 GET 请求，规则同 Jianguo._iter_json；提前结束遍历时应 aclose() 以便及时关闭连接
+    async def _iter_json(self, url, key, fields=None):
+        headers = dict(self._headers)
+        if getattr(self._transport, "compress", False): headers["Accept-Encoding"] = "gzip, deflate"
+
+        async with await self._open(url, headers) as response:
+            stream = JsonArrayStream(None, key)
+            decoder = StreamDecoder(response.headers.get("Content-Encoding"))
+            while True:
+                chunk = await response.read_chunk()
+                if not chunk: break
+                for item in stream.feed(decoder.decode(chunk)): yield item
+            for item in stream.feed(decoder.flush()) + stream.close(): yield item
+            if fields is not None: fields.update(stream.fields)
+
+    async def _get(self, url):
+        response = await self._request("GET", url, self._headers)
+
+        return response.text()
+
+    async def _post(self, url, data):
+        datas = urllib.parse.urlencode(data).encode("utf-8")
+        headers = dict(self._headers)
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        response = await self._request("POST", url, headers, datas)
+
+        return response.text()
+
+    # 并发执行协程，同时进行的不超过 max_workers 个，返回与 coroutines 对应的 [(结果, 异常)]
+    async def _gather(self, coroutines, max_workers) -> list:
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def run(coroutine):
+            async with semaphore:
+                try:
+                    return await coroutine, None
+                except Exception as e:
+                    return None, e
+
+        return await asyncio.gather(*[run(coroutine) for coroutine in coroutines])
+
+    # 设置连接超时和读取超时（秒），同时作用于线程池中使用的同步连接池
+    def set_timeout(self, connect_timeout=10, read_timeout=60) -> int:
+        if not isinstance(self._transport, AsyncTransport):
+            return Jianguo.FAILED
+        for transport in (self._transport, self._sync_transport):
+            transport.connect_timeout = connect_timeout
+            transport.read_timeout = read_timeout
+        return Jianguo.SUCCESS
+
+    ## 调度器设置同时作用于异步调度器和线程池中使用的同步调度器
+    def set_rate_limit(self, endpoint_class, rate, burst=None) -> int:
+        code = super().set_rate_limit(endpoint_class, rate, burst)
+        if code == Jianguo.SUCCESS: self._sync_scheduler.set_rate(endpoint_class, rate, burst)
+        return code
+
+    def set_retry(self, max_retries=4, backoff=0.5, max_backoff=30) -> int:
+        for scheduler in (self._scheduler, self._sync_scheduler):
+            scheduler.max_retries = max_retries
+            scheduler.backoff = backoff
+            scheduler.max_backoff = max_backoff
+        return Jianguo.SUCCESS
+
+    def set_concurrency(self, initial=8, minimum=1, maximum=64) -> int:
+        code = super().set_concurrency(initial, minimum, maximum)
+        if code == Jianguo.SUCCESS: self._sync_scheduler.set_concurrency(initial, minimum, maximum)
+        return code
+
+    # 获取同步的 WebDAV 客户端，参数同 Jianguo.open_webdav
+    def open_webdav(self, user, password, depth="infinity", base_url=WebDAV.DEFAULT_URL, max_workers=8) -> WebDAV:
+        return self.client.open_webdav(user, password, depth, base_url, max_workers)
+
+    # 打开本地元数据索引，索引通过同步客户端抓取，参数同 Jianguo.open_index
+    def open_index(self, db_path, max_workers=8):
+        return self.client.open_index(db_path, max_workers)
+
+    # 获取账户基本信息
+    async def get_user_info(self) -> dict:
+        resp = await self._get(self._host_url + "/d/ajax/userop/getUserInfo")
+        return json.loads(resp)
+
+    # 获取 sandbox 列表（优先使用缓存），同时发生的未命中共用一次请求
+    async def _get_sandboxes(self, is_deleted=False) -> list:
+        sandboxes = self._snd_cache.get(is_deleted)
+        if sandboxes is not None: return sandboxes
+
+        task = self._sandbox_fetches.get(is_deleted)
+        if task is None:
+            task = self._sandbox_fetches[is_deleted] = asyncio.ensure_future(self._fetch_sandboxes(is_deleted))
+            task.add_done_callback(lambda _: self._sandbox_fetches.pop(is_deleted, None))
+        ## 某个调用被取消时不影响其他等待同一请求的调用
+        return await asyncio.shield(task)
+
+    async def _fetch_sandboxes(self, is_deleted) -> list:
+        if is_deleted: sandboxes = await self.get_sandbox_rec_list()
+        else: sandboxes = (await self.get_user_info())["sandboxes"]
+
+        self._snd_cache.put(sandboxes, is_deleted)
+        return sandboxes
+
+    # 根据某键内容获取单个或多个 sandbox 信息
+    async def get_snd_info_by(self, is_deleted=False, is_greedy=False, **kwargs) -> list:
+        sandboxes = await self._get_sandboxes(is_deleted)
+        return self.get_target_result(sandboxes, is_greedy, **kwargs)
+
+    # 通过名称获取 sandbox 信息，缓存中找不到时重新获取一次
+    async def _resolve_sandbox(self, sandbox_name, is_deleted=False) -> dict:
+        info = self._snd_cache.get_by_name(sandbox_name, is_deleted)
+        if info is not None: return info
+
+        ## 已有进行中的请求时直接等待其结果，不再使缓存失效
+        if is_deleted not in self._sandbox_fetches: self._snd_cache.invalidate(is_deleted)
+        return (await self.get_snd_info_by(name=sandbox_name, is_deleted=is_deleted))[0]
+
+    # 分解 path 为 snd_id、snd_magic 和 path
+    async def path_cut(self, path, is_deleted=False) -> tuple:
+        sandbox_name, path = self._split_path(path)
+        info = await self._resolve_sandbox(sandbox_name, is_deleted)
+        return info["sandboxId"], info["magic"], path
+
+    # 通过cookie登录
+    async def login_by_cookie(self, cookie: dict) -> int:
+        self._cookies = cookie
+        self._headers = dict(self._headers, cookie=cookie)
+        self._snd_cache.invalidate()
+        self._share_cache.invalidate()
+        self._uesr_info = await self.get_user_info()
+
+        return Jianguo.SUCCESS
+
+    # 注销
+    async def logout(self) -> int:
+        await self._get(self._host_url + "/logout")
+        self._cookies = None
+        self._snd_cache.invalidate()
+        self._share_cache.invalidate()
+        return Jianguo.SUCCESS
+
+    # 通过 uuid 判断操作是否成功
+    async def is_success_by_uuid(self, path, uuid) -> bool:
+        resp = await self._get(self._host_url + path + json.loads(uuid)["uuid"])
+        return json.loads(resp)["state"] == "SUCCESS"
+
+    # 查询一次异步操作的状态
+    async def get_progress_state(self, path, uuid) -> str:
+        resp = await self._get(self._host_url + path + uuid)
+        return json.loads(resp)["state"]
+
+    # 获取异步操作进度跟踪器，首次调用时创建；track_operation 通过它返回结果为最终状态的 Task
+    def get_operation_tracker(self) -> AsyncOperationTracker:
+        if self._tracker is None: self._tracker = AsyncOperationTracker(self.get_progress_state)
+        return self._tracker
+
+    # 新建同步文件夹
+    async def creat_sandbox(self, name, **kwargs) -> dict:
+        resp = await self._post(self._host_url + "/d/ajax/sandbox/create", self._creat_sandbox_data(name, kwargs))
+        self._snd_cache.invalidate()
+        return json.loads(resp)
+
+    # 删除同步文件夹
+    async def delete_sandbox(self, path, snd_id="", snd_magic="") -> int:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+
+        await self._post(self._host_url + "/d/ajax/sandbox/delete?sndId=" + snd_id + "&sndMagic=" + snd_magic, {})
+        self._snd_cache.invalidate()
+        return Jianguo.SUCCESS
+
+    # 获取同步文件夹回收站列表
+    async def get_sandbox_rec_list(self) -> dict:
+        file_list = await self._get(self._host_url + "/d/ajax/sandbox/listTrash")
+        return json.loads(file_list)["sandboxes"]
+
+    # 从回收站恢复同步文件夹
+    async def recovery_sandbox(self, path, snd_id="", snd_magic="") -> int:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path, is_deleted=True)
+
+        await self._post(self._host_url + "/d/ajax/sandbox/restore?sndId=" + snd_id + "&sndMagic=" + snd_magic, {})
+        self._snd_cache.invalidate()
+        return Jianguo.SUCCESS
+
+    # 获取同步文件夹信息
+    async def get_sandbox_info(self, path, snd_id="", snd_magic="") -> dict:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+        path = "/"
+
+        sandbox_info = await self._get(self._host_url + "/d/ajax/sandbox/metaData?path=" + path + "&sndId=" + snd_id + "&sndMagic=" + snd_magic)
+        return json.loads(sandbox_info)
+
+    # 修改同步文件夹信息
+    async def update_sandbox_info(self, original_name, **kwargs) -> int:
+        data = self._sandbox_data(await self.get_sandbox_info(original_name), kwargs)
+
+        await self._post(self._host_url + "/d/ajax/sandbox/updateMetaData?sndId=" + data["id"] + "&sndMagic=" + data["magic"], data)
+        self._snd_cache.invalidate()
+        return Jianguo.SUCCESS
+
+    # 新建文件
+    async def creat_file(self, path, snd_id="", snd_magic="", type="txt") -> int:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+
+        data = {
+            "path": path,
+            "content_uri": "/static/others/empty.txt",
+        }
+
+        await self._post(self._host_url + "/d/ajax/fileops/create?sndId=" + snd_id + "&sndMagic=" + snd_magic, data)
+        self._touch_listing(snd_id, path, is_dir=False)
+        return Jianguo.SUCCESS
+
+    # 新建文件夹
+    async def creat_dir(self, path, snd_id="", snd_magic="") -> int:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+
+        data = {
+            "path": path,
+        }
+
+        await self._post(self._host_url + "/d/ajax/dirops/create?sndId=" + snd_id + "&sndMagic=" + snd_magic, data)
+        self._touch_listing(snd_id, path)
+        return Jianguo.SUCCESS
+
+    # 删除项目
+    async def delete(self, path, snd_id="", snd_magic="") -> int:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+        file = (await self.get_file_info(path, snd_id, snd_magic))[0]
+
+        data = {
+            path: file["rev"],
+        }
+
+        await self._post(self._delete_url(snd_id, snd_magic, file["isDir"]), data)
+        self._touch_listing(snd_id, path, file["isDir"])
+        return Jianguo.SUCCESS
+
+    # 将多个 path 按 (snd_id, snd_magic, 父目录) 分组，返回 {分组: [(原 path, 目录内 path, 名称)]}
+    async def _group_by_parent(self, paths) -> dict:
+        groups = {}
+        for original_path in paths:
+            snd_id, snd_magic, path = await self.path_cut(original_path)
+            parent, name = os.path.split(path)
+            groups.setdefault((snd_id, snd_magic, parent), []).append((original_path, path, name))
+        return groups
+
+    # 删除同一目录下的一组项目：只列出一次目录获取 rev，再按 batch_size 合并请求
+    async def _delete_group(self, snd_id, snd_magic, parent, items, batch_size) -> dict:
+        contents = (await self.get_file_list(parent, snd_id, snd_magic))["contents"]
+        results, requests = self._delete_requests(contents, snd_id, snd_magic, items, batch_size)
+
+        for url, data, batch in requests:
+            try:
+                await self._post(url, data)
+                code = Jianguo.SUCCESS
+            except Exception as e:
+                code = self._error_code(e)
+            for _, path, _ in batch: self._touch_listing(snd_id, path)
+            for original_path, _, _ in batch: results[original_path] = code
+        return results
+
+    # 批量删除项目，各目录并发处理，同时进行的不超过 max_workers 个，返回内容同 Jianguo.delete_many
+    async def delete_many(self, paths, batch_size=100, max_workers=4) -> dict:
+        results = {}
+        groups = await self._group_by_parent(paths)
+        outcomes = await self._gather([self._delete_group(*key, items, batch_size) for key, items in groups.items()], max_workers)
+        for items, (result, error) in zip(groups.values(), outcomes):
+            if error is None: results.update(result)
+            else:
+                for original_path, _, _ in items: results[original_path] = self._error_code(error)
+        return results
+
+    # 通过条件获取回收站项目信息，筛选规则同 get_file_info
+    async def get_rec_file_info(self, path, snd_id="", snd_magic="", is_greedy=False, **kwargs) -> list:
+        return await self.get_file_info(path, snd_id, snd_magic, True, is_greedy, **kwargs)
+
+    # 彻底删除回收站项目
+    async def delete_rec(self, path, snd_id="", snd_magic="") -> int:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+        item = (await self.get_rec_file_info(path, snd_id=snd_id, snd_magic=snd_magic))[0]
+        return (await self._purge_entries([(path, snd_id, snd_magic, path, item)], 1, 1))[path]
+
+    # 并发遍历 path 下的回收站，逐个生成被删除的项目，参数和规则同 Jianguo.iter_trash
+    async def iter_trash(self, path, max_workers=8, since=None, until=None, pattern=None, snd_id="", snd_magic=""):
+        prefix = ""
+        if snd_id == "":
+            snd_id, snd_magic, inner_path = await self.path_cut(path)
+            prefix = path[:len(path) - len(inner_path)]
+            path = inner_path
+        path = path.rstrip("/")
+
+        expand = lambda node, contents: self._trash_expand(node, contents, prefix, since, until, pattern)
+        items = self._crawl([(path, False, 0), (path, True, 0)], snd_id, snd_magic, max_workers, expand)
+        try:
+            async for item in items: yield item
+        finally:
+            await items.aclose()
+
+    # 列出回收站中的一组项目，每个目录只列出一次，返回内容同 Jianguo._resolve_trash
+    async def _resolve_trash(self, paths, max_workers) -> tuple:
+        entries, results = [], {}
+        groups = await self._group_by_parent(paths)
+        outcomes = await self._gather([self.get_file_list(parent, snd_id, snd_magic, True) for snd_id, snd_magic, parent in groups], max_workers)
+        for ((snd_id, snd_magic, _), items), (file_list, error) in zip(groups.items(), outcomes):
+            if error is not None:
+                for original_path, _, _ in items: results[original_path] = self._error_code(error)
+                continue
+            self._match_trash(file_list["contents"], snd_id, snd_magic, items, entries, results)
+        return entries, results
+
+    # 并发执行 submit(snd_id, snd_magic, batch) 并汇总为 {原始 path: 状态码}
+    async def _run_trash_batches(self, entries, batch_size, max_workers, submit) -> dict:
+        batches, covered = self._batch_trash(entries, batch_size)
+        outcomes = await self._gather([submit(*batch) for batch in batches], max_workers)
+        codes = [code if error is None else self._error_code(error) for code, error in outcomes]
+        return self._trash_results(batches, codes, covered)
+
+    # 彻底删除一批回收站项目
+    async def _purge_batch(self, snd_id, snd_magic, batch) -> int:
+        await self._post(self._host_url + "/d/ajax/purge?sndId=" + snd_id + "&sndMagic=" + snd_magic, self._purge_data(batch))
+        return Jianguo.SUCCESS
+
+    # 恢复一批回收站项目，并等待返回的 uuid 对应的操作完成
+    async def _restore_batch(self, snd_id, snd_magic, batch) -> int:
+        data = {path: "" for _, _, _, path, _ in batch}
+        uuid = await self._post(self._host_url + "/d/ajax/restoreDel?sndId=" + snd_id + "&sndMagic=" + snd_magic, data)
+        for _, _, _, path, _ in batch: self._touch_listing(snd_id, path)
+
+        return self._state_code(await self.track_operation("/d/ajax/restoreProgress?uuid=", uuid))
+
+    async def _purge_entries(self, entries, batch_size=100, max_workers=4) -> dict:
+        return await self._run_trash_batches(entries, batch_size, max_workers, self._purge_batch)
+
+    async def _restore_entries(self, entries, batch_size=100, max_workers=4) -> dict:
+        return await self._run_trash_batches(entries, batch_size, max_workers, self._restore_batch)
+
+    # 批量彻底删除回收站项目，返回内容同 Jianguo.purge_many
+    async def purge_many(self, paths, batch_size=100, max_workers=4) -> dict:
+        entries, results = await self._resolve_trash(paths, max_workers)
+        results.update(await self._purge_entries(entries, batch_size, max_workers))
+        return results
+
+    # 批量从回收站恢复，返回内容同 Jianguo.restore_many
+    async def restore_many(self, paths, batch_size=100, max_workers=4) -> dict:
+        entries, results = await self._resolve_trash(paths, max_workers)
+        results.update(await self._restore_entries(entries, batch_size, max_workers))
+        return results
+
+    # 彻底删除 path 下回收站中符合条件的项目，筛选参数同 iter_trash，返回 {path: 状态码}
+    async def purge_trash(self, path, since=None, until=None, pattern=None, batch_size=100, max_workers=8) -> dict:
+        entries = [(item["path"],) + await self.path_cut(item["path"]) + (item,) async for item in self.iter_trash(path, max_workers, since, until, pattern)]
+        return await self._purge_entries(entries, batch_size, max_workers)
+
+    # 恢复 path 下回收站中符合条件的项目，筛选参数同 iter_trash，返回 {path: 状态码}
+    async def restore_trash(self, path, since=None, until=None, pattern=None, batch_size=100, max_workers=8) -> dict:
+        entries = [(item["path"],) + await self.path_cut(item["path"]) + (item,) async for item in self.iter_trash(path, max_workers, since, until, pattern)]
+        return await self._restore_entries(entries, batch_size, max_workers)
+
+    # 从回收站恢复文件
+    async def recovery(self, path, snd_id="", snd_magic="") -> int:
+        task = await self.submit_recovery(path, snd_id, snd_magic)
+        return self._state_code(await task)
+
+    # 提交从回收站恢复文件的操作，不等待完成，返回结果为最终状态的 Task
+    async def submit_recovery(self, path, snd_id="", snd_magic="", callback=None) -> asyncio.Task:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+
+        data = {
+            path: "",
+        }
+
+        uuid = await self._post(self._host_url + "/d/ajax/restoreDel?sndId=" + snd_id + "&sndMagic=" + snd_magic, data)
+        self._touch_listing(snd_id, path)
+        return self.track_operation("/d/ajax/restoreProgress?uuid=", uuid, callback)
+
+    # 从操作历史中读取上次水位之后的新事件，并使涉及的目录失效，规则同 Jianguo.poll_list_cache
+    async def poll_list_cache(self, snd_id, snd_magic, force=False) -> int:
+        cache = self._list_cache
+        if cache is None: return Jianguo.FAILED
+        watermark = cache.get_watermark(snd_id)
+        if watermark is not None and not force and time.monotonic() - watermark["polled"] < cache.poll_interval:
+            return Jianguo.SUCCESS
+
+        poll = ListingPoll(cache, snd_id, self._event_key)
+        pages = self._iter_event_pages(snd_id, snd_magic, page_limit=self.MIX_EVENT_PAGE_NUM)
+        try:
+            async for events, marker in pages:
+                if poll.step(events, marker == 1): break
+        finally:
+            await pages.aclose()
+        poll.finish()
+        return Jianguo.SUCCESS
+
+    # 获取文件列表
+    async def get_file_list(self, path, snd_id="", snd_magic="", is_deleted=False) -> dict:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+
+        ## 回收站列表不缓存
+        is_cached = self._list_cache is not None and not is_deleted
+        if is_cached:
+            await self.poll_list_cache(snd_id, snd_magic)
+            file_list = self._list_cache.get(snd_id, path)
+            if file_list is not None: return file_list
+
+        body = (await self._request("GET", self._list_url(path, snd_id, snd_magic, is_deleted), self._headers)).body
+        result = json.loads(body)
+
+        ## 按响应的字节数计入缓存大小
+        if is_cached: self._list_cache.put(snd_id, path, result, len(body))
+        return result
+
+    # 流式获取文件列表，逐个生成列表项，规则同 Jianguo.iter_file_list
+    async def iter_file_list(self, path, snd_id="", snd_magic="", is_deleted=False):
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+
+        if self._list_cache is not None and not is_deleted:
+            await self.poll_list_cache(snd_id, snd_magic)
+            file_list = self._list_cache.get(snd_id, path)
+            if file_list is not None:
+                for item in file_list["contents"]: yield item
+                return
+
+        items = self._iter_json(self._list_url(path, snd_id, snd_magic, is_deleted), "contents")
+        try:
+            async for item in items: yield item
+        finally:
+            await items.aclose()
+
+    # 通过条件获取文件信息
+    async def get_file_info(self, path, snd_id="", snd_magic="", is_deleted=False, is_greedy=False, **kwargs) -> list:
+        path, name = os.path.split(path)
+        kwargs["name"] = kwargs.get("name", name)
+
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+        files = (await self.get_file_list(path, snd_id, snd_magic, is_deleted))["contents"]
+
+        return self.get_target_result(files, is_greedy, **kwargs)
+
+    # 并发遍历目录树，逐个生成 (dir, dirs, files)，参数含义同 Jianguo.walk，max_workers 默认为 max_concurrency
+    async def walk(self, path, max_workers=None, max_depth=None, is_deleted=False, snd_id="", snd_magic="", onerror=None):
+        max_workers = max_workers or self._max_concurrency
+        prefix = ""
+        if snd_id == "":
+            snd_id, snd_magic, inner_path = await self.path_cut(path)
+            prefix = path[:len(path) - len(inner_path)]
+            path = inner_path
+
+        expand = lambda node, contents: self._walk_expand(node, contents, prefix, max_depth)
+        handler = None if onerror is None else lambda node, e: onerror(prefix + node[0], e)
+        results = self._crawl([(path, is_deleted, 0)], snd_id, snd_magic, max_workers, expand, handler)
+        try:
+            async for result in results: yield result
+        finally:
+            await results.aclose()
+
+    # 按广度优先并发列出目录，参数和规则同 Jianguo._crawl
+    async def _crawl(self, nodes, snd_id, snd_magic, max_workers, expand, onerror=None):
+        pending = deque(nodes)
+        running = {}
+
+        def submit():
+            while pending and len(running) < max_workers:
+                node = pending.popleft()
+                running[asyncio.ensure_future(self.get_file_list(node[0], snd_id, snd_magic, node[1]))] = node
+
+        try:
+            submit()
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    node = running.pop(task)
+                    try:
+                        contents = task.result()["contents"]
+                    except Exception as e:
+                        if onerror is None: raise
+                        onerror(node, e)
+                        continue
+
+                    children, results = expand(node, contents)
+                    pending.extend(children)
+                    submit()
+                    for result in results: yield result
+                submit()
+        finally:
+            for task in running: task.cancel()
+
+    # 移动/复制文件
+    async def move(self, src_path, dst_dir, is_copy=False, snd_id="", snd_magic="", dst_snd_id="", dst_snd_magic="") -> int:
+        task = await self.submit_move(src_path, dst_dir, is_copy, snd_id, snd_magic, dst_snd_id, dst_snd_magic)
+        return self._state_code(await task)
+
+    # 提交移动/复制操作，不等待完成，返回结果为最终状态的 Task
+    async def submit_move(self, src_path, dst_dir, is_copy=False, snd_id="", snd_magic="", dst_snd_id="", dst_snd_magic="", callback=None) -> asyncio.Task:
+        if snd_id == "": snd_id, snd_magic, src_path = await self.path_cut(src_path)
+        if dst_snd_id == "": dst_snd_id, dst_snd_magic, dst_dir = await self.path_cut(dst_dir)
+
+        uuid = await self._post(*self._move_request(src_path, dst_dir, is_copy, snd_id, snd_magic, dst_snd_id, dst_snd_magic))
+        if not is_copy: self._touch_listing(snd_id, src_path)
+        self._touch_listing(dst_snd_id, dst_dir)
+        return self.track_operation("/d/ajax/moveProgress?uuid=", uuid, callback)
+
+    # 批量移动/复制 [(src_path, dst_dir)]，同时提交的不超过 max_workers 个，之后由跟踪器统一等待，返回内容同 Jianguo.move_many
+    async def move_many(self, items, is_copy=False, max_workers=4) -> dict:
+        results = {}
+        submits = await self._gather([self.submit_move(src_path, dst_dir, is_copy) for src_path, dst_dir in items], max_workers)
+        for (src_path, _), (task, error) in zip(items, submits):
+            try:
+                if error is not None: raise error
+                results[src_path] = self._state_code(await task)
+            except Exception as e:
+                results[src_path] = self._error_code(e)
+        return results
+
+    # 批量复制 [(src_path, dst_dir)]，返回 {src_path: 状态码}
+    async def copy_many(self, items, max_workers=4) -> dict:
+        return await self.move_many(items, True, max_workers)
+
+    # 获取文件下载链接
+    async def get_file_link(self, path, snd_id="", snd_magic="") -> str:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+        path = urllib.parse.quote(path)
+
+        resp = await self._get(self._host_url + "/d/ajax/dlink?sndId=" + snd_id + "&sndMagic=" + snd_magic + "&path=" + path)
+        return self._host_url + json.loads(resp)["url"]
+
+    # 以流式请求读取文件内容，返回的响应通过 read_chunk() 或 iter_chunks() 逐块读取，使用后需 close()（支持 async with）
+    async def open_file(self, path, version=None, snd_id="", snd_magic=""):
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+
+        if version is None: url = await self.get_file_link(path, snd_id, snd_magic)
+        else: url = await self.get_file_version_link(path, str(version), snd_id, snd_magic)
+        return await self._open(url, dict(self._headers, **{"Accept-Encoding": "identity"}))
+
+    # 重命名文件
+    async def rename(self, path, dest_name, snd_id="", snd_magic="") -> int:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+        file = (await self.get_file_info(path, snd_id, snd_magic))[0]
+
+        data = {
+            "path": path,
+            "type": "directory" if file["isDir"] else "file",
+            "destName": dest_name,
+            "version": file["rev"],
+        }
+
+        await self._post(self._host_url + "/d/ajax/rename?sndId=" + snd_id + "&sndMagic=" + snd_magic, data)
+        self._touch_listing(snd_id, path, file["isDir"])
+        return Jianguo.SUCCESS
+
+    # 获取文件历史
+    async def get_file_version_list(self, path, snd_id="", snd_magic="") -> dict:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+        path = urllib.parse.quote(path)
+
+        version_list = await self._get(self._host_url + "/d/ajax/versions" + path + "?sndId=" + snd_id + "&sndMagic=" + snd_magic)
+        return json.loads(version_list)
+
+    # 获取文件历史版本下载链接
+    async def get_file_version_link(self, path, version, snd_id="", snd_magic="") -> str:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+        path = urllib.parse.quote(path)
+
+        resp = await self._get(self._host_url + "/d/ajax/dlink?sndId=" + snd_id + "&sndMagic=" + snd_magic + "&path=" + path + "&ver=" + version)
+        return self._host_url + json.loads(resp)["url"]
+
+    # 恢复文件历史版本
+    async def recovery_file_version(self, path, version, snd_id="", snd_magic="") -> int:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+
+        data = {
+            "path": path,
+            "version": version,
+        }
+
+        await self._post(self._host_url + "/d/ajax/fileops/restore?sndId=" + snd_id + "&sndMagic=" + snd_magic, data)
+        self._touch_listing(snd_id, path, is_dir=False)
+        return Jianguo.SUCCESS
+
+    # 获取应用密码
+    async def get_asps(self) -> dict:
+        resp = await self._get(self._host_url + "/d/ajax/userop/getAsps")
+        return json.loads(resp)
+
+    # 创建应用密码
+    async def generate_asp(self, asp_name) -> dict:
+        resp = await self._post(self._host_url + "/d/ajax/userop/generateAsp", {"asp_name": asp_name})
+        return json.loads(resp)
+
+    # 移除应用密码
+    async def revoke_asp(self, asp_name) -> int:
+        await self._post(self._host_url + "/d/ajax/userop/revokeAsp", {"asp_name": asp_name})
+        return Jianguo.SUCCESS
+
+    # 获取书签列表
+    async def get_shortcut_list(self) -> dict:
+        return await self.get_file_list(self.DEFAULT_SHORTCUT_PATH)
+
+    # 创建书签
+    async def create_shortcut(self, path, snd_id="", snd_magic="") -> dict:
+        if snd_id == "": snd_id, snd_magic, dest_path = await self.path_cut(path)
+        else: dest_path = path
+
+        resp = await self._post(self._host_url + "/d/ajax/fileops/createShortcut?sndId=" + snd_id + "&sndMagic=" + snd_magic, {"destPath": dest_path})
+        return json.loads(resp)
+
+    # 获取书签位置
+    async def get_shortcut_location(self, name) -> dict:
+        url = await self.get_file_link(self.DEFAULT_SHORTCUT_PATH + "/" + name + ".nslnk")
+        resp = await self._get(url)
+        return json.loads(resp)
+
+    # 重命名书签
+    async def rename_shortcut(self, name, dest_name) -> int:
+        await self.rename(self.DEFAULT_SHORTCUT_PATH + "/" + name + ".nslnk", dest_name + ".nslnk")
+        return Jianguo.SUCCESS
+
+    # 删除书签
+    async def delete_shortcut(self, name) -> int:
+        await self.delete(self.DEFAULT_SHORTCUT_PATH + "/" + name + ".nslnk")
+        return Jianguo.SUCCESS
+
+    # 创建/编辑分享，规则同 Jianguo.share
+    async def share(self, path, snd_id="", snd_magic="", **kwargs) -> dict:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+
+        result = await self._share(path, snd_id, snd_magic, self._share_cache.get(snd_id), kwargs)
+        self._share_cache.invalidate(snd_id)
+        return result
+
+    # 创建/编辑分享，shares 为该 sandbox 的分享索引，规则同 Jianguo._share
+    async def _share(self, path, snd_id, snd_magic, shares, kwargs) -> dict:
+        share_info = {}
+        if shares is None or path in shares:
+            try:
+                share_info = await self.get_share_info(path, snd_id, snd_magic)
+            except (urllib.error.HTTPError, ValueError):
+                pass
+
+        resp = await self._post(self._host_url + "/d/ajax/dirops/pub?sndId=" + snd_id + "&sndMagic=" + snd_magic, self._share_data(path, share_info, kwargs))
+        return json.loads(resp)
+
+    # 批量分享，每个 sandbox 只获取一次分享索引，之后并发提交，返回内容同 Jianguo.share_many
+    async def share_many(self, paths, max_workers=4, **kwargs) -> dict:
+        results, jobs, sandboxes = {}, [], {}
+        for original_path in paths:
+            try:
+                snd_id, snd_magic, path = await self.path_cut(original_path)
+                if snd_id not in sandboxes: sandboxes[snd_id] = await self._get_shares(snd_id, snd_magic)
+            except Exception as e:
+                results[original_path] = {"code": self._error_code(e)}
+                continue
+            jobs.append((original_path, path, snd_id, snd_magic))
+
+        outcomes = await self._gather([self._share(path, snd_id, snd_magic, sandboxes[snd_id], kwargs) for _, path, snd_id, snd_magic in jobs], max_workers)
+        for (original_path, _, _, _), (result, error) in zip(jobs, outcomes):
+            if error is None: results[original_path] = dict(result, code=Jianguo.SUCCESS)
+            else: results[original_path] = {"code": self._error_code(error)}
+
+        for snd_id in sandboxes: self._share_cache.invalidate(snd_id)
+        return results
+
+    # 撤销一个 sandbox 中的一组分享，每次请求最多包含 batch_size 个，返回 {原始 path: 状态码}
+    async def _revoke_group(self, snd_id, snd_magic, items, batch_size) -> dict:
+        results, requests = self._revoke_requests(await self._get_shares(snd_id, snd_magic), snd_id, snd_magic, items, batch_size)
+
+        for url, data, batch in requests:
+            try:
+                await self._post(url, data)
+                code = Jianguo.SUCCESS
+                self._share_cache.remove(snd_id, [path for _, path, _ in batch])
+            except Exception as e:
+                code = self._error_code(e)
+            for original_path, _, _ in batch: results[original_path] = code
+        return results
+
+    # 批量撤销分享，按 sandbox 分组合并为多键请求，返回 {path: 状态码}
+    async def revoke_many(self, paths, batch_size=100, max_workers=4) -> dict:
+        groups = {}
+        for original_path in paths:
+            snd_id, snd_magic, path = await self.path_cut(original_path)
+            groups.setdefault((snd_id, snd_magic), []).append((original_path, path))
+
+        results = {}
+        outcomes = await self._gather([self._revoke_group(snd_id, snd_magic, items, batch_size) for (snd_id, snd_magic), items in groups.items()], max_workers)
+        for items, (result, error) in zip(groups.values(), outcomes):
+            if error is None: results.update(result)
+            else:
+                for original_path, _ in items: results[original_path] = self._error_code(error)
+        return results
+
+    # 移除分享
+    async def delete_share(self, path, snd_id="", snd_magic="") -> int:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+        return (await self._revoke_group(snd_id, snd_magic, [(path, path)], 1))[path]
+
+    # 获取分享信息
+    async def get_share_info(self, path, snd_id="", snd_magic="") -> dict:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+        resp = await self._get(self._host_url + "/d/ajax/pubInfo?path=" + path + "&sndId=" + snd_id + "&sndMagic=" + snd_magic)
+        return json.loads(resp)
+
+    # 获取 sandbox 的分享索引 {path: 分享信息}（优先使用缓存），force 为 True 时重新获取
+    async def _get_shares(self, snd_id, snd_magic, force=False) -> dict:
+        shares = None if force else self._share_cache.get(snd_id)
+        if shares is not None: return shares
+
+        resp = await self._get(self._host_url + "/d/ajax/pubops/list/?sndId=" + snd_id + "&sndMagic=" + snd_magic)
+        objects = json.loads(resp)["objects"]
+        self._share_cache.put(snd_id, objects)
+        return {share["path"]: share for share in objects}
+
+    # 清空分享列表缓存，path 为 None 时清空所有 sandbox
+    async def clear_share_cache(self, path=None) -> int:
+        if path is None: self._share_cache.invalidate()
+        else: self._share_cache.invalidate((await self.path_cut(path))[0])
+        return Jianguo.SUCCESS
+
+    # 获取指定 path 的分享列表信息
+    async def get_share_list_info(self, path, snd_id="", snd_magic="") -> list:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+        shares = await self._get_shares(snd_id, snd_magic)
+
+        if path == "": return list(shares.values())
+        return shares.get(path)
+
+    # 逐页获取操作历史，生成 (events, marker)，规则同 Jianguo._iter_event_pages
+    async def _iter_event_pages(self, snd_id, snd_magic, marker=0, page_limit=None):
+        page = 0
+        while page_limit is None or page < page_limit:
+            fields = {}
+            events = [event async for event in self._iter_json(self._event_url(snd_id, snd_magic, marker), "events", fields)]
+            marker = fields["marker"]
+            yield events, marker
+
+            page += 1
+            if marker == 1 or events == []: break
+
+    # 逐条流式获取操作历史，规则同 Jianguo._iter_event_stream
+    async def _iter_event_stream(self, snd_id, snd_magic, marker=0, page_limit=None, state=None):
+        page = 0
+        while page_limit is None or page < page_limit:
+            fields, count = {}, 0
+            events = self._iter_json(self._event_url(snd_id, snd_magic, marker), "events", fields)
+            try:
+                async for event in events:
+                    count += 1
+                    yield event
+            finally:
+                await events.aclose()
+            marker = fields["marker"]
+
+            page += 1
+            if marker == 1 or count == 0:
+                if state is not None: state["exhausted"] = True
+                break
+
+    # 获取 sandbox 操作历史列表，参数和返回内容同 Jianguo.get_event
+    async def get_event(self, original_path, marker=0, page_num=1, snd_id="", snd_magic="", from_time=None, to_time=None, is_greedy=False, **kwargs) -> list:
+        if snd_id == "": snd_id, snd_magic, original_path = await self.path_cut(original_path)
+        kwargs["path"] = kwargs.get("path", original_path)
+
+        if page_num == 0: page_limit = self.MIX_EVENT_PAGE_NUM
+        else: page_limit = page_num
+
+        result = []
+        pages = self._iter_event_pages(snd_id, snd_magic, marker, page_limit)
+        try:
+            async for events, marker in pages:
+                if self._collect_events(result, events, page_num, from_time, to_time, is_greedy, kwargs): break
+        finally:
+            await pages.aclose()
+
+        return result, marker
+
+    # 逐条生成 path 下（含自身）的操作历史，参数和水位规则同 Jianguo.iter_events
+    async def iter_events(self, path, since=None, until=None, page_limit=None, marker=0, checkpoint=None, snd_id="", snd_magic="", is_greedy=False, **kwargs):
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+
+        is_match = matcher(is_greedy, **kwargs) if kwargs else None
+        cursor = EventCursor(path, since, until, self._load_event_checkpoint(checkpoint), marker == 0, is_match)
+        state = {}
+        events = self._iter_event_stream(snd_id, snd_magic, marker, page_limit, state)
+        try:
+            async for event in events:
+                action = cursor.step(event, self._event_key(event))
+                if action == EventCursor.STOP: break
+                if action == EventCursor.YIELD: yield event
+        finally:
+            await events.aclose()
+
+        watermark = cursor.result(state.get("exhausted", False))
+        if checkpoint != None and watermark != None: self._save_event_checkpoint(checkpoint, *watermark)
+
+    # 撤销操作历史，全部成功时返回 SUCCESS，否则返回第一个失败的状态码
+    async def undo_event(self, path, snd_id="", snd_magic="", **kwargs) -> int:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+
+        code = Jianguo.SUCCESS
+        events = (await self.get_event(path, snd_id=snd_id, snd_magic=snd_magic, **kwargs))[0]
+        for event in events:
+            try:
+                await self._undo_one(snd_id, snd_magic, event)
+            except (urllib.error.HTTPError, RequestError) as e:
+                if code == Jianguo.SUCCESS: code = self._error_code(e)
+
+        return code
+
+    # 撤销单条操作历史
+    async def _undo_one(self, snd_id, snd_magic, event) -> int:
+        await self._post(self._host_url + "/d/ajax/fileops/undoEvents?sndId=" + snd_id + "&sndMagic=" + snd_magic, self._undo_data(event))
+        self._touch_listing(snd_id, event["path"], event["isdir"])
+        return Jianguo.SUCCESS
+
+    # 按依赖并发执行撤销计划，规则和返回内容同 Jianguo._run_undo_plan
+    async def _run_undo_plan(self, snd_id, snd_magic, plan, max_workers) -> list:
+        scheduler = UndoScheduler(plan)
+        running = {}
+        try:
+            while True:
+                while len(running) < max_workers:
+                    index = scheduler.next_ready()
+                    if index is None: break
+                    running[asyncio.ensure_future(self._undo_one(snd_id, snd_magic, plan[index][0]))] = index
+                if not running: break
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index = running.pop(task)
+                    try:
+                        scheduler.finish(index, task.result())
+                    except Exception as e:
+                        scheduler.finish(index, self._error_code(e), e.code if isinstance(e, urllib.error.HTTPError) else None)
+        finally:
+            for task in running: task.cancel()
+        return scheduler.results()
+
+    # 批量撤销 path 下（含自身）的操作历史，参数和返回内容同 Jianguo.undo_events
+    async def undo_events(self, path, since=None, until=None, max_workers=8, dry_run=False, page_limit=None, snd_id="", snd_magic="", is_greedy=False, **kwargs) -> dict:
+        if snd_id == "": snd_id, snd_magic, path = await self.path_cut(path)
+        events = [event async for event in self.iter_events(path, since, until, page_limit, snd_id=snd_id, snd_magic=snd_magic, is_greedy=is_greedy, **kwargs)]
+        plan, skipped = self._plan_undo(events)
+
+        if dry_run: return self._undo_report(events, plan, skipped)
+        return self._undo_report(events, plan, skipped, await self._run_undo_plan(snd_id, snd_magic, plan, max_workers))
+
+    ## 以下方法读写本地文件，在线程池中调用同步版本
+    download = _blocking("download")
+    sync = _blocking("sync")
+    upload = _blocking("upload")
+    upload_many = _blocking("upload_many")
+    export_versions = _blocking("export_versions")
@@ -0,0 +1,274 @@
+import io
+import ssl
+import socket
+import asyncio
+import http.client
+import urllib.error
+import urllib.parse
+from collections import deque
+from jianguo.api.transport import Response, REDIRECT_CODES, MAX_REDIRECTS
+from jianguo.api.jsonstream import StreamDecoder
+
+## 响应头的行数上限，与 http.client 一致；MAX_LINE 为读取缓冲区的上限，也是整个响应头的最大字节数
+MAX_HEADERS = 100
+MAX_LINE = 65536
+
+# 池中的一条 HTTP/1.1 连接
+class _Connection(object):
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    # 服务端已关闭的空闲连接不能再用
+    def is_usable(self) -> bool:
+        return not self.reader.at_eof() and not self.writer.is_closing()
+
+    def close(self):
+        self.writer.close()
+
+# 流式请求结果，通过 iter_chunks() 或 read() 读取，使用后 close() 归还连接
+## 响应体按 Content-Length、chunked 或读到连接关闭为止三种方式分帧
+class AsyncStreamResponse(object):
+    def __init__(self, url, status, reason, headers, conn, read_timeout, release, has_body=True):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self._conn = conn
+        self._read_timeout = read_timeout
+        self._release = release
+        self._chunk_left = 0
+        self._chunked = "chunked" in headers.get("Transfer-Encoding", "").lower()
+        length = headers.get("Content-Length")
+        self._remaining = None if self._chunked or length is None else int(length)
+        self.will_close = headers.get("Connection", "").lower() == "close" or (not self._chunked and self._remaining is None)
+        self._finished = not has_body or self._remaining == 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    async def _read(self, coroutine):
+        try:
+            return await asyncio.wait_for(coroutine, self._read_timeout)
+        except asyncio.IncompleteReadError as e:
+            raise http.client.IncompleteRead(e.partial) from e
+
+    # 读取 chunked 分块的长度行，为 0 时读取结尾的 trailer
+    async def _next_chunk_size(self) -> int:
+        line = await self._read(self._conn.reader.readuntil(b"\r\n"))
+        size = int(line.split(b";", 1)[0].strip(), 16)
+        if size == 0:
+            while (await self._read(self._conn.reader.readuntil(b"\r\n"))) != b"\r\n": pass
+        return size
+
+    # 读取最多 amt 个字节，响应结束时返回 b""
+    async def read_chunk(self, amt=65536) -> bytes:
+        if self._finished: return b""
+        reader = self._conn.reader
+
+        if self._chunked:
+            if self._chunk_left == 0:
+                self._chunk_left = await self._next_chunk_size()
+                if self._chunk_left == 0:
+                    self._finished = True
+                    return b""
+            data = await self._read(reader.readexactly(min(amt, self._chunk_left)))
+            self._chunk_left -= len(data)
+            if self._chunk_left == 0: await self._read(reader.readexactly(2)) ### 分块结尾的 CRLF
+            return data
+
+        if self._remaining is None:
+            data = await self._read(reader.read(amt))
+            if data == b"": self._finished = True
+            return data
+
+        data = await self._read(reader.readexactly(min(amt, self._remaining)))
+        self._remaining -= len(data)
+        if self._remaining == 0: self._finished = True
+        return data
+
+    # 按 chunk_size 逐块读取，直到响应结束
+    async def iter_chunks(self, chunk_size=65536):
+        while True:
+            chunk = await self.read_chunk(chunk_size)
+            if not chunk: break
+            yield chunk
+
+    async def read(self) -> bytes:
+        return b"".join([chunk async for chunk in self.iter_chunks()])
+
+    # 归还连接，只有完整读取过的响应，其连接才能复用
+    def close(self):
+        if self._release is None: return
+        release, self._release = self._release, None
+        release(self._finished and not self.will_close)
+
+# 基于 asyncio 流的 HTTP/1.1 持久连接池，接口与 PooledTransport 相同，但 request 和 open 为协程
+## 每个 (scheme, host, port) 最多同时使用 pool_size 个连接；连接池属于创建它的事件循环，不能跨事件循环使用
+class AsyncTransport(object):
+    def __init__(self, pool_size=64, connect_timeout=10, read_timeout=60, compress=False):
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.compress = compress
+        self.on_retry = None
+        self._idle = {}
+        self._slots = {}
+        self._ssl_context = None
+
+    # 连接池的键为 (scheme, host, port)
+    def _pool_key(self, parts) -> tuple:
+        port = parts.port
+        if port is None: port = 443 if parts.scheme == "https" else 80
+        return parts.scheme, parts.hostname, port
+
+    async def _new_connection(self, key) -> _Connection:
+        scheme, host, port = key
+        context = None
+        if scheme == "https":
+            if self._ssl_context is None: self._ssl_context = ssl.create_default_context()
+            context = self._ssl_context
+
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port, ssl=context, limit=MAX_LINE), self.connect_timeout)
+        ## 关闭 Nagle 算法，避免请求头和请求体分开发送时等待延迟确认
+        sock = writer.get_extra_info("socket")
+        if sock is not None: sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return _Connection(reader, writer)
+
+    # 取出一个连接，返回 (conn, is_reused)，池满时等待
+    async def _acquire(self, key) -> tuple:
+        slot = self._slots.get(key)
+        if slot is None: slot = self._slots[key] = asyncio.Semaphore(self.pool_size)
+        await slot.acquire()
+
+        idle = self._idle.get(key)
+        while idle:
+            conn = idle.pop()
+            if conn.is_usable(): return conn, True
+            conn.close()
+        try:
+            return await self._new_connection(key), False
+        except BaseException:
+            slot.release()
+            raise
+
+    # 归还连接，不可复用的连接直接关闭
+    def _release(self, key, conn, is_reusable):
+        if is_reusable and conn.is_usable(): self._idle.setdefault(key, deque()).append(conn)
+        else: conn.close()
+        self._slots[key].release()
+
+    async def _write_request(self, conn, method, parts, headers, body):
+        target = parts.path or "/"
+        if parts.query: target += "?" + parts.query
+
+        headers = dict(headers)
+        headers.setdefault("Host", parts.netloc)
+        headers.setdefault("Accept-Encoding", "identity")
+        if body is not None: headers["Content-Length"] = str(len(body))
+        elif method in ("POST", "PUT", "PATCH"): headers["Content-Length"] = "0"
+
+        lines = [method + " " + target + " HTTP/1.1"] + [str(name) + ": " + str(value) for name, value in headers.items()]
+        conn.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+        ## 可读对象（如 FileSegment）分块写入，避免整体读入内存
+        if hasattr(body, "read"):
+            while True:
+                data = body.read(1 << 16)
+                if not data: break
+                conn.writer.write(data)
+                await conn.writer.drain()
+        elif body:
+            conn.writer.write(body)
+        await conn.writer.drain()
+
+    # 读取状态行和响应头，返回 (status, reason, headers)，跳过 1xx 响应
+    ## 整个响应头一次读入，避免每行一次 wait_for 的开销；响应头超过 MAX_LINE 字节时抛出 LimitOverrunError
+    async def _read_head(self, conn) -> tuple:
+        while True:
+            try:
+                head = await asyncio.wait_for(conn.reader.readuntil(b"\r\n\r\n"), self.read_timeout)
+            except asyncio.IncompleteReadError as e:
+                if e.partial == b"": raise http.client.RemoteDisconnected("Remote end closed connection without response") from None
+                raise http.client.IncompleteRead(e.partial) from None
+
+            line, _, raw = head.partition(b"\r\n")
+            try:
+                version, status, reason = (line.decode("latin-1").split(" ", 2) + [""])[:3]
+                status = int(status)
+            except ValueError:
+                raise http.client.BadStatusLine(line) from None
+            if not version.startswith("HTTP/"): raise http.client.BadStatusLine(line)
+            if raw.count(b"\r\n") > MAX_HEADERS + 1: raise http.client.HTTPException("got more than " + str(MAX_HEADERS) + " headers")
+            if 100 <= status < 200: continue
+
+            headers = http.client.parse_headers(io.BytesIO(raw))
+            if version == "HTTP/1.0" and headers.get("Connection", "").lower() != "keep-alive": headers["Connection"] = "close"
+            return status, reason, headers
+
+    # 在池中的连接上发送一次请求，只读取响应头，复用的连接失效时重连一次
+    async def _send_stream(self, method, url, parts, headers, body) -> AsyncStreamResponse:
+        key = self._pool_key(parts)
+
+        for attempt in range(2):
+            conn, is_reused = await self._acquire(key)
+            try:
+                await self._write_request(conn, method, parts, headers, body)
+                status, reason, response_headers = await self._read_head(conn)
+            except (http.client.RemoteDisconnected, ConnectionError):
+                self._release(key, conn, False)
+                if is_reused and attempt == 0:
+                    if hasattr(body, "seek"): body.seek(0) ### 流式请求体需回到开头重发
+                    if self.on_retry is not None: self.on_retry(url)
+                    continue
+                raise
+            except BaseException:
+                self._release(key, conn, False)
+                raise
+
+            has_body = method != "HEAD" and status not in (204, 304)
+            return AsyncStreamResponse(url, status, reason, response_headers, conn, self.read_timeout, lambda is_reusable: self._release(key, conn, is_reusable), has_body)
+
+    # 发送请求并跟随重定向，返回未读取内容的响应；状态码 >= 400 时读取错误内容后抛出 HTTPError
+    async def _open(self, method, url, headers, body) -> AsyncStreamResponse:
+        for redirect in range(MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            response = await self._send_stream(method, url, parts, headers, body)
+
+            if response.status in REDIRECT_CODES and response.headers.get("Location"):
+                async with response: await response.read()
+                url = urllib.parse.urljoin(url, response.headers["Location"])
+                ## 与 urllib 保持一致，除 307/308 外重定向后均改为 GET
+                if response.status not in (307, 308):
+                    method, body = "GET", None
+                    headers.pop("Content-Type", None)
+                continue
+
+            if response.status >= 400:
+                async with response: await response.read()
+                raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+            return response
+
+        raise urllib.error.HTTPError(url, response.status, "Too many redirects", response.headers, None)
+
+    async def request(self, method, url, headers=None, body=None) -> Response:
+        headers = dict(headers or {})
+        if self.compress: headers["Accept-Encoding"] = "gzip, deflate"
+
+        async with await self._open(method, url, headers, body) as response:
+            data = await response.read()
+        decoder = StreamDecoder(response.headers.get("Content-Encoding"))
+        return Response(response.url, response.status, response.headers, decoder.decode(data) + decoder.flush())
+
+    # 返回不解压、不预读内容的 AsyncStreamResponse，用于列表等大响应
+    async def open(self, method, url, headers=None, body=None) -> AsyncStreamResponse:
+        return await self._open(method, url, dict(headers or {}), body)
+
+    # 关闭所有空闲连接
+    def close(self):
+        idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns: conn.close()
@@ -0,0 +1,127 @@
+import os
+import json
+import uuid
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 导出目录树中所有文件的历史版本到本地的内容寻址存储
+## 每个版本按内容的 sha256 保存为 objects/<hash[:2]>/<hash>，内容相同的版本只保存一份；
+## 清单 MANIFEST_NAME 记录 {相对路径: {"rev", "versions": {版本号: {"hash", "size", "mtime"}}}}，
+## 再次导出时跳过 rev 未变化的文件和清单中已有的版本，只下载新增的版本
+class VersionExporter(object):
+    MANIFEST_NAME = "manifest.json"
+    OBJECTS_DIR = "objects"
+
+    def __init__(self, client, remote_path, dest, max_workers=4, chunk_size=1 << 20):
+        self._client = client
+        self.remote_path = remote_path.rstrip("/")
+        self.dest = dest
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self._manifest_path = os.path.join(dest, self.MANIFEST_NAME)
+        self._objects_dir = os.path.join(dest, self.OBJECTS_DIR)
+        self._lock = threading.Lock()
+
+    # 读取清单，远端路径不一致时视为首次导出
+    def _load_manifest(self) -> dict:
+        if not os.path.exists(self._manifest_path): return {"remote": self.remote_path, "files": {}}
+        with open(self._manifest_path, "r") as f:
+            manifest = json.load(f)
+        if manifest.get("remote") != self.remote_path: return {"remote": self.remote_path, "files": {}}
+        return manifest
+
+    def _save_manifest(self, manifest):
+        with open(self._manifest_path + ".tmp", "w") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(self._manifest_path + ".tmp", self._manifest_path)
+
+    def object_path(self, digest) -> str:
+        return os.path.join(self._objects_dir, digest[:2], digest)
+
+    def _remote(self, rel) -> str:
+        return self.remote_path + "/" + rel
+
+    # 遍历远端目录树，返回 {相对路径: 列表项}
+    def _scan_remote(self) -> dict:
+        files = {}
+        for dir_path, _, file_items in self._client.walk(self.remote_path, max_workers=self.max_workers):
+            rel_root = dir_path[len(self.remote_path):].strip("/")
+            for item in file_items: files[(rel_root + "/" + item["name"]).lstrip("/")] = item
+        return files
+
+    # 流式下载一个版本并计算 sha256，内容已存在时丢弃临时文件，返回 (hash, size, 是否重复)
+    def _fetch_version(self, rel, version) -> tuple:
+        temp_path = os.path.join(self._objects_dir, "tmp-" + uuid.uuid4().hex)
+
+        digest, size = hashlib.sha256(), 0
+        try:
+            with self._client.open_file(self._remote(rel), version) as response, open(temp_path, "wb") as f:
+                for chunk in response.iter_chunks(self.chunk_size):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+
+            digest = digest.hexdigest()
+            object_path = self.object_path(digest)
+            with self._lock:
+                if os.path.exists(object_path): return digest, size, True
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                os.replace(temp_path, object_path)
+            return digest, size, False
+        finally:
+            if os.path.exists(temp_path): os.remove(temp_path)
+
+    # 执行导出，返回 {"files", "versions", "downloaded", "deduplicated", "skipped", "bytes", "failed": {相对路径@版本号: 错误}}
+    ## dry_run 为 True 时只获取版本列表，统计需要下载的版本数
+    def run(self, dry_run=False) -> dict:
+        os.makedirs(self._objects_dir, exist_ok=True)
+        manifest = self._load_manifest()
+        known = manifest["files"]
+        remote_files = self._scan_remote()
+        report = {"files": len(remote_files), "versions": 0, "downloaded": 0, "deduplicated": 0, "skipped": 0, "bytes": 0, "failed": {}}
+
+        ## rev 未变化说明没有产生新版本，不需要再获取版本列表
+        changed = [rel for rel, item in remote_files.items() if rel not in known or known[rel].get("rev") != item.get("rev")]
+        report["skipped"] = sum(len(known[rel]["versions"]) for rel in remote_files if rel in known and rel not in changed)
+
+        jobs, failed_files = [], set()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [(rel, executor.submit(self._client.get_file_version_list, self._remote(rel))) for rel in changed]
+            for rel, future in futures:
+                try:
+                    versions = future.result()["versions"]
+                except Exception as e:
+                    report["failed"][rel] = "versions: " + repr(e)
+                    failed_files.add(rel)
+                    continue
+                stored = known.get(rel, {}).get("versions", {})
+                for entry in versions:
+                    version = str(entry["version"])
+                    if version in stored: report["skipped"] += 1
+                    else: jobs.append((rel, version, entry))
+        report["versions"] = report["skipped"] + len(jobs)
+        if dry_run:
+            report["pending"] = [rel + "@" + version for rel, version, _ in jobs]
+            return report
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [(rel, version, entry, executor.submit(self._fetch_version, rel, version)) for rel, version, entry in jobs]
+            for rel, version, entry, future in futures:
+                try:
+                    digest, size, is_duplicate = future.result()
+                except Exception as e:
+                    report["failed"][rel + "@" + version] = repr(e)
+                    failed_files.add(rel)
+                    continue
+                record = known.setdefault(rel, {"rev": None, "versions": {}})
+                record["versions"][version] = {"hash": digest, "size": size, "mtime": entry.get("mtime")}
+                report["bytes"] += size
+                if is_duplicate: report["deduplicated"] += 1
+                else: report["downloaded"] += 1
+
+        ## 有版本失败的文件不更新 rev，下次导出时重新获取版本列表
+        for rel in changed:
+            if rel not in failed_files: known.setdefault(rel, {"rev": None, "versions": {}})["rev"] = remote_files[rel].get("rev")
+        self._save_manifest(manifest)
+        return report
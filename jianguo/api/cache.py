@@ -0,0 +1,191 @@
+import time
+import threading
+from collections import OrderedDict
+
+# sandbox 信息缓存，按正常/回收站两侧分别保存，超过有效期 ttl（秒）后重新获取
+class SandboxCache(object):
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    # 获取某侧的 sandbox 列表，未缓存或已过期时返回 None
+    def get(self, is_deleted=False) -> list:
+        with self._lock:
+            entry = self._entries.get(is_deleted)
+            if entry is None or entry["expire"] <= time.monotonic():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry["sandboxes"]
+
+    # 通过名称获取单个 sandbox 信息，未缓存、已过期或不存在时返回 None
+    ## 未命中时不计数，由随后重新获取列表的 get() 计入
+    def get_by_name(self, name, is_deleted=False) -> dict:
+        with self._lock:
+            entry = self._entries.get(is_deleted)
+            if entry is None or entry["expire"] <= time.monotonic() or name not in entry["names"]:
+                return None
+            self.hits += 1
+            return entry["names"][name]
+
+    # 写入某侧的 sandbox 列表，ttl 为 0 时不缓存
+    def put(self, sandboxes, is_deleted=False):
+        if self.ttl <= 0: return
+        with self._lock:
+            self._entries[is_deleted] = {
+                "expire": time.monotonic() + self.ttl,
+                "sandboxes": sandboxes,
+                "names": {sandbox["name"]: sandbox for sandbox in sandboxes},
+            }
+
+    # 使缓存失效，is_deleted 为 None 时清空两侧
+    def invalidate(self, is_deleted=None):
+        with self._lock:
+            if is_deleted is None: self._entries.clear()
+            else: self._entries.pop(is_deleted, None)
+
+    # 获取命中统计
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "ttl": self.ttl,
+                "cached": sorted("deleted" if key else "normal" for key in self._entries),
+            }
+
+# 分享列表缓存，按 sandbox 保存以 path 为键的分享信息，超过有效期 ttl（秒）后重新获取
+## 撤销分享时直接从缓存中移除；新建或修改分享时返回内容与列表项不同，因此使该 sandbox 的缓存失效
+class ShareCache(object):
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    # 获取 sandbox 的分享 {path: 分享信息}，未缓存或已过期时返回 None
+    def get(self, snd_id) -> dict:
+        with self._lock:
+            entry = self._entries.get(snd_id)
+            if entry is None or entry["expire"] <= time.monotonic():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry["shares"]
+
+    # 写入 sandbox 的分享列表，ttl 为 0 时不缓存
+    def put(self, snd_id, shares):
+        if self.ttl <= 0: return
+        with self._lock:
+            self._entries[snd_id] = {"expire": time.monotonic() + self.ttl, "shares": {share["path"]: share for share in shares}}
+
+    # 移除已撤销的分享
+    def remove(self, snd_id, paths):
+        with self._lock:
+            entry = self._entries.get(snd_id)
+            if entry is None: return
+            shares = dict(entry["shares"])
+            for path in paths: shares.pop(path, None)
+            entry["shares"] = shares
+
+    # 使缓存失效，snd_id 为 None 时清空所有 sandbox
+    def invalidate(self, snd_id=None):
+        with self._lock:
+            if snd_id is None: self._entries.clear()
+            else: self._entries.pop(snd_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "ttl": self.ttl, "cached": len(self._entries)}
+
+# 复制列表及其中的各个项目，调用方修改返回的列表不影响缓存
+def _copy_listing(listing) -> dict:
+    return dict(listing, contents=[dict(item) for item in listing.get("contents", [])])
+
+# 目录列表缓存，键为 (snd_id, path)，按条目数和内容大小进行 LRU 淘汰
+## 每个 sandbox 另外记录操作历史的水位（最新事件的 timestamp 及该时刻已处理的事件），用于增量失效
+## 写入和取出的都是副本
+class ListingCache(object):
+    def __init__(self, max_entries=1024, max_bytes=64 << 20, poll_interval=30):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.poll_interval = poll_interval
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._sandboxes = {}
+
+    def get(self, snd_id, path) -> dict:
+        key = (snd_id, path.rstrip("/"))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            listing = entry[0]
+        return _copy_listing(listing)
+
+    # 写入列表，size 为其原始响应内容的字节数
+    def put(self, snd_id, path, listing, size):
+        key = (snd_id, path.rstrip("/"))
+        listing = _copy_listing(listing)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None: self._bytes -= old[1]
+            self._entries[key] = (listing, size)
+            self._bytes += size
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    # 使某个目录的列表失效，is_tree 为 True 时同时使其下所有子目录失效
+    def invalidate(self, snd_id, path, is_tree=False):
+        path = path.rstrip("/")
+        with self._lock:
+            keys = [(snd_id, path)]
+            if is_tree:
+                keys += [key for key in self._entries if key[0] == snd_id and key[1].startswith(path + "/")]
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None: self._bytes -= entry[1]
+
+    # 某个 path 发生变化时，使其父目录（以及作为目录的自身）失效
+    def touch(self, snd_id, path, is_dir=True):
+        path = path.rstrip("/")
+        with self._lock:
+            self.invalidate(snd_id, path.rsplit("/", 1)[0] if "/" in path else "")
+            if is_dir: self.invalidate(snd_id, path, is_tree=True)
+
+    # 清空某个 sandbox 的所有目录列表，水位保留
+    def clear(self, snd_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == snd_id]:
+                self._bytes -= self._entries.pop(key)[1]
+
+    # 获取 sandbox 的事件水位，未记录时返回 None
+    def get_watermark(self, snd_id) -> dict:
+        with self._lock:
+            return self._sandboxes.get(snd_id)
+
+    def set_watermark(self, snd_id, timestamp, seen):
+        with self._lock:
+            self._sandboxes[snd_id] = {"timestamp": timestamp, "seen": seen, "polled": time.monotonic()}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "sandboxes": len(self._sandboxes),
+            }
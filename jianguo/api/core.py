@@ -1,29 +1,49 @@
 import os
-import re
+import fnmatch
 import json
-import urllib.request
+import time
+import threading
+import urllib.error
 import urllib.parse
-from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from jianguo.api import status
+from jianguo.api.cache import SandboxCache, ListingCache, ShareCache
+from jianguo.api.query import ResultSet, matcher
+from jianguo.api.progress import OperationTracker
+from jianguo.api.metrics import Metrics, MeteredResponse
+from jianguo.api.ratelimit import RequestScheduler, RequestError
+from jianguo.api.utils import logger
+from jianguo.api.transport import PooledTransport
+from jianguo.api.download import Downloader
+from jianguo.api.upload import Uploader
+from jianguo.api.sync import SyncEngine
+from jianguo.api.archive import VersionExporter
+from jianguo.api.index import Index
+from jianguo.api.jsonstream import JsonArrayStream, iter_decoded
+from jianguo.api.events import EventCursor, ListingPoll, UndoScheduler
+from jianguo.api.webdav import WebDAV
 
 class Jianguo(object):
-    FAILED = -1
-    SUCCESS = 0
-    ID_ERROR = 1
-    PASSWORD_ERROR = 2
-    LACK_PASSWORD = 3
-    ZIP_ERROR = 4
-    MKDIR_ERROR = 5
-    URL_INVALID = 6
-    FILE_CANCELLED = 7
-    PATH_ERROR = 8
-    NETWORK_ERROR = 9
-    CAPTCHA_ERROR = 10
-    OFFICIAL_LIMITED = 11
+    FAILED = status.FAILED
+    SUCCESS = status.SUCCESS
+    ID_ERROR = status.ID_ERROR
+    PASSWORD_ERROR = status.PASSWORD_ERROR
+    LACK_PASSWORD = status.LACK_PASSWORD
+    ZIP_ERROR = status.ZIP_ERROR
+    MKDIR_ERROR = status.MKDIR_ERROR
+    URL_INVALID = status.URL_INVALID
+    FILE_CANCELLED = status.FILE_CANCELLED
+    PATH_ERROR = status.PATH_ERROR
+    NETWORK_ERROR = status.NETWORK_ERROR
+    CAPTCHA_ERROR = status.CAPTCHA_ERROR
+    OFFICIAL_LIMITED = status.OFFICIAL_LIMITED
     DEFAULT_SANDBOX_NAME = "我的坚果云"
     DEFAULT_SHORTCUT_PATH = DEFAULT_SANDBOX_NAME + "/书签"
     MIX_EVENT_PAGE_NUM = 999
+    UNDO_REMOVING_OPS = ("CREATE", "UPLOAD", "RESTORE")
 
-    def __init__(self):
+    def __init__(self, transport=None):
         self._host_url = "https://www.jianguoyun.com"
         self._cookies = None
         self._headers = {
@@ -33,22 +53,160 @@ class Jianguo(object):
             "Referer": "https://www.jianguoyun.com/",
             "TE": "Trailers",
         }
+        self._snd_cache = SandboxCache()
+        self._share_cache = ShareCache()
+        self._metrics = Metrics()
+        self._scheduler = RequestScheduler()
+        self._scheduler.on_retry = self._metrics.record_retry
+        self._transport = transport or PooledTransport()
+        self._transport.on_retry = self._metrics.record_retry
+        self._max_size = 500
+        self._list_cache = None
+        self._tracker = None
+        self._tracker_lock = threading.Lock()
     
+    # 通过调度器发送请求（限速、并发控制和重试），重试后仍失败时抛出 RequestError
+    def _request(self, method, url, headers, body=None):
+        return self._scheduler.execute(method, url, lambda: self._send_request(method, url, headers, body))
+
+    # 发送一次请求并记录统计信息
+    def _send_request(self, method, url, headers, body=None):
+        ## 流式请求体重试时需回到开头
+        if hasattr(body, "seek"): body.seek(0)
+        self._metrics.before(method, url, headers)
+        begin = time.monotonic()
+        try:
+            response = self._transport.request(method, url, headers, body)
+        except Exception as e:
+            elapsed = time.monotonic() - begin
+            logger.debug("%s %s failed after %.3fs: %r", method, url, elapsed, e)
+            self._metrics.record(method, url, elapsed, status=getattr(e, "code", None), error=repr(e))
+            raise
+
+        elapsed = time.monotonic() - begin
+        logger.debug("%s %s %d %dB %.3fs", method, url, response.status, len(response.body), elapsed)
+        self._metrics.record(method, url, elapsed, len(response.body), response.status)
+        return response
+
+    # 建立一次流式 GET 请求，返回 (response, 开始时间)
+    def _open_stream(self, url, headers) -> tuple:
+        self._metrics.before("GET", url, headers)
+        begin = time.monotonic()
+        try:
+            return self._transport.open("GET", url, headers), begin
+        except Exception as e:
+            elapsed = time.monotonic() - begin
+            logger.debug("GET %s failed after %.3fs: %r", url, elapsed, e)
+            self._metrics.record("GET", url, elapsed, status=getattr(e, "code", None), error=repr(e))
+            raise
+
+    # 通过调度器建立流式 GET 请求，返回 MeteredResponse，关闭时记录读取的字节数
+    ## 收到响应头之前的失败按调度器的规则重试，开始读取后出错则直接抛出
+    def _open(self, url, headers) -> MeteredResponse:
+        response, begin = self._scheduler.execute("GET", url, lambda: self._open_stream(url, headers))
+        return MeteredResponse(response, self._metrics, "GET", url, begin)
+
+    # 流式 GET 请求，从连接中增量解析，逐个生成响应 JSON 中顶层数组 key 的元素，其他顶层成员在遍历结束后写入 fields
+    ## 内存占用与响应大小无关
+    def _iter_json(self, url, key, fields=None):
+        headers = dict(self._headers)
+        if getattr(self._transport, "compress", False): headers["Accept-Encoding"] = "gzip, deflate"
+
+        with self._open(url, headers) as response:
+            stream = JsonArrayStream(iter_decoded(response.iter_chunks(), response.headers.get("Content-Encoding")), key)
+            yield from stream
+            if fields is not None: fields.update(stream.fields)
+
     def _get(self, url):
-        request = urllib.request.Request(url=url, headers=self._headers)
-        response = urllib.request.urlopen(request)
+        response = self._request("GET", url, self._headers)
 
-        return response.read().decode("utf-8")
+        return response.text()
     
     def _post(self, url, data):
         datas = urllib.parse.urlencode(data).encode("utf-8")
+        headers = dict(self._headers)
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
         
-        request = urllib.request.Request(url=url, headers=self._headers, data=datas)
-        response = urllib.request.urlopen(request)
+        response = self._request("POST", url, headers, datas)
 
-        return response.read().decode("utf-8")
+        return response.text()
 
-    # 设置单文件大小限制（网页版限制500M）
+    # 设置传输层（默认为持久连接池 PooledTransport）
+    def set_transport(self, transport) -> int:
+        self._transport.close()
+        self._transport = transport
+        self._transport.on_retry = self._metrics.record_retry
+        return Jianguo.SUCCESS
+
+    # 设置某类接口的限速（每秒请求数），endpoint_class 为 "list"（列表类 GET）、"read"（其他 GET）或 "write"（POST），rate 为 None 时不限速
+    def set_rate_limit(self, endpoint_class, rate, burst=None) -> int:
+        if endpoint_class not in ("list", "read", "write"):
+            return Jianguo.FAILED
+        ## 速率为 0 或负数时令牌永远不会补充，burst 小于 1 时永远取不到令牌
+        if rate is not None and (rate <= 0 or (burst is not None and burst < 1)):
+            return Jianguo.FAILED
+        self._scheduler.set_rate(endpoint_class, rate, burst)
+        return Jianguo.SUCCESS
+
+    # 设置重试次数和退避时间（秒），限流时所有请求都会重试，网络错误只重试 GET 请求
+    def set_retry(self, max_retries=4, backoff=0.5, max_backoff=30) -> int:
+        self._scheduler.max_retries = max_retries
+        self._scheduler.backoff = backoff
+        self._scheduler.max_backoff = max_backoff
+        return Jianguo.SUCCESS
+
+    # 设置并发上限的调整范围，服务端限流时并发上限减半，恢复后逐渐增加
+    def set_concurrency(self, initial=8, minimum=1, maximum=64) -> int:
+        if not 1 <= minimum <= initial <= maximum:
+            return Jianguo.FAILED
+        self._scheduler.set_concurrency(initial, minimum, maximum)
+        return Jianguo.SUCCESS
+
+    # 获取调度器状态：当前并发上限、进行中的请求数、限流次数和各类接口的速率
+    def get_scheduler_stats(self) -> dict:
+        return self._scheduler.stats()
+
+    # 将异常转换为状态码
+    def _error_code(self, error) -> int:
+        if isinstance(error, RequestError): return error.code
+        return Jianguo.FAILED
+
+    # 获取各接口的请求统计：次数、耗时分布、响应字节数、错误数和重试次数
+    def get_metrics(self) -> dict:
+        return self._metrics.snapshot()
+
+    # 清空请求统计
+    def reset_metrics(self) -> int:
+        self._metrics.reset()
+        return Jianguo.SUCCESS
+
+    # 添加请求钩子，pre_hook(method, url, headers) 在请求前调用，post_hook(method, url, info) 在请求后调用
+    def add_request_hook(self, pre_hook=None, post_hook=None) -> int:
+        if pre_hook is not None: self._metrics.add_pre_hook(pre_hook)
+        if post_hook is not None: self._metrics.add_post_hook(post_hook)
+        return Jianguo.SUCCESS
+
+    # 移除请求钩子
+    def remove_request_hook(self, hook) -> int:
+        self._metrics.remove_hook(hook)
+        return Jianguo.SUCCESS
+
+    # 统计代码块中发出的请求数，例如：
+    ## with client.count_requests() as counter:
+    ##     client.rename(...)
+    ## print(counter["requests"], counter["endpoints"])
+    def count_requests(self):
+        return self._metrics.count()
+
+    # 设置连接超时和读取超时（秒），仅对 PooledTransport 有效
+    def set_timeout(self, connect_timeout=10, read_timeout=60) -> int:
+        if not isinstance(self._transport, PooledTransport):
+            return Jianguo.FAILED
+        self._transport.connect_timeout = connect_timeout
+        self._transport.read_timeout = read_timeout
+        return Jianguo.SUCCESS
+
+    # 设置单文件大小限制（单位 MB，网页版限制500M），上传时超过限制的文件会被拒绝或拆分
     def set_max_size(self, max_size=500) -> int:
         if max_size < 500:
             return Jianguo.FAILED
@@ -57,24 +215,52 @@ class Jianguo(object):
 
     # 获取账户基本信息
     def get_user_info(self) -> dict:
-        ## fixme：处理后依然是 str
-        resp = json.dumps(self._get(self._host_url + "/d/ajax/userop/getUserInfo"))
+        resp = self._get(self._host_url + "/d/ajax/userop/getUserInfo")
         return json.loads(resp)
 
+    # 获取 sandbox 列表（优先使用缓存）
+    def _get_sandboxes(self, is_deleted=False) -> list:
+        sandboxes = self._snd_cache.get(is_deleted)
+        if sandboxes is not None: return sandboxes
+
+        if is_deleted: sandboxes = self.get_sandbox_rec_list()
+        else: sandboxes = self.get_user_info()["sandboxes"]
+
+        self._snd_cache.put(sandboxes, is_deleted)
+        return sandboxes
+
+    # 设置 sandbox 缓存有效期（秒），为 0 时不缓存
+    def set_sandbox_cache_ttl(self, ttl=300) -> int:
+        if ttl < 0:
+            return Jianguo.FAILED
+        self._snd_cache.ttl = ttl
+        self._snd_cache.invalidate()
+        return Jianguo.SUCCESS
+
+    # 清空 sandbox 缓存，is_deleted 为 None 时清空正常和回收站两侧
+    def clear_sandbox_cache(self, is_deleted=None) -> int:
+        self._snd_cache.invalidate(is_deleted)
+        return Jianguo.SUCCESS
+
+    # 获取 sandbox 缓存的命中统计
+    def get_sandbox_cache_stats(self) -> dict:
+        return self._snd_cache.stats()
+
     # 根据某键内容获取单个或多个 sandbox 信息
     def get_snd_info_by(self, is_deleted=False, is_greedy=False, **kwargs) -> list:
-        if is_deleted:
-            sandboxes = self.get_sandbox_rec_list()
-        else:
-            ### fixme：因为 get_user_info() 返回的是 str，暂时这样处理
-            ### 获取用户信息中 sandbox 部分的内容，断点并且切割
-            sandboxes_str = re.findall(r'"sandboxes":(.*?),"freeUpRate"', self.get_user_info())[0]
-            sandboxes = json.loads(sandboxes_str)
-        
+        sandboxes = self._get_sandboxes(is_deleted)
         return self.get_target_result(sandboxes, is_greedy, **kwargs)
 
-    # 分解 path 为 snd_id、snd_magic 和 path
-    def path_cut(self, path, is_deleted=False) -> tuple:
+    # 通过名称获取 sandbox 信息，缓存中找不到时重新获取一次
+    def _resolve_sandbox(self, sandbox_name, is_deleted=False) -> dict:
+        info = self._snd_cache.get_by_name(sandbox_name, is_deleted)
+        if info is not None: return info
+
+        self._snd_cache.invalidate(is_deleted)
+        return self.get_snd_info_by(name=sandbox_name, is_deleted=is_deleted)[0]
+
+    # 分解 path 为 sandbox 名称和 sandbox 内的 path，默认 sandbox 的名称为 ""
+    def _split_path(self, path) -> tuple:
         path_debris = path.split("/")
         sandbox_name = path_debris[0]
         if sandbox_name == self.DEFAULT_SANDBOX_NAME: sandbox_name = ""
@@ -82,29 +268,24 @@ class Jianguo(object):
         path = ""
         for debri in path_debris[1:]:
             path += ("/" + debri)
+        return sandbox_name, path
 
-        info = self.get_snd_info_by(name=sandbox_name, is_deleted=is_deleted)[0]
+    # 分解 path 为 snd_id、snd_magic 和 path
+    def path_cut(self, path, is_deleted=False) -> tuple:
+        sandbox_name, path = self._split_path(path)
+        info = self._resolve_sandbox(sandbox_name, is_deleted)
         return info["sandboxId"], info["magic"], path
 
+    # 获取指定字典列表的筛选结果的惰性迭代器（默认非贪婪匹配）
+    ## 条件可以是等值、Range(lower, upper)、Prefix(prefix) 或任意可调用对象
+    ## items 为列表时逐项判断，不建立索引；需要对同一列表反复查询时，传入自行持有的 ResultSet(items) 以复用索引
+    def query(self, items, is_greedy=False, **kwargs):
+        if isinstance(items, ResultSet): return items.filter(is_greedy, **kwargs)
+        return filter(matcher(is_greedy, **kwargs), items)
+
     # 获取指定字典列表的筛选结果（默认非贪婪匹配）
     def get_target_result(self, items, is_greedy=False, **kwargs) -> list:
-        result = []
-        for item in items:
-            if is_greedy:
-                is_match = False
-                for key, value in kwargs.items():
-                    if item[key] == value:
-                        is_match = True
-                        break
-            else:
-                is_match = True
-                for key, value in kwargs.items():
-                    if item[key] != value:
-                        is_match = False
-                        break
-            
-            if is_match: result.append(item)
-        return result
+        return list(self.query(items, is_greedy, **kwargs))
     
     # 获取用户 Cookie
     def get_cookie(self) -> dict:
@@ -113,8 +294,11 @@ class Jianguo(object):
     # 通过cookie登录
     def login_by_cookie(self, cookie: dict) -> int:
         self._cookies = cookie
-        self._headers['cookie'] = self._cookies
-        self._uesr_info = json.loads(self.get_user_info())
+        ## 替换而不是原地修改请求头，避免影响其他线程中正在进行的请求
+        self._headers = dict(self._headers, cookie=self._cookies)
+        self._snd_cache.invalidate()
+        self._share_cache.invalidate()
+        self._uesr_info = self.get_user_info()
 
         return Jianguo.SUCCESS
 
@@ -122,6 +306,8 @@ class Jianguo(object):
     def logout(self) -> int:
         self._get(self._host_url + "/logout")
         self._cookies = None
+        self._snd_cache.invalidate()
+        self._share_cache.invalidate()
         return Jianguo.SUCCESS
 
     # 通过 uuid 判断操作是否成功
@@ -130,25 +316,54 @@ class Jianguo(object):
 
         if json.loads(resp)["state"] == "SUCCESS": return True
         else: return False
+
+    # 查询一次异步操作的状态
+    def get_progress_state(self, path, uuid) -> str:
+        resp = self._get(self._host_url + path + uuid)
+        return json.loads(resp)["state"]
+
+    # 获取异步操作进度跟踪器，首次调用时创建
+    def get_operation_tracker(self) -> OperationTracker:
+        with self._tracker_lock:
+            if self._tracker is None: self._tracker = OperationTracker(self.get_progress_state)
+            return self._tracker
+
+    # 获取共用连接池、调度器和请求统计的 WebDAV 客户端，password 为应用密码（见 generate_asp）
+    ## depth 为 "infinity" 或 "batched"，决定遍历目录树时使用一次 Depth: infinity 还是逐层并发的 Depth: 1 PROPFIND
+    def open_webdav(self, user, password, depth="infinity", base_url=WebDAV.DEFAULT_URL, max_workers=8) -> WebDAV:
+        return WebDAV(user, password, base_url, depth, self._transport, self._scheduler, self._metrics, max_workers)
+
+    # 打开本地元数据索引，db_path 为 SQLite 数据库文件路径，首次使用时需调用 crawl() 完整抓取
+    def open_index(self, db_path, max_workers=8) -> Index:
+        return Index(self, db_path, max_workers)
+
+    # 跟踪异步操作，uuid 为提交操作时返回的内容，返回结果为最终状态的 Future
+    ## 所有操作由同一个跟踪器按指数退避轮询，callback(state) 在操作完成时调用
+    def track_operation(self, path, uuid, callback=None):
+        return self.get_operation_tracker().track(path, json.loads(uuid)["uuid"], callback)
     
     # 新建同步文件夹
     def creat_sandbox(self, name, **kwargs) -> dict:
-        data = {
+        resp = self._post(self._host_url + "/d/ajax/sandbox/create", self._creat_sandbox_data(name, kwargs))
+        self._snd_cache.invalidate()
+        return json.loads(resp)
+
+    # 新建同步文件夹请求的参数
+    def _creat_sandbox_data(self, name, kwargs) -> dict:
+        return {
             "acl_anonymous": kwargs.get("acl_anonymous", "0"),
             "acl_signed": kwargs.get("acl_signed", "0"),
             "desc": kwargs.get("desc", ""),
             "do_not_sync": kwargs.get("do_not_sync", "true"),
             "name": name,
         }
-
-        resp = self._post(self._host_url + "/d/ajax/sandbox/create", data)
-        return json.loads(resp)
     
     # 删除同步文件夹
     def delete_sandbox(self, path, snd_id="", snd_magic="") -> int:
         if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
         
         self._post(self._host_url + "/d/ajax/sandbox/delete?sndId=" + snd_id + "&sndMagic=" + snd_magic, {})
+        self._snd_cache.invalidate()
         return Jianguo.SUCCESS
     
     # 获取同步文件夹回收站列表
@@ -161,6 +376,7 @@ class Jianguo(object):
         if snd_id == "": snd_id, snd_magic, path = self.path_cut(path, is_deleted=True)
         
         self._post(self._host_url + "/d/ajax/sandbox/restore?sndId=" + snd_id + "&sndMagic=" + snd_magic, {})
+        self._snd_cache.invalidate()
         return Jianguo.SUCCESS
     
     # 获取同步文件夹信息
@@ -173,7 +389,14 @@ class Jianguo(object):
     
     # 修改同步文件夹信息
     def update_sandbox_info(self, original_name, **kwargs) -> int:
-        sandbox = self.get_sandbox_info(original_name)
+        data = self._sandbox_data(self.get_sandbox_info(original_name), kwargs)
+
+        self._post(self._host_url + "/d/ajax/sandbox/updateMetaData?sndId=" + data["id"] + "&sndMagic=" + data["magic"], data)
+        self._snd_cache.invalidate()
+        return Jianguo.SUCCESS
+
+    # 修改同步文件夹信息请求的参数，sandbox 为已有信息，kwargs 中的设置优先
+    def _sandbox_data(self, sandbox, kwargs) -> dict:
         if sandbox["acls"] == []:
             sandbox["acls"] = [{"acl": {"anonymous": 0, "signed": 0, "users": {}, "userNicks": {}, "groups": []}, "path": "/"}]
 
@@ -181,7 +404,7 @@ class Jianguo(object):
         for key, value in kwargs.items():
             sandbox[key] = value
 
-        data = {
+        return {
             "name": sandbox["name"],
             "do_not_sync": sandbox["doNotSync"],
             "desc": sandbox["desc"],
@@ -193,9 +416,6 @@ class Jianguo(object):
             "acl_groups": str(sandbox["acls"][0]["acl"]["groups"])[1:-1],
         }
 
-        self._post(self._host_url + "/d/ajax/sandbox/updateMetaData?sndId=" + sandbox["id"] + "&sndMagic=" + sandbox["magic"], data)
-        return Jianguo.SUCCESS
-
     # 新建文件
     def creat_file(self, path, snd_id="", snd_magic="", type="txt") -> int:
         if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
@@ -209,6 +429,7 @@ class Jianguo(object):
         }
 
         self._post(self._host_url + "/d/ajax/fileops/create?sndId=" + snd_id + "&sndMagic=" + snd_magic, data)
+        self._touch_listing(snd_id, path, is_dir=False)
         return Jianguo.SUCCESS
     
     # 新建文件夹
@@ -220,6 +441,7 @@ class Jianguo(object):
         }
 
         self._post(self._host_url + "/d/ajax/dirops/create?sndId=" + snd_id + "&sndMagic=" + snd_magic, data)
+        self._touch_listing(snd_id, path)
         return Jianguo.SUCCESS
 
     # 删除项目
@@ -231,49 +453,345 @@ class Jianguo(object):
             path: file["rev"],
         }
 
-        if file["isDir"]: delete_path = "/d/ajax/dirops/delete?sndId="
-        else: delete_path = "/d/ajax/fileops/delete?sndId="
-
-        self._post(self._host_url + delete_path + snd_id + "&sndMagic=" + snd_magic, data)
+        self._post(self._delete_url(snd_id, snd_magic, file["isDir"]), data)
+        self._touch_listing(snd_id, path, file["isDir"])
         return Jianguo.SUCCESS
 
+    # 删除项目的请求地址，文件夹和文件使用不同的接口
+    def _delete_url(self, snd_id, snd_magic, is_dir) -> str:
+        if is_dir: delete_path = "/d/ajax/dirops/delete?sndId="
+        else: delete_path = "/d/ajax/fileops/delete?sndId="
+        return self._host_url + delete_path + snd_id + "&sndMagic=" + snd_magic
+
+    # 将多个 path 按 (snd_id, snd_magic, 父目录) 分组，返回 {分组: [(原 path, 目录内 path, 名称)]}
+    def _group_by_parent(self, paths) -> dict:
+        groups = {}
+        for original_path in paths:
+            snd_id, snd_magic, path = self.path_cut(original_path)
+            parent, name = os.path.split(path)
+            groups.setdefault((snd_id, snd_magic, parent), []).append((original_path, path, name))
+        return groups
+
+    # 删除同一目录下的一组项目：只列出一次目录获取 rev，再按 batch_size 合并请求
+    def _delete_group(self, snd_id, snd_magic, parent, items, batch_size) -> dict:
+        contents = self.get_file_list(parent, snd_id, snd_magic)["contents"]
+        results, requests = self._delete_requests(contents, snd_id, snd_magic, items, batch_size)
+
+        for url, data, batch in requests:
+            try:
+                self._post(url, data)
+                code = Jianguo.SUCCESS
+            except Exception as e:
+                code = self._error_code(e)
+            for _, path, _ in batch: self._touch_listing(snd_id, path)
+            for original_path, _, _ in batch: results[original_path] = code
+        return results
+
+    # 根据父目录的列表内容生成一组项目的删除请求，返回 ({不存在的原 path: PATH_ERROR}, [(url, data, [(原 path, path, rev)])])
+    def _delete_requests(self, contents, snd_id, snd_magic, items, batch_size) -> tuple:
+        results = {}
+        files = {item["name"]: item for item in contents}
+
+        dirs_data, files_data = [], []
+        for original_path, path, name in items:
+            file = files.get(name)
+            if file is None:
+                results[original_path] = Jianguo.PATH_ERROR
+                continue
+            if file["isDir"]: dirs_data.append((original_path, path, file["rev"]))
+            else: files_data.append((original_path, path, file["rev"]))
+
+        requests = []
+        for is_dir, entries in ((True, dirs_data), (False, files_data)):
+            for i in range(0, len(entries), batch_size):
+                batch = entries[i:i + batch_size]
+                requests.append((self._delete_url(snd_id, snd_magic, is_dir), {path: rev for _, path, rev in batch}, batch))
+        return results, requests
+
+    # 批量删除项目，每个目录只列出一次，返回 {path: 状态码}，不存在的项目为 PATH_ERROR
+    def delete_many(self, paths, batch_size=100, max_workers=4) -> dict:
+        results = {}
+        groups = self._group_by_parent(paths)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self._delete_group, *key, items, batch_size): items for key, items in groups.items()}
+            for future, items in futures.items():
+                try:
+                    results.update(future.result())
+                except Exception as e:
+                    for original_path, _, _ in items: results[original_path] = self._error_code(e)
+        return results
+
+    # 通过条件获取回收站项目信息，筛选规则同 get_file_info
+    def get_rec_file_info(self, path, snd_id="", snd_magic="", is_greedy=False, **kwargs) -> list:
+        return self.get_file_info(path, snd_id, snd_magic, True, is_greedy, **kwargs)
+
     # 彻底删除回收站项目
     def delete_rec(self, path, snd_id="", snd_magic="") -> int:
         if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
-        version = self.get_rec_file_info(path, snd_id=snd_id, snd_magic=snd_magic)[0]["version"]
-        
-        data = {
-            path: str(version) + " FILE",
-        }
-
-        self._post(self._host_url + "/d/ajax/purge?sndId=" + snd_id + "&sndMagic=" + snd_magic, data)
+        item = self.get_rec_file_info(path, snd_id=snd_id, snd_magic=snd_magic)[0]
+        return self._purge_entries([(path, snd_id, snd_magic, path, item)], 1, 1)[path]
+
+    # 并发遍历 path 下的回收站，逐个生成被删除的项目，项目中的 "path" 为完整路径
+    ## 回收站列表只包含目录下直接被删除的项目，因此需要同时遍历现存目录和被删除的目录
+    ## since、until 按删除时间（列表项的 mtime）筛选，until 不含；pattern 为名称的通配符，如 "*.tmp"
+    def iter_trash(self, path, max_workers=8, since=None, until=None, pattern=None, snd_id="", snd_magic=""):
+        prefix = ""
+        if snd_id == "":
+            snd_id, snd_magic, inner_path = self.path_cut(path)
+            prefix = path[:len(path) - len(inner_path)]
+            path = inner_path
+        path = path.rstrip("/")
+
+        expand = lambda node, contents: self._trash_expand(node, contents, prefix, since, until, pattern)
+        yield from self._crawl([(path, False, 0), (path, True, 0)], snd_id, snd_magic, max_workers, expand)
+
+    # iter_trash 展开一个目录，返回 (需要继续列出的目录, [被删除的项目])
+    ## 现存目录下的子目录需要同时列出现存和被删除的内容，被删除的目录只需列出被删除的内容
+    def _trash_expand(self, node, contents, prefix, since, until, pattern) -> tuple:
+        dir_path, is_deleted, _ = node
+        children, items = [], []
+        for item in contents:
+            item_path = dir_path + "/" + item["name"]
+            if not is_deleted:
+                if item["isDir"]: children.extend([(item_path, False, 0), (item_path, True, 0)])
+                continue
+            if item["isDir"]: children.append((item_path, True, 0))
+
+            if since != None and (item.get("mtime") is None or item["mtime"] < since): continue
+            if until != None and (item.get("mtime") is None or item["mtime"] >= until): continue
+            if pattern != None and not fnmatch.fnmatch(item["name"], pattern): continue
+            items.append(dict(item, path=prefix + item_path))
+        return children, items
+
+    # 列出回收站中的一组项目，每个目录只列出一次，返回 ([(原始 path, snd_id, snd_magic, path, 项目)], {不存在的 path: PATH_ERROR})
+    def _resolve_trash(self, paths, max_workers) -> tuple:
+        entries, results = [], {}
+        groups = self._group_by_parent(paths)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self.get_file_list, parent, snd_id, snd_magic, True): (snd_id, snd_magic, items) for (snd_id, snd_magic, parent), items in groups.items()}
+            for future, (snd_id, snd_magic, items) in futures.items():
+                try:
+                    contents = future.result()["contents"]
+                except Exception as e:
+                    for original_path, _, _ in items: results[original_path] = self._error_code(e)
+                    continue
+                self._match_trash(contents, snd_id, snd_magic, items, entries, results)
+        return entries, results
+
+    # 在父目录的回收站列表中查找一组项目，找到的加入 entries，不存在的在 results 中记为 PATH_ERROR
+    def _match_trash(self, contents, snd_id, snd_magic, items, entries, results):
+        files = {item["name"]: item for item in contents}
+        for original_path, path, name in items:
+            if name in files: entries.append((original_path, snd_id, snd_magic, path, files[name]))
+            else: results[original_path] = Jianguo.PATH_ERROR
+
+    # 按 sandbox 分组并拆分为每批最多 batch_size 个项目；祖先目录也在其中的项目随祖先一起处理，不单独提交
+    ## 返回 ([(snd_id, snd_magic, 批次)], {被覆盖的原始 path: 最上层祖先的原始 path})
+    def _batch_trash(self, entries, batch_size) -> tuple:
+        groups, covered = {}, {}
+        for entry in entries: groups.setdefault((entry[1], entry[2]), []).append(entry)
+
+        batches = []
+        for (snd_id, snd_magic), items in groups.items():
+            selected = {path: original_path for original_path, _, _, path, _ in items}
+            kept = []
+            for entry in items:
+                ## 记录最上层的被选中祖先，它一定单独提交，结果总能查到
+                top, ancestor = None, entry[3].rsplit("/", 1)[0]
+                while ancestor != "":
+                    if ancestor in selected: top = ancestor
+                    ancestor = ancestor.rsplit("/", 1)[0]
+                if top is None: kept.append(entry)
+                else: covered[entry[0]] = selected[top]
+            batches.extend((snd_id, snd_magic, kept[i:i + batch_size]) for i in range(0, len(kept), batch_size))
+        return batches, covered
+
+    # 执行 submit(snd_id, snd_magic, batch) 并汇总为 {原始 path: 状态码}
+    def _run_trash_batches(self, entries, batch_size, max_workers, submit) -> dict:
+        batches, covered = self._batch_trash(entries, batch_size)
+        codes = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(submit, *batch) for batch in batches]
+            for future in futures:
+                try:
+                    codes.append(future.result())
+                except Exception as e:
+                    codes.append(self._error_code(e))
+        return self._trash_results(batches, codes, covered)
+
+    # 将各批次的状态码汇总为 {原始 path: 状态码}，随祖先一起处理的项目使用祖先的结果
+    def _trash_results(self, batches, codes, covered) -> dict:
+        results = {}
+        for (_, _, batch), code in zip(batches, codes):
+            for entry in batch: results[entry[0]] = code
+        for original_path, ancestor in covered.items(): results[original_path] = results[ancestor]
+        return results
+
+    # 彻底删除一批回收站项目
+    def _purge_batch(self, snd_id, snd_magic, batch) -> int:
+        self._post(self._host_url + "/d/ajax/purge?sndId=" + snd_id + "&sndMagic=" + snd_magic, self._purge_data(batch))
         return Jianguo.SUCCESS
 
+    # 彻底删除请求的参数，值为 "版本 类型"
+    def _purge_data(self, batch) -> dict:
+        return {path: str(item["version"]) + (" DIRECTORY" if item["isDir"] else " FILE") for _, _, _, path, item in batch}
+
+    # 恢复一批回收站项目，并等待返回的 uuid 对应的操作完成
+    def _restore_batch(self, snd_id, snd_magic, batch) -> int:
+        data = {path: "" for _, _, _, path, _ in batch}
+        uuid = self._post(self._host_url + "/d/ajax/restoreDel?sndId=" + snd_id + "&sndMagic=" + snd_magic, data)
+        for _, _, _, path, _ in batch: self._touch_listing(snd_id, path)
+
+        return self._state_code(self.track_operation("/d/ajax/restoreProgress?uuid=", uuid).result())
+
+    def _purge_entries(self, entries, batch_size=100, max_workers=4) -> dict:
+        return self._run_trash_batches(entries, batch_size, max_workers, self._purge_batch)
+
+    def _restore_entries(self, entries, batch_size=100, max_workers=4) -> dict:
+        return self._run_trash_batches(entries, batch_size, max_workers, self._restore_batch)
+
+    # 批量彻底删除回收站项目，每个目录只列出一次，按 batch_size 合并请求，返回 {path: 状态码}，不存在的项目为 PATH_ERROR
+    def purge_many(self, paths, batch_size=100, max_workers=4) -> dict:
+        entries, results = self._resolve_trash(paths, max_workers)
+        results.update(self._purge_entries(entries, batch_size, max_workers))
+        return results
+
+    # 批量从回收站恢复，按 batch_size 合并请求，并发等待各批次的操作完成，返回 {path: 状态码}，不存在的项目为 PATH_ERROR
+    def restore_many(self, paths, batch_size=100, max_workers=4) -> dict:
+        entries, results = self._resolve_trash(paths, max_workers)
+        results.update(self._restore_entries(entries, batch_size, max_workers))
+        return results
+
+    # 彻底删除 path 下回收站中符合条件的项目，筛选参数同 iter_trash，返回 {path: 状态码}
+    def purge_trash(self, path, since=None, until=None, pattern=None, batch_size=100, max_workers=8) -> dict:
+        entries = [(item["path"],) + self.path_cut(item["path"]) + (item,) for item in self.iter_trash(path, max_workers, since, until, pattern)]
+        return self._purge_entries(entries, batch_size, max_workers)
+
+    # 恢复 path 下回收站中符合条件的项目，筛选参数同 iter_trash，返回 {path: 状态码}
+    def restore_trash(self, path, since=None, until=None, pattern=None, batch_size=100, max_workers=8) -> dict:
+        entries = [(item["path"],) + self.path_cut(item["path"]) + (item,) for item in self.iter_trash(path, max_workers, since, until, pattern)]
+        return self._restore_entries(entries, batch_size, max_workers)
+
     # 从回收站恢复文件
     def recovery(self, path, snd_id="", snd_magic="") -> int:
+        future = self.submit_recovery(path, snd_id, snd_magic)
+        return self._state_code(future.result())
+
+    # 将异步操作的最终状态转换为状态码
+    def _state_code(self, state) -> int:
+        if state == "SUCCESS": return Jianguo.SUCCESS
+        else: return Jianguo.FAILED
+
+    # 提交从回收站恢复文件的操作，不等待完成，返回结果为最终状态的 Future
+    def submit_recovery(self, path, snd_id="", snd_magic="", callback=None):
         if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
-        
+
         data = {
             path: "",
         }
-        
-        ## 恢复后返回一个操作的 uuid，通过 uuid 判断操作是否成功
+
+        ## 恢复后返回一个操作的 uuid，通过 uuid 跟踪操作是否成功
         uuid = self._post(self._host_url + "/d/ajax/restoreDel?sndId=" + snd_id + "&sndMagic=" + snd_magic, data)
+        self._touch_listing(snd_id, path)
+        return self.track_operation("/d/ajax/restoreProgress?uuid=", uuid, callback)
 
-        if self.is_success_by_uuid("/d/ajax/restoreProgress?uuid=", uuid): return Jianguo.SUCCESS
-        else: return Jianguo.FAILED
+    # 以流式请求体上传单个文件，body 为可读对象，length 为其字节数
+    def _upload_body(self, path, body, length, snd_id="", snd_magic="") -> int:
+        if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
+        dir_name, name = os.path.split(path)
+        if dir_name == "": dir_name = "/"
+
+        headers = dict(self._headers)
+        headers["Content-Type"] = "application/octet-stream"
+        headers["Content-Length"] = str(length)
+
+        url = self._host_url + "/d/ajax/fileops/uploadXHRV2?path=" + urllib.parse.quote(path) + "&dirName=" + urllib.parse.quote(dir_name) + "&name=" + urllib.parse.quote(name) + "&sndId=" + snd_id + "&sndMagic=" + snd_magic
+        self._request("POST", url, headers, body)
+        self._touch_listing(snd_id, path, is_dir=False)
+        return Jianguo.SUCCESS
+
+    # 上传本地文件到 remote_path（含文件名）
+    ## 超过 set_max_size 限制时，on_oversize 为 "reject" 则不发送任何数据并返回 FAILED，为 "split" 则拆分为 .001、.002 ... 分卷上传
+    def upload(self, local_path, remote_path, on_oversize="reject") -> int:
+        return self.upload_many([(local_path, remote_path)], max_workers=1, on_oversize=on_oversize)[remote_path]
+
+    # 并发上传多个文件 [(local_path, remote_path)]，同时上传中的数据不超过 max_inflight_bytes，返回 {remote_path: 状态码}
+    def upload_many(self, items, max_workers=4, max_inflight_bytes=256 << 20, on_oversize="reject") -> dict:
+        uploader = Uploader(self._upload_body, self._max_size * 1024 * 1024, max_workers, max_inflight_bytes)
+        return uploader.upload_many(items, on_oversize)
+
+    # 开启目录列表缓存，按条目数 max_entries 和内容大小 max_bytes 进行 LRU 淘汰
+    ## 每隔 poll_interval 秒从操作历史中读取新事件，只使涉及的目录失效
+    def enable_list_cache(self, max_entries=1024, max_bytes=64 << 20, poll_interval=30) -> int:
+        self._list_cache = ListingCache(max_entries, max_bytes, poll_interval)
+        return Jianguo.SUCCESS
+
+    # 关闭目录列表缓存
+    def disable_list_cache(self) -> int:
+        self._list_cache = None
+        return Jianguo.SUCCESS
+
+    # 获取目录列表缓存的统计信息
+    def get_list_cache_stats(self) -> dict:
+        if self._list_cache is None: return {}
+        return self._list_cache.stats()
+
+    # 本客户端修改了某个 path 后，同步更新目录列表缓存
+    def _touch_listing(self, snd_id, path, is_dir=True):
+        if self._list_cache is not None: self._list_cache.touch(snd_id, path, is_dir)
+
+    # 从操作历史中读取上次水位之后的新事件，并使涉及的目录失效
+    ## 首次调用只记录水位；未到 poll_interval 且 force 为 False 时不请求
+    def poll_list_cache(self, snd_id, snd_magic, force=False) -> int:
+        cache = self._list_cache
+        if cache is None: return Jianguo.FAILED
+        watermark = cache.get_watermark(snd_id)
+        if watermark is not None and not force and time.monotonic() - watermark["polled"] < cache.poll_interval:
+            return Jianguo.SUCCESS
+
+        ## 翻到 MIX_EVENT_PAGE_NUM 页仍未到达水位时，其余的新事件无法读取，只能清空该 sandbox 的列表，再从最新事件开始记录水位
+        poll = ListingPoll(cache, snd_id, self._event_key)
+        for events, marker in self._iter_event_pages(snd_id, snd_magic, page_limit=self.MIX_EVENT_PAGE_NUM):
+            if poll.step(events, marker == 1): break
+        poll.finish()
+        return Jianguo.SUCCESS
 
     # 获取文件列表
     def get_file_list(self, path, snd_id="", snd_magic="", is_deleted=False) -> dict:
         if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
-        path = urllib.parse.quote(path)
 
-        if is_deleted:
-            file_list = self._get(self._host_url + "/d/ajax/listTrashDir" + path + "?sndId=" + snd_id + "&sndMagic=" + snd_magic)
-        else:
-            file_list = self._get(self._host_url + "/d/ajax/browse" + path + "?sndId=" + snd_id + "&sndMagic=" + snd_magic)
-        return json.loads(file_list)
+        ## 回收站列表不缓存
+        is_cached = self._list_cache is not None and not is_deleted
+        if is_cached:
+            self.poll_list_cache(snd_id, snd_magic)
+            file_list = self._list_cache.get(snd_id, path)
+            if file_list is not None: return file_list
+
+        body = self._request("GET", self._list_url(path, snd_id, snd_magic, is_deleted), self._headers).body
+        result = json.loads(body)
+
+        ## 按响应的字节数计入缓存大小
+        if is_cached: self._list_cache.put(snd_id, path, result, len(body))
+        return result
     
+    # 流式获取文件列表，逐个生成列表项，适用于项目非常多的目录；列表缓存中已有时直接使用缓存，否则不写入缓存
+    def iter_file_list(self, path, snd_id="", snd_magic="", is_deleted=False):
+        if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
+
+        if self._list_cache is not None and not is_deleted:
+            self.poll_list_cache(snd_id, snd_magic)
+            file_list = self._list_cache.get(snd_id, path)
+            if file_list is not None:
+                yield from file_list["contents"]
+                return
+
+        yield from self._iter_json(self._list_url(path, snd_id, snd_magic, is_deleted), "contents")
+
+    # 文件列表的请求地址，is_deleted 为 True 时为回收站列表
+    def _list_url(self, path, snd_id, snd_magic, is_deleted=False) -> str:
+        view = "/d/ajax/listTrashDir" if is_deleted else "/d/ajax/browse"
+        return self._host_url + view + urllib.parse.quote(path) + "?sndId=" + snd_id + "&sndMagic=" + snd_magic
+
     # 通过条件获取文件信息
     def get_file_info(self, path, snd_id="", snd_magic="", is_deleted=False, is_greedy=False, **kwargs) -> list:
         ## 如果只传入了 path，且没有其他筛选参数，则精确定位 name
@@ -285,30 +803,113 @@ class Jianguo(object):
         
         return self.get_target_result(files, is_greedy, **kwargs)
 
+    # 并发遍历目录树，逐个生成 (dir, dirs, files)，dirs 和 files 为列表中的项目信息
+    ## 广度优先，同时进行中的列表请求不超过 max_workers 个，max_depth 为 0 时只列出 path 本身
+    ## 列表失败时调用 onerror(dir, exception)，未指定则直接抛出
+    def walk(self, path, max_workers=8, max_depth=None, is_deleted=False, snd_id="", snd_magic="", onerror=None):
+        prefix = ""
+        if snd_id == "":
+            snd_id, snd_magic, inner_path = self.path_cut(path)
+            prefix = path[:len(path) - len(inner_path)]
+            path = inner_path
+
+        expand = lambda node, contents: self._walk_expand(node, contents, prefix, max_depth)
+        handler = None if onerror is None else lambda node, e: onerror(prefix + node[0], e)
+        yield from self._crawl([(path, is_deleted, 0)], snd_id, snd_magic, max_workers, expand, handler)
+
+    # walk 展开一个目录，返回 (需要继续列出的子目录, [(dir, dirs, files)])
+    def _walk_expand(self, node, contents, prefix, max_depth) -> tuple:
+        dir_path, is_deleted, depth = node
+        dirs = [item for item in contents if item["isDir"]]
+        files = [item for item in contents if not item["isDir"]]
+
+        children = []
+        if max_depth is None or depth < max_depth:
+            children = [(dir_path + "/" + item["name"], is_deleted, depth + 1) for item in dirs]
+        return children, [(prefix + dir_path, dirs, files)]
+
+    # 按广度优先并发列出目录，nodes 为 [(目录, is_deleted, 深度)]，expand(node, contents) 返回 (需要继续列出的 node, 生成的结果)
+    ## 同时进行中的列表请求不超过 max_workers 个，新发现的目录在生成结果之前提交；列表失败时调用 onerror(node, exception)，未指定则直接抛出
+    def _crawl(self, nodes, snd_id, snd_magic, max_workers, expand, onerror=None):
+        pending = deque(nodes)
+        running = {}
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        def submit():
+            while pending and len(running) < max_workers:
+                node = pending.popleft()
+                running[executor.submit(self.get_file_list, node[0], snd_id, snd_magic, node[1])] = node
+
+        try:
+            submit()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    try:
+                        contents = future.result()["contents"]
+                    except Exception as e:
+                        if onerror is None: raise
+                        onerror(node, e)
+                        continue
+
+                    children, results = expand(node, contents)
+                    pending.extend(children)
+                    submit()
+                    yield from results
+                submit()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
     # 移动/复制文件
     # todo：实现路径到路径的操作，目前是路径到目标目录
     # todo：如果没填目标路径则使用 src_path 信息的判断
     def move(self, src_path, dst_dir, is_copy=False, snd_id="", snd_magic="", dst_snd_id="", dst_snd_magic="") -> int:
+        future = self.submit_move(src_path, dst_dir, is_copy, snd_id, snd_magic, dst_snd_id, dst_snd_magic)
+        return self._state_code(future.result())
+
+    # 提交移动/复制操作，不等待完成，返回结果为最终状态的 Future
+    def submit_move(self, src_path, dst_dir, is_copy=False, snd_id="", snd_magic="", dst_snd_id="", dst_snd_magic="", callback=None):
         if snd_id == "": snd_id, snd_magic, src_path = self.path_cut(src_path)
         if dst_snd_id == "": dst_snd_id, dst_snd_magic, dst_dir = self.path_cut(dst_dir)
-        
+
+        ## 移动后返回一个操作的 uuid，通过 uuid 跟踪操作是否成功
+        uuid = self._post(*self._move_request(src_path, dst_dir, is_copy, snd_id, snd_magic, dst_snd_id, dst_snd_magic))
+        if not is_copy: self._touch_listing(snd_id, src_path)
+        self._touch_listing(dst_snd_id, dst_dir)
+        return self.track_operation("/d/ajax/moveProgress?uuid=", uuid, callback)
+
+    # 移动/复制请求的地址和参数，返回 (url, data)
+    def _move_request(self, src_path, dst_dir, is_copy, snd_id, snd_magic, dst_snd_id, dst_snd_magic) -> tuple:
         data = {
             "srcSndId": snd_id,
             "srcSndMagic": snd_magic,
             "srcPath": src_path,
             "dstDir": dst_dir,
         }
-        
+
         ## 如果是复制，需要改变地址
         if is_copy: move_path = "/d/ajax/submitCopy?sndId="
         else: move_path = "/d/ajax/submitMove?sndId="
-        
-        ## 移动后返回一个操作的 uuid，通过 uuid 判断操作是否成功
-        uuid = self._post(self._host_url + move_path + dst_snd_id + "&sndMagic=" + dst_snd_magic, data)
-
-        if self.is_success_by_uuid("/d/ajax/moveProgress?uuid=", uuid): return Jianguo.SUCCESS
-        else: return Jianguo.FAILED
+        return self._host_url + move_path + dst_snd_id + "&sndMagic=" + dst_snd_magic, data
     
+    # 批量移动/复制 [(src_path, dst_dir)]，并发提交后由跟踪器统一等待各操作完成，返回 {src_path: 状态码}
+    ## 移动接口每次只接受一个 srcPath，因此按项目并发提交；sandbox 解析走缓存，不需要额外列目录
+    def move_many(self, items, is_copy=False, max_workers=4) -> dict:
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            submits = {executor.submit(self.submit_move, src_path, dst_dir, is_copy): src_path for src_path, dst_dir in items}
+            for submit, src_path in submits.items():
+                try:
+                    results[src_path] = self._state_code(submit.result().result())
+                except Exception as e:
+                    results[src_path] = self._error_code(e)
+        return results
+
+    # 批量复制 [(src_path, dst_dir)]，返回 {src_path: 状态码}
+    def copy_many(self, items, max_workers=4) -> dict:
+        return self.move_many(items, True, max_workers)
+
     # 获取文件下载链接
     def get_file_link(self, path, snd_id="", snd_magic="") -> str:
         if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
@@ -317,6 +918,32 @@ class Jianguo(object):
         resp = self._get(self._host_url + "/d/ajax/dlink?sndId=" + snd_id + "&sndMagic=" + snd_magic + "&path=" + path)
         return self._host_url + json.loads(resp)["url"]
 
+    # 下载文件到本地，dest 为目录时使用原文件名；可指定历史版本 version
+    ## 大文件分段并发下载，中断后再次调用会从 dest + ".part" 续传，progress(done, total) 用于报告进度
+    def download(self, path, dest, version=None, snd_id="", snd_magic="", resume=True, progress=None, **kwargs) -> dict:
+        if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
+        if os.path.isdir(dest): dest = os.path.join(dest, os.path.basename(path))
+
+        if version is None: url = self.get_file_link(path, snd_id, snd_magic)
+        else: url = self.get_file_version_link(path, str(version), snd_id, snd_magic)
+
+        ## 各分段请求经过调度器（限速、并发控制和重试）并计入请求统计
+        downloader = Downloader(self._transport, self._headers, opener=self._open, **kwargs)
+        return downloader.download(url, dest, resume, progress)
+
+    # 以流式请求读取文件内容，可指定历史版本 version，返回的响应通过 iter_chunks() 逐块读取，使用后需 close()（支持 with）
+    def open_file(self, path, version=None, snd_id="", snd_magic=""):
+        if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
+
+        if version is None: url = self.get_file_link(path, snd_id, snd_magic)
+        else: url = self.get_file_version_link(path, str(version), snd_id, snd_magic)
+        return self._open(url, dict(self._headers, **{"Accept-Encoding": "identity"}))
+
+    # 同步远端目录与本地目录，direction 为 "download"（远端到本地）或 "upload"（本地到远端），只传输有变化的文件
+    ## 返回 {"unchanged", "plan", "failed"}，dry_run 为 True 时只生成计划不执行
+    def sync(self, remote_path, local_dir, direction="download", max_workers=4, dry_run=False) -> dict:
+        return SyncEngine(self, remote_path, local_dir, direction, max_workers).run(dry_run)
+
     # 重命名文件
     def rename(self, path, dest_name, snd_id="", snd_magic="") -> int:
         if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
@@ -333,18 +960,21 @@ class Jianguo(object):
         }
 
         self._post(self._host_url + "/d/ajax/rename?sndId=" + snd_id + "&sndMagic=" + snd_magic, data)
+        self._touch_listing(snd_id, path, file["isDir"])
         return Jianguo.SUCCESS
     
     # 获取文件历史
     def get_file_version_list(self, path, snd_id="", snd_magic="") -> dict:
         if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
-        
+        path = urllib.parse.quote(path)
+
         version_list = self._get(self._host_url + "/d/ajax/versions" + path + "?sndId=" + snd_id + "&sndMagic=" + snd_magic)
         return json.loads(version_list)
 
     # 获取文件历史版本下载链接
     def get_file_version_link(self, path, version, snd_id="", snd_magic="") -> str:
         if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
+        path = urllib.parse.quote(path)
         
         resp = self._get(self._host_url + "/d/ajax/dlink?sndId=" + snd_id + "&sndMagic=" + snd_magic + "&path=" + path + "&ver=" + version)
         return self._host_url + json.loads(resp)["url"]
@@ -359,7 +989,13 @@ class Jianguo(object):
         }
 
         self._post(self._host_url + "/d/ajax/fileops/restore?sndId=" + snd_id + "&sndMagic=" + snd_magic, data)
+        self._touch_listing(snd_id, path, is_dir=False)
         return Jianguo.SUCCESS
+
+    # 导出目录树中所有文件的历史版本到本地目录 dest，内容相同的版本只保存一份，再次导出时只下载新增的版本
+    ## 返回下载、去重、跳过的版本数和失败项，dry_run 为 True 时只统计需要下载的版本
+    def export_versions(self, path, dest, max_workers=4, dry_run=False) -> dict:
+        return VersionExporter(self, path, dest, max_workers).run(dry_run)
     
     # 获取应用密码
     def get_asps(self) -> dict:
@@ -421,16 +1057,29 @@ class Jianguo(object):
     # 创建/编辑分享
     def share(self, path, snd_id="", snd_magic="", **kwargs) -> dict:
         if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
-        
+
+        ## 单个 path 不获取整个分享列表：缓存中有该 sandbox 的分享索引时直接使用，否则通过 pubInfo 获取已有信息
+        result = self._share(path, snd_id, snd_magic, self._share_cache.get(snd_id), kwargs)
+        self._share_cache.invalidate(snd_id)
+        return result
+
+    # 创建/编辑分享，shares 为该 sandbox 的分享索引，用于判断是否已分享，为 None 时总是尝试获取已有信息
+    def _share(self, path, snd_id, snd_magic, shares, kwargs) -> dict:
         ## 对于已存在的分享，默认使用已有信息，对于未存在的分享，使用初始值
-        try:
-            share_info = self.get_share_info(path, snd_id, snd_magic)
-            for key, value in kwargs.items():
-                share_info[key] = value
-        except:
-            pass
-        
-        data = {
+        share_info = {}
+        if shares is None or path in shares:
+            try:
+                share_info = self.get_share_info(path, snd_id, snd_magic)
+            except (urllib.error.HTTPError, ValueError):
+                pass
+
+        resp = self._post(self._host_url + "/d/ajax/dirops/pub?sndId=" + snd_id + "&sndMagic=" + snd_magic, self._share_data(path, share_info, kwargs))
+        return json.loads(resp)
+
+    # 分享请求的参数，share_info 为已有的分享信息，kwargs 中的设置优先
+    def _share_data(self, path, share_info, kwargs) -> dict:
+        share_info = dict(share_info, **kwargs)
+        return {
             "path": path,
             "acl_list": share_info.get("aclist", ""),
             "acl": share_info.get("acl", 1),
@@ -441,23 +1090,85 @@ class Jianguo(object):
             "enable_comment": False,
         }
 
-        resp = self._post(self._host_url + "/d/ajax/dirops/pub?sndId=" + snd_id + "&sndMagic=" + snd_magic, data)
-        return json.loads(resp)
+    # 批量分享，每个 sandbox 只获取一次分享索引，之后并发提交，kwargs 同 share
+    ## 返回 {path: 结果}，结果为 share 的返回内容加上状态码 "code"
+    def share_many(self, paths, max_workers=4, **kwargs) -> dict:
+        results, jobs, sandboxes = {}, [], {}
+        for original_path in paths:
+            try:
+                snd_id, snd_magic, path = self.path_cut(original_path)
+                if snd_id not in sandboxes: sandboxes[snd_id] = self._get_shares(snd_id, snd_magic)
+            except Exception as e:
+                results[original_path] = {"code": self._error_code(e)}
+                continue
+            jobs.append((original_path, path, snd_id, snd_magic))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [(original_path, executor.submit(self._share, path, snd_id, snd_magic, sandboxes[snd_id], kwargs)) for original_path, path, snd_id, snd_magic in jobs]
+            for original_path, future in futures:
+                try:
+                    results[original_path] = dict(future.result(), code=Jianguo.SUCCESS)
+                except Exception as e:
+                    results[original_path] = {"code": self._error_code(e)}
+
+        for snd_id in sandboxes: self._share_cache.invalidate(snd_id)
+        return results
+
+    # 撤销一个 sandbox 中的一组分享，每次请求最多包含 batch_size 个，返回 {原始 path: 状态码}
+    def _revoke_group(self, snd_id, snd_magic, items, batch_size) -> dict:
+        results, requests = self._revoke_requests(self._get_shares(snd_id, snd_magic), snd_id, snd_magic, items, batch_size)
+
+        for url, data, batch in requests:
+            try:
+                self._post(url, data)
+                code = Jianguo.SUCCESS
+                self._share_cache.remove(snd_id, [path for _, path, _ in batch])
+            except Exception as e:
+                code = self._error_code(e)
+            for original_path, _, _ in batch: results[original_path] = code
+        return results
+
+    # 根据 sandbox 的分享索引生成一组分享的撤销请求，返回 ({不在分享列表中的原始 path: PATH_ERROR}, [(url, data, [(原始 path, path, 键)])])
+    def _revoke_requests(self, shares, snd_id, snd_magic, items, batch_size) -> tuple:
+        results = {}
+
+        ## 文件或文件夹需要区分一下
+        keys = []
+        for original_path, path in items:
+            share = shares.get(path)
+            if share is None:
+                results[original_path] = Jianguo.PATH_ERROR
+                continue
+            share_type = "directory" if share["type"] == "directory" else "file"
+            keys.append((original_path, path, path + "|" + share_type))
+
+        requests = []
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start:start + batch_size]
+            requests.append((self._host_url + "/d/ajax/pubops/revoke?sndId=" + snd_id + "&sndMagic=" + snd_magic, {key: "dummy" for _, _, key in batch}, batch))
+        return results, requests
+
+    # 批量撤销分享，按 sandbox 分组合并为多键请求，返回 {path: 状态码}
+    def revoke_many(self, paths, batch_size=100, max_workers=4) -> dict:
+        groups = {}
+        for original_path in paths:
+            snd_id, snd_magic, path = self.path_cut(original_path)
+            groups.setdefault((snd_id, snd_magic), []).append((original_path, path))
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [(items, executor.submit(self._revoke_group, snd_id, snd_magic, items, batch_size)) for (snd_id, snd_magic), items in groups.items()]
+            for items, future in futures:
+                try:
+                    results.update(future.result())
+                except Exception as e:
+                    for original_path, _ in items: results[original_path] = self._error_code(e)
+        return results
 
     # 移除分享
     def delete_share(self, path, snd_id="", snd_magic="") -> int:
         if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
-        
-        ## 文件或文件夹需要区分一下
-        if self.get_share_list_info(path, snd_id=snd_id, snd_magic=snd_magic)["type"] == "directory": path += "|directory"
-        else: path += "|file"
-
-        data = {
-            path: "dummy",
-        }
-
-        self._post(self._host_url + "/d/ajax/pubops/revoke?sndId=" + snd_id + "&sndMagic=" + snd_magic, data)
-        return Jianguo.SUCCESS
+        return self._revoke_group(snd_id, snd_magic, [(path, path)], 1)[path]
 
     # 获取分享信息
     def get_share_info(self, path, snd_id="", snd_magic="") -> dict:
@@ -465,43 +1176,85 @@ class Jianguo(object):
         resp = self._get(self._host_url + "/d/ajax/pubInfo?path=" + path + "&sndId=" + snd_id + "&sndMagic=" + snd_magic)
         return json.loads(resp)
     
+    # 获取 sandbox 的分享索引 {path: 分享信息}（优先使用缓存），force 为 True 时重新获取
+    def _get_shares(self, snd_id, snd_magic, force=False) -> dict:
+        shares = None if force else self._share_cache.get(snd_id)
+        if shares is not None: return shares
+
+        resp = self._get(self._host_url + "/d/ajax/pubops/list/?sndId=" + snd_id + "&sndMagic=" + snd_magic)
+        objects = json.loads(resp)["objects"]
+        self._share_cache.put(snd_id, objects)
+        return {share["path"]: share for share in objects}
+
+    # 设置分享列表缓存有效期（秒），为 0 时不缓存
+    def set_share_cache_ttl(self, ttl=60) -> int:
+        if ttl < 0:
+            return Jianguo.FAILED
+        self._share_cache.ttl = ttl
+        self._share_cache.invalidate()
+        return Jianguo.SUCCESS
+
+    # 清空分享列表缓存，path 为 None 时清空所有 sandbox
+    def clear_share_cache(self, path=None) -> int:
+        if path is None: self._share_cache.invalidate()
+        else: self._share_cache.invalidate(self.path_cut(path)[0])
+        return Jianguo.SUCCESS
+
+    # 获取分享列表缓存的命中统计
+    def get_share_cache_stats(self) -> dict:
+        return self._share_cache.stats()
+
     # 获取指定 path 的分享列表信息
     def get_share_list_info(self, path, snd_id="", snd_magic="") -> list:
         if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
-
-        try:
-            resp = self._get(self._host_url + "/d/ajax/pubops/list/?sndId=" + snd_id + "&sndMagic=" + snd_magic)
-            shares = json.loads(resp)["objects"]
-        except:
-            pass
+        shares = self._get_shares(snd_id, snd_magic)
 
         ## 如果 path 仅为 sandbox，则返回其下所有分享信息，否则返回单个分享的信息
         if path == "":
-            return shares
+            return list(shares.values())
         else:
-            for share in shares:
-                if path == share["path"]: return share
+            return shares.get(path)
 
-    # 获取 sandbox 操作历史列表，可指定翻页标记 marker 和获取页数 page_num，以及通过属性筛选结果
-    def get_event(self, original_path, marker=0, page_num=1, snd_id="", snd_magic="", from_time=None, to_time=None, is_greedy=False, **kwargs) -> list:
-        if snd_id == "": snd_id, snd_magic, original_path = self.path_cut(original_path)
-        kwargs["path"] = kwargs.get("path", original_path)
-        
-        ## 如果 marker 不为0，则添加 marker 翻页标记参数
-        # print(type(snd_id), type(snd_magic))
+    def _event_url(self, snd_id, snd_magic, marker) -> str:
         url = self._host_url + "/d/ajax/getEvents?sndId=" + snd_id + "&sndMagic=" + snd_magic
-        if marker != 0: url = url + "&marker=" + str(marker)
-        
-        try:
-            resp = json.loads(self._get(url))
-            events = resp["events"]
-            marker = resp["marker"]
-        except:
-            pass
+        if marker != 0: url = url + "&marker=" + str(marker) ### 如果 marker 不为0，则添加 marker 翻页标记参数
+        return url
+
+    # 逐页获取操作历史，生成 (events, marker)，marker 为下一页的翻页标记
+    ## 每页 100 条，marker 为 1 表示已到最终页
+    def _iter_event_pages(self, snd_id, snd_magic, marker=0, page_limit=None):
+        page = 0
+        while page_limit is None or page < page_limit:
+            fields = {}
+            events = list(self._iter_json(self._event_url(snd_id, snd_magic, marker), "events", fields))
+            marker = fields["marker"]
+            yield events, marker
+
+            page += 1
+            if marker == 1 or events == []: break
+
+    # 逐条流式获取操作历史，跨页连续生成，每页读取结束后才能得到下一页的 marker
+    ## state 不为 None 时，读到最终页后设置 state["exhausted"] 为 True（因 page_limit 停止时不设置）
+    def _iter_event_stream(self, snd_id, snd_magic, marker=0, page_limit=None, state=None):
+        page = 0
+        while page_limit is None or page < page_limit:
+            fields, count = {}, 0
+            for event in self._iter_json(self._event_url(snd_id, snd_magic, marker), "events", fields):
+                count += 1
+                yield event
+            marker = fields["marker"]
 
-        events = self.get_target_result(events, is_greedy, **kwargs)
+            page += 1
+            if marker == 1 or count == 0:
+                if state is not None: state["exhausted"] = True
+                break
+
+    # 操作历史的唯一标识
+    def _event_key(self, event) -> tuple:
+        return event["path"], event["opType"], event["timestamp"]
 
-        ## 时间筛选
+    # 按时间筛选操作历史，from_time 为起始时间（含），to_time 为终止时间（不含）
+    def _filter_by_time(self, events, from_time=None, to_time=None) -> list:
         result = []
         for event in events:
             is_match = True
@@ -511,42 +1264,179 @@ class Jianguo(object):
             if to_time != None:
                 if event["timestamp"] >= to_time: is_match = False ### 终止时间
             if is_match: result.append(event)
+        return result
+
+    # 获取 sandbox 操作历史列表，可指定翻页标记 marker 和获取页数 page_num，以及通过属性筛选结果
+    def get_event(self, original_path, marker=0, page_num=1, snd_id="", snd_magic="", from_time=None, to_time=None, is_greedy=False, **kwargs) -> list:
+        if snd_id == "": snd_id, snd_magic, original_path = self.path_cut(original_path)
+        kwargs["path"] = kwargs.get("path", original_path)
 
         ## 如果页数为0，即需要找到能获取结果的第一页
-        if page_num == 0: page = -self.MIX_EVENT_PAGE_NUM
-        else: page = 1
-
-        ## 递归调用，并合并列表，目前每页100条信息
-        while page < page_num:
-            if marker == 1: break ### 如果 marker 为1，表示到达最终页，结束循环
-            if page_num == 0:
-                if result != []: break ### 如果 page_num 为0，且结果已不为空，结束循环
-            
-            page_result, marker = self.get_event(original_path, marker, page_num, snd_id, snd_magic, from_time, to_time, is_greedy, **kwargs)
-            result.extend(page_result)
-            page += 1
+        if page_num == 0: page_limit = self.MIX_EVENT_PAGE_NUM
+        else: page_limit = page_num
+
+        result = []
+        for events, marker in self._iter_event_pages(snd_id, snd_magic, marker, page_limit):
+            if self._collect_events(result, events, page_num, from_time, to_time, is_greedy, kwargs): break
 
-            # if page_result[-1]["timestamp"] < from_time: break ### 如果本页的最后一个项目的时间已小于 from_time，结束循环
-            
         return result, marker
 
-    # 撤销操作历史
+    # 将一页操作历史中符合条件的事件加入 result，返回 True 时 get_event 不再翻页
+    def _collect_events(self, result, events, page_num, from_time, to_time, is_greedy, kwargs) -> bool:
+        result.extend(self._filter_by_time(self.get_target_result(events, is_greedy, **kwargs), from_time, to_time))
+
+        if page_num == 0 and result != []: return True ### 如果 page_num 为0，且结果已不为空，结束循环
+        if from_time != None and events != [] and events[-1]["timestamp"] < from_time: return True ### 如果本页的最后一个项目的时间已小于 from_time，结束循环
+        return False
+
+    # 读取操作历史水位文件，不存在时返回 None
+    def _load_event_checkpoint(self, checkpoint) -> dict:
+        if checkpoint is None or not os.path.exists(checkpoint): return None
+        with open(checkpoint, "r") as f:
+            state = json.load(f)
+        return {"timestamp": state["timestamp"], "seen": {tuple(key) for key in state["seen"]}}
+
+    def _save_event_checkpoint(self, checkpoint, timestamp, seen):
+        with open(checkpoint + ".tmp", "w") as f:
+            json.dump({"timestamp": timestamp, "seen": sorted(seen)}, f, ensure_ascii=False)
+        os.replace(checkpoint + ".tmp", checkpoint)
+
+    # 逐条生成 path 下（含自身）的操作历史，按时间倒序逐页获取，早于 since 时立即停止
+    ## until 为终止时间（不含），page_limit 限制最多获取的页数，kwargs 的筛选规则同 get_target_result
+    ## checkpoint 为水位文件路径：遍历到上次保存的水位即停止，完整遍历后保存新的水位，因此反复调用只会获取新增的事件
+    ## 首次调用（没有水位文件）总是保存水位；之后因 page_limit 在到达上次水位前停止时不保存，下次调用会从最新的事件重新开始
+    ## 设置 until 时新水位不超过 until
+    def iter_events(self, path, since=None, until=None, page_limit=None, marker=0, checkpoint=None, snd_id="", snd_magic="", is_greedy=False, **kwargs):
+        if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
+
+        ## 只有从最新一页开始时才能确定新的水位；事件从连接中逐条解析，不需要等整页读取完成
+        is_match = matcher(is_greedy, **kwargs) if kwargs else None
+        cursor = EventCursor(path, since, until, self._load_event_checkpoint(checkpoint), marker == 0, is_match)
+        state = {}
+        for event in self._iter_event_stream(snd_id, snd_magic, marker, page_limit, state):
+            action = cursor.step(event, self._event_key(event))
+            if action == EventCursor.STOP: break
+            if action == EventCursor.YIELD: yield event
+
+        watermark = cursor.result(state.get("exhausted", False))
+        if checkpoint != None and watermark != None: self._save_event_checkpoint(checkpoint, *watermark)
+
+    # 撤销操作历史，全部成功时返回 SUCCESS，否则返回第一个失败的状态码
     def undo_event(self, path, snd_id="", snd_magic="", **kwargs) -> int:
         if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
 
+        code = Jianguo.SUCCESS
         events = self.get_event(path, snd_id=snd_id, snd_magic=snd_magic, **kwargs)[0]
         for event in events:
-            data = {
-                "optype": event["opType"],
-                "path": event["path"],
-                "deleted": str(event["isdel"]),
-                "dir": event["isdir"],
-                "version": event["version"],
-            }
-
             try:
-                resp = self._post(self._host_url + "/d/ajax/fileops/undoEvents?sndId=" + snd_id + "&sndMagic=" + snd_magic, data)
-            except:
-                pass
+                self._undo_one(snd_id, snd_magic, event)
+            except (urllib.error.HTTPError, RequestError) as e:
+                if code == Jianguo.SUCCESS: code = self._error_code(e)
+
+        return code
+
+    # 撤销操作历史请求的参数
+    def _undo_data(self, event) -> dict:
+        return {
+            "optype": event["opType"],
+            "path": event["path"],
+            "deleted": str(event["isdel"]),
+            "dir": event["isdir"],
+            "version": event["version"],
+        }
 
+    # 撤销单条操作历史
+    def _undo_one(self, snd_id, snd_magic, event) -> int:
+        self._post(self._host_url + "/d/ajax/fileops/undoEvents?sndId=" + snd_id + "&sndMagic=" + snd_magic, self._undo_data(event))
+        self._touch_listing(snd_id, event["path"], event["isdir"])
         return Jianguo.SUCCESS
+
+    # 生成撤销计划，返回 ([(事件, 依赖的计划序号)], [跳过的重复事件])，计划中的依赖总是排在前面
+    ## 同一路径或互为祖先/后代的事件从新到旧撤销；时间相同时，撤销后会移除项目的事件（UNDO_REMOVING_OPS）先撤销后代，
+    ## 其他事件（如撤销删除，即从回收站恢复）先撤销祖先目录；互不相关的事件之间没有依赖
+    def _plan_undo(self, events) -> tuple:
+        unique, skipped, seen = [], [], set()
+        for event in events:
+            key = self._event_key(event)
+            if key in seen:
+                skipped.append(dict(event, reason="duplicate"))
+                continue
+            seen.add(key)
+            unique.append(event)
+
+        def order(event):
+            depth = event["path"].rstrip("/").count("/")
+            if event["opType"] in self.UNDO_REMOVING_OPS: return -event["timestamp"], 0, -depth
+            return -event["timestamp"], 1, depth
+        unique.sort(key=order)
+
+        ## last 为各路径上最后计划的事件；frontier 为各路径下（含自身）尚未被后续事件依赖的事件，新事件依赖它们即可覆盖整棵子树
+        plan, last, frontier = [], {}, {}
+        for event in unique:
+            path = event["path"].rstrip("/")
+            ancestors, ancestor = [], path
+            while ancestor != "":
+                ancestor = ancestor.rsplit("/", 1)[0] if "/" in ancestor else ""
+                ancestors.append(ancestor)
+
+            depends = set(frontier.get(path, ()))
+            for ancestor in ancestors:
+                if ancestor in last: depends.add(last[ancestor])
+
+            index = len(plan)
+            last[path] = index
+            for prefix in [path] + ancestors:
+                nodes = frontier.setdefault(prefix, set())
+                nodes -= depends
+                nodes.add(index)
+            plan.append((event, depends))
+        return plan, skipped
+
+    # 按依赖并发执行撤销计划，同时进行的请求不超过 max_workers 个，依赖失败或被跳过的事件不再撤销
+    ## 返回与计划对应的 [(状态码, HTTP 状态码)]，被跳过的为 None，HTTP 状态码只在服务端返回错误时不为 None
+    def _run_undo_plan(self, snd_id, snd_magic, plan, max_workers) -> list:
+        scheduler = UndoScheduler(plan)
+        running = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                while len(running) < max_workers:
+                    index = scheduler.next_ready()
+                    if index is None: break
+                    running[executor.submit(self._undo_one, snd_id, snd_magic, plan[index][0])] = index
+                if not running: break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    try:
+                        scheduler.finish(index, future.result())
+                    except Exception as e:
+                        scheduler.finish(index, self._error_code(e), e.code if isinstance(e, urllib.error.HTTPError) else None)
+        return scheduler.results()
+
+    # 批量撤销 path 下（含自身）的操作历史，筛选参数同 iter_events，事件逐条流式获取
+    ## 祖先目录先于其中的项目、同一路径从新到旧撤销，互不依赖的事件并发撤销，同时进行的请求不超过 max_workers 个
+    ## 返回 {"events", "success": [事件], "failed": [事件 + code + status（HTTP 状态码，没有时为 None）], "skipped": [事件 + reason]}，
+    ## reason 为 "duplicate"（重复的事件）或 "dependency"（所依赖的撤销失败）；
+    ## dry_run 为 True 时不发送撤销请求，返回 {"events", "plan": [事件 + depends（依赖的计划序号）], "skipped"}
+    def undo_events(self, path, since=None, until=None, max_workers=8, dry_run=False, page_limit=None, snd_id="", snd_magic="", is_greedy=False, **kwargs) -> dict:
+        if snd_id == "": snd_id, snd_magic, path = self.path_cut(path)
+        events = list(self.iter_events(path, since, until, page_limit, snd_id=snd_id, snd_magic=snd_magic, is_greedy=is_greedy, **kwargs))
+        plan, skipped = self._plan_undo(events)
+
+        if dry_run: return self._undo_report(events, plan, skipped)
+        return self._undo_report(events, plan, skipped, self._run_undo_plan(snd_id, snd_magic, plan, max_workers))
+
+    # 生成 undo_events 的返回内容，results 为 _run_undo_plan 的结果，为 None 时（dry_run）返回撤销计划
+    def _undo_report(self, events, plan, skipped, results=None) -> dict:
+        report = {"events": len(events), "skipped": skipped}
+        if results is None:
+            report["plan"] = [dict(event, depends=sorted(depends)) for event, depends in plan]
+            return report
+
+        report["success"], report["failed"] = [], []
+        for (event, _), result in zip(plan, results):
+            if result is None: skipped.append(dict(event, reason="dependency"))
+            elif result[0] == Jianguo.SUCCESS: report["success"].append(event)
+            else: report["failed"].append(dict(event, code=result[0], status=result[1]))
+        return report
@@ -0,0 +1,132 @@
+import os
+import re
+import json
+import time
+import threading
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+# 分段、可续传的流式下载器
+## 大文件按 segment_size 拆分为多个 Range 请求并发下载，进度记录在 dest + ".part.json" 中，
+## 中断后再次下载同一目标会从已完成的位置继续；opener(url, headers) 用于替代 transport.open 发送 GET 请求，如经过调度器
+class Downloader(object):
+    PART_SUFFIX = ".part"
+    STATE_SUFFIX = ".part.json"
+
+    def __init__(self, transport, headers=None, chunk_size=1 << 20, segment_size=32 << 20, max_workers=4, opener=None):
+        self._open = opener or (lambda url, headers: transport.open("GET", url, headers))
+        self._headers = dict(headers or {})
+        self._headers["Accept-Encoding"] = "identity"
+        self.chunk_size = chunk_size
+        self.segment_size = segment_size
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._done = 0
+
+    # 探测文件大小以及是否支持 Range，返回 (size, is_ranged)，大小未知时 size 为 None
+    def probe(self, url) -> tuple:
+        headers = dict(self._headers, Range="bytes=0-0")
+        try:
+            with self._open(url, headers) as response:
+                content_range = response.headers.get("Content-Range", "")
+                length = response.headers.get("Content-Length")
+                ## 服务端忽略 Range 时返回的是完整内容，不读取直接关闭，连接不再复用
+                if response.status == 206: response.read()
+        except urllib.error.HTTPError as e:
+            ## 空文件没有可满足的区间，服务端返回 416 和 "bytes */0"
+            if e.code == 416 and re.match(r"bytes\s+\*/0$", e.headers.get("Content-Range", "")): return 0, False
+            raise
+
+        match = re.match(r"bytes\s+\d+-\d+/(\d+)", content_range)
+        if response.status == 206 and match: return int(match.group(1)), True
+        if length is not None: return int(length), False
+        return None, False
+
+    # 读取续传状态，与当前文件大小不符时丢弃
+    def _load_state(self, dest, size) -> list:
+        part_path, state_path = dest + self.PART_SUFFIX, dest + self.STATE_SUFFIX
+        if not (os.path.exists(part_path) and os.path.exists(state_path)): return None
+        try:
+            with open(state_path, "r") as f:
+                state = json.load(f)
+        except ValueError:
+            return None
+        if state.get("size") != size: return None
+        return state["segments"]
+
+    def _save_state(self, dest, size, segments):
+        state_path = dest + self.STATE_SUFFIX
+        with open(state_path + ".tmp", "w") as f:
+            json.dump({"size": size, "segments": segments}, f)
+        os.replace(state_path + ".tmp", state_path)
+
+    # 划分下载分段，每段为 [start, end, done]，end 为闭区间
+    def _split(self, size, is_ranged) -> list:
+        if not is_ranged or size is None or size < self.segment_size * 2:
+            return [[0, (size or 0) - 1, 0]]
+        segments = []
+        for start in range(0, size, self.segment_size):
+            segments.append([start, min(start + self.segment_size, size) - 1, 0])
+        return segments
+
+    # 下载一个分段，写入 part 文件的对应位置
+    def _fetch_segment(self, url, dest, size, segments, index, is_ranged, progress):
+        segment = segments[index]
+        start, end, done = segment
+        headers = dict(self._headers)
+        if is_ranged and (start + done > 0 or end < size - 1):
+            headers["Range"] = "bytes=" + str(start + done) + "-" + str(end)
+
+        with self._open(url, headers) as response, open(dest + self.PART_SUFFIX, "r+b") as f:
+            ## 返回的不是请求的区间时不能按偏移写入
+            if "Range" in headers and response.status != 206:
+                raise IOError("range not honored: expected 206, got " + str(response.status))
+            f.seek(start + done)
+            for chunk in response.iter_chunks(self.chunk_size):
+                f.write(chunk)
+                with self._lock:
+                    segment[2] += len(chunk)
+                    self._done += len(chunk)
+                    if is_ranged: self._save_state(dest, size, segments)
+                    if progress is not None: progress(self._done, size)
+
+    # 下载 url 到 dest，返回包含大小、耗时和速度的报告
+    def download(self, url, dest, resume=True, progress=None) -> dict:
+        size, is_ranged = self.probe(url)
+        part_path = dest + self.PART_SUFFIX
+
+        segments = None
+        if resume and is_ranged: segments = self._load_state(dest, size)
+        if segments is None:
+            segments = self._split(size, is_ranged)
+            with open(part_path, "wb") as f:
+                if size: f.truncate(size)
+            if is_ranged: self._save_state(dest, size, segments)
+
+        resumed = sum(segment[2] for segment in segments)
+        self._done = resumed
+        pending = [i for i, segment in enumerate(segments) if size is None or segment[0] + segment[2] <= segment[1]]
+
+        begin = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(pending)))) as executor:
+            futures = [executor.submit(self._fetch_segment, url, dest, size, segments, i, is_ranged, progress) for i in pending]
+            for future in futures: future.result()
+        elapsed = time.monotonic() - begin
+
+        ## part 文件已预先分配空间，因此按各分段实际写入的字节数校验大小，通过后再替换为目标文件
+        actual_size = sum(segment[2] for segment in segments)
+        if size is not None and actual_size != size:
+            raise IOError("size mismatch: expected " + str(size) + " bytes, got " + str(actual_size))
+        os.replace(part_path, dest)
+        if os.path.exists(dest + self.STATE_SUFFIX): os.remove(dest + self.STATE_SUFFIX)
+
+        transferred = self._done - resumed
+        return {
+            "path": dest,
+            "size": actual_size,
+            "segments": len(segments),
+            "resumed": resumed,
+            "transferred": transferred,
+            "elapsed": elapsed,
+            "speed": transferred / elapsed if elapsed > 0 else 0,
+        }
@@ -0,0 +1,128 @@
+from collections import deque
+from jianguo.api import status
+
+# 按 iter_events 的规则逐条判断按时间倒序到达的操作历史，并计算新的水位，同步和异步客户端共用
+## watermark 为上次保存的水位 {"timestamp", "seen"}（没有时为 None）；track 为 False 时（不是从最新一页开始）不计算新水位；
+## matches(event) 判断 path 之外的筛选条件
+class EventCursor(object):
+    STOP = "stop"
+    SKIP = "skip"
+    YIELD = "yield"
+
+    def __init__(self, path, since=None, until=None, watermark=None, track=True, matches=None):
+        self.path = path.rstrip("/")
+        self.since = since
+        self.until = until
+        self.watermark = watermark
+        self.track = track
+        self.matches = matches
+        self.newest = None
+        self.seen = set()
+        ## reached 表示已读到上次的水位（或历史的结尾），只有这时保存新水位才不会漏掉中间的事件；没有上次的水位时不会遗漏
+        self.reached = watermark is None
+
+    # 判断一条事件：STOP 为停止遍历，SKIP 为跳过，YIELD 为生成
+    def step(self, event, key) -> str:
+        watermark = self.watermark
+
+        ## 事件按时间倒序排列，早于 since 或到达水位即停止；since 不晚于水位时，中间的事件已全部读过
+        if self.since != None and event["timestamp"] < self.since:
+            if watermark is None or self.since <= watermark["timestamp"]: self.reached = True
+            return EventCursor.STOP
+        if watermark != None and event["timestamp"] < watermark["timestamp"]:
+            self.reached = True
+            return EventCursor.STOP
+        ## 晚于 until 的事件没有生成，不能计入新水位
+        if self.until != None and event["timestamp"] >= self.until: return EventCursor.SKIP
+        if self.track:
+            if self.newest is None: self.newest = event["timestamp"]
+            if event["timestamp"] == self.newest: self.seen.add(key)
+        if watermark != None and event["timestamp"] == watermark["timestamp"] and key in watermark["seen"]: return EventCursor.SKIP
+        if self.path != "" and event["path"] != self.path and not event["path"].startswith(self.path + "/"): return EventCursor.SKIP
+        if self.matches is not None and not self.matches(event): return EventCursor.SKIP
+        return EventCursor.YIELD
+
+    # 遍历结束后返回需要保存的水位 (timestamp, seen)，不需要保存时返回 None；exhausted 表示已读到最终页
+    def result(self, exhausted=False) -> tuple:
+        if exhausted: self.reached = True
+        if self.newest is None or not self.reached: return None
+        seen = set(self.seen)
+        if self.watermark != None and self.newest == self.watermark["timestamp"]: seen |= self.watermark["seen"]
+        return self.newest, seen
+
+# 目录列表缓存的一次增量失效：逐页处理按时间倒序排列的操作历史，使上次水位之后的事件涉及的目录失效，同步和异步客户端共用
+## 没有上次的水位时只记录新水位；翻页因上限停止而未到达上次水位时，无法确定遗漏了哪些目录，finish() 清空该 sandbox 的列表后再记录新水位
+class ListingPoll(object):
+    def __init__(self, cache, snd_id, event_key):
+        self.cache = cache
+        self.snd_id = snd_id
+        self.event_key = event_key
+        self.watermark = cache.get_watermark(snd_id)
+        self.newest = None
+        self.seen = set()
+        self.reached = self.watermark is None
+
+    # 处理一页事件，is_last 表示已是最终页；返回 True 时不需要再翻页
+    def step(self, events, is_last) -> bool:
+        watermark = self.watermark
+        for event in events:
+            key = self.event_key(event)
+            if self.newest is None: self.newest = event["timestamp"]
+            if event["timestamp"] == self.newest: self.seen.add(key)
+
+            if watermark is None: continue
+            if event["timestamp"] < watermark["timestamp"]:
+                self.reached = True
+                break
+            if event["timestamp"] == watermark["timestamp"] and key in watermark["seen"]: continue
+            self.cache.touch(self.snd_id, event["path"], bool(event.get("isdir", True)))
+
+        ## 已读完全部历史也视为到达水位
+        if is_last or events == []: self.reached = True
+        return self.reached
+
+    # 翻页结束后记录新水位，没有新事件时沿用上次的水位
+    def finish(self):
+        if not self.reached: self.cache.clear(self.snd_id)
+        newest, seen = self.newest, self.seen
+        if newest is None:
+            newest, seen = (self.watermark["timestamp"], self.watermark["seen"]) if self.watermark is not None else (0, set())
+        self.cache.set_watermark(self.snd_id, newest, seen)
+
+# 按依赖执行撤销计划时的状态，plan 为 [(事件, 依赖的计划序号)]，同步和异步客户端共用
+## next_ready() 取出下一个可以执行的计划序号，依赖失败或被跳过的计划不执行，直接视为被跳过；finish() 记录执行结果
+class UndoScheduler(object):
+    def __init__(self, plan):
+        self.plan = plan
+        self.codes = [None] * len(plan)
+        self.statuses = [None] * len(plan)
+        self._waiting = [len(depends) for _, depends in plan]
+        self._dependents = [[] for _ in plan]
+        for index, (_, depends) in enumerate(plan):
+            for depend in depends: self._dependents[depend].append(index)
+        self._ready = deque(index for index, count in enumerate(self._waiting) if count == 0)
+
+    def _release(self, index):
+        for dependent in self._dependents[index]:
+            self._waiting[dependent] -= 1
+            if self._waiting[dependent] == 0: self._ready.append(dependent)
+
+    # 返回下一个可以执行的计划序号，暂时没有时返回 None
+    def next_ready(self) -> int:
+        while self._ready:
+            index = self._ready.popleft()
+            if any(self.codes[depend] != status.SUCCESS for depend in self.plan[index][1]):
+                self._release(index)
+                continue
+            return index
+        return None
+
+    # 记录计划的状态码和 HTTP 状态码（服务端返回错误时）
+    def finish(self, index, code, http_status=None):
+        self.codes[index] = code
+        self.statuses[index] = http_status
+        self._release(index)
+
+    # 返回与计划对应的 [(状态码, HTTP 状态码)]，被跳过的为 None
+    def results(self) -> list:
+        return [None if code is None else (code, http_status) for code, http_status in zip(self.codes, self.statuses)]
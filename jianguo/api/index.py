@@ -0,0 +1,316 @@
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 本地元数据索引，保存在 SQLite 数据库中，查询时不需要访问网络
+## crawl() 完整抓取所有 sandbox 的目录、回收站和分享列表；update() 根据操作历史只重新列出有变化的目录
+## 时间均为毫秒时间戳，与列表项的 mtime 和操作历史的 timestamp 一致
+class Index(object):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sandboxes (
+            snd_id TEXT PRIMARY KEY, name TEXT, magic TEXT, info TEXT
+        );
+        CREATE TABLE IF NOT EXISTS entries (
+            snd_id TEXT, path TEXT, is_deleted INTEGER, parent TEXT, name TEXT, ext TEXT,
+            is_dir INTEGER, size INTEGER, mtime INTEGER, rev TEXT, info TEXT,
+            PRIMARY KEY (snd_id, is_deleted, path)
+        );
+        CREATE INDEX IF NOT EXISTS entries_parent ON entries (snd_id, is_deleted, parent);
+        CREATE INDEX IF NOT EXISTS entries_name ON entries (name);
+        CREATE INDEX IF NOT EXISTS entries_ext ON entries (ext, size);
+        CREATE INDEX IF NOT EXISTS entries_size ON entries (size);
+        CREATE INDEX IF NOT EXISTS entries_mtime ON entries (mtime);
+        CREATE TABLE IF NOT EXISTS shares (
+            snd_id TEXT, path TEXT, info TEXT, PRIMARY KEY (snd_id, path)
+        );
+        CREATE TABLE IF NOT EXISTS watermarks (
+            snd_id TEXT PRIMARY KEY, timestamp INTEGER, seen TEXT, updated REAL
+        );
+    """
+
+    ## 操作历史中没有移动/复制的目标路径，遇到时重新抓取整个 sandbox
+    RECRAWL_OPS = ("MOVE", "COPY")
+    ORDER_COLUMNS = ("path", "name", "size", "mtime")
+
+    def __init__(self, client, db_path, max_workers=8):
+        self._client = client
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(self.SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    ## 写入
+
+    def _row(self, snd_id, path, item, is_deleted) -> tuple:
+        name = item["name"]
+        ext = "" if item["isDir"] or "." not in name else name.rsplit(".", 1)[1].lower()
+        parent = path.rsplit("/", 1)[0]
+        return (snd_id, path, int(is_deleted), parent, name, ext, int(item["isDir"]), item.get("size"), item.get("mtime"), str(item.get("rev", item.get("version", ""))), json.dumps(item, ensure_ascii=False))
+
+    def _insert(self, rows):
+        self._db.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    # 删除 path 及其下所有项目，path 为空时删除整个 sandbox 的项目
+    def _delete_tree(self, snd_id, path, is_deleted):
+        if path == "":
+            self._db.execute("DELETE FROM entries WHERE snd_id = ? AND is_deleted = ?", (snd_id, int(is_deleted)))
+            return
+        ## "0" 是 "/" 的下一个字符，按范围删除可以使用主键索引
+        self._db.execute("DELETE FROM entries WHERE snd_id = ? AND is_deleted = ? AND (path = ? OR (path >= ? AND path < ?))", (snd_id, int(is_deleted), path, path + "/", path + "0"))
+
+    # 遍历 path 下的目录树并写入，返回写入的项目数
+    def _crawl_tree(self, snd_id, magic, path, is_deleted) -> int:
+        count = 0
+        for dir_path, dirs, files in self._client.walk(path, self.max_workers, is_deleted=is_deleted, snd_id=snd_id, snd_magic=magic):
+            rows = [self._row(snd_id, dir_path + "/" + item["name"], item, is_deleted) for item in dirs + files]
+            with self._lock:
+                self._insert(rows)
+            count += len(rows)
+        return count
+
+    # 抓取回收站：回收站列表只包含目录下直接被删除的项目，因此需要列出每个现存目录的回收站视图，再遍历其中被删除的目录
+    def _crawl_trash(self, snd_id, magic) -> int:
+        with self._lock:
+            dirs = [""] + [row["path"] for row in self._db.execute("SELECT path FROM entries WHERE snd_id = ? AND is_deleted = 0 AND is_dir = 1", (snd_id,))]
+
+        count, deleted_dirs = 0, []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [(dir_path, executor.submit(self._client.get_file_list, dir_path, snd_id, magic, True)) for dir_path in dirs]
+            for dir_path, future in futures:
+                contents = future.result()["contents"]
+                with self._lock:
+                    self._insert([self._row(snd_id, dir_path + "/" + item["name"], item, True) for item in contents])
+                count += len(contents)
+                deleted_dirs.extend(dir_path + "/" + item["name"] for item in contents if item["isDir"])
+        for dir_path in deleted_dirs: count += self._crawl_tree(snd_id, magic, dir_path, True)
+        return count
+
+    def _crawl_shares(self, snd_id, magic):
+        shares = self._client._get_shares(snd_id, magic, force=True).values()
+        with self._lock:
+            self._db.execute("DELETE FROM shares WHERE snd_id = ?", (snd_id,))
+            self._db.executemany("INSERT OR REPLACE INTO shares VALUES (?, ?, ?)", [(snd_id, share["path"], json.dumps(share, ensure_ascii=False)) for share in shares])
+
+    # 获取最新的水位，在抓取前调用，抓取期间发生的变化会在下次 update() 时处理
+    def _current_watermark(self, snd_id, magic) -> tuple:
+        for events, _ in self._client._iter_event_pages(snd_id, magic, page_limit=1):
+            if events == []: break
+            newest = events[0]["timestamp"]
+            return newest, {self._client._event_key(event) for event in events if event["timestamp"] == newest}
+        return 0, set()
+
+    def _save_watermark(self, snd_id, timestamp, seen):
+        self._db.execute("INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?)", (snd_id, timestamp, json.dumps(sorted(seen), ensure_ascii=False), time.time()))
+
+    def _load_watermark(self, snd_id) -> tuple:
+        row = self._db.execute("SELECT timestamp, seen FROM watermarks WHERE snd_id = ?", (snd_id,)).fetchone()
+        if row is None: return None
+        return row["timestamp"], {tuple(key) for key in json.loads(row["seen"])}
+
+    # 完整抓取一个 sandbox
+    def _crawl_sandbox(self, sandbox, include_deleted=True) -> int:
+        snd_id, magic = sandbox["sandboxId"], sandbox["magic"]
+        timestamp, seen = self._current_watermark(snd_id, magic)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO sandboxes VALUES (?, ?, ?, ?)", (snd_id, sandbox["name"], magic, json.dumps(sandbox, ensure_ascii=False)))
+            self._delete_tree(snd_id, "", False)
+            self._delete_tree(snd_id, "", True)
+
+        count = self._crawl_tree(snd_id, magic, "", False)
+        if include_deleted: count += self._crawl_trash(snd_id, magic)
+        self._crawl_shares(snd_id, magic)
+        with self._lock:
+            self._save_watermark(snd_id, timestamp, seen)
+            self._db.commit()
+        return count
+
+    # 完整抓取所有 sandbox，返回 {sandbox 名称: 项目数}
+    def crawl(self, include_deleted=True) -> dict:
+        sandboxes = self._client.get_snd_info_by()
+        with self._lock:
+            self._db.execute("DELETE FROM sandboxes")
+            self._db.execute("DELETE FROM entries")
+            self._db.execute("DELETE FROM shares")
+            self._db.execute("DELETE FROM watermarks")
+            self._db.commit()
+        return {sandbox["name"]: self._crawl_sandbox(sandbox, include_deleted) for sandbox in sandboxes}
+
+    ## 增量更新
+
+    # 获取水位之后的操作历史，返回 (events, 新水位时间, 新水位事件集合)
+    def _new_events(self, snd_id, magic, watermark) -> tuple:
+        timestamp, seen = watermark
+        result, newest, newest_seen = [], None, set()
+        for events, _ in self._client._iter_event_pages(snd_id, magic):
+            for event in events:
+                key = self._client._event_key(event)
+                if newest is None: newest = event["timestamp"]
+                if event["timestamp"] == newest: newest_seen.add(key)
+                if event["timestamp"] < timestamp: return result, newest, newest_seen
+                if event["timestamp"] == timestamp and key in seen: continue
+                result.append(event)
+        if newest is None: return result, timestamp, seen
+        return result, newest, newest_seen
+
+    # 用新的列表替换 parent 下的直接子项；新增或有变化的子目录重新遍历，消失的子目录连同其下项目一起删除
+    def _refresh_dir(self, snd_id, magic, parent, is_deleted, contents, changed):
+        with self._lock:
+            old = {row["path"]: row["is_dir"] for row in self._db.execute("SELECT path, is_dir FROM entries WHERE snd_id = ? AND is_deleted = ? AND parent = ?", (snd_id, int(is_deleted), parent))}
+        new = {parent + "/" + item["name"]: item for item in contents}
+
+        rewalk = []
+        with self._lock:
+            for path, is_dir in old.items():
+                if path not in new or (is_dir and path in changed): self._delete_tree(snd_id, path, is_deleted)
+            self._insert([self._row(snd_id, path, item, is_deleted) for path, item in new.items()])
+            for path, item in new.items():
+                if item["isDir"] and (path not in old or path in changed or not old[path]): rewalk.append(path)
+        for path in rewalk: self._crawl_tree(snd_id, magic, path, is_deleted)
+
+    # 根据操作历史更新一个 sandbox，返回处理的事件数
+    def _update_sandbox(self, sandbox, include_deleted=True) -> int:
+        snd_id, magic = sandbox["sandboxId"], sandbox["magic"]
+        with self._lock:
+            watermark = self._load_watermark(snd_id)
+        if watermark is None:
+            self._crawl_sandbox(sandbox, include_deleted)
+            return 0
+
+        events, timestamp, seen = self._new_events(snd_id, magic, watermark)
+        if any(event["opType"] in self.RECRAWL_OPS for event in events):
+            self._crawl_sandbox(sandbox, include_deleted)
+            return len(events)
+
+        parents = {event["path"].rsplit("/", 1)[0] for event in events}
+        changed = {event["path"] for event in events if event.get("isdir")}
+        views = [False, True] if include_deleted else [False]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            listings = [(parent, is_deleted, executor.submit(self._client.get_file_list, parent, snd_id, magic, is_deleted)) for parent in sorted(parents) for is_deleted in views]
+            for parent, is_deleted, future in listings:
+                self._refresh_dir(snd_id, magic, parent, is_deleted, future.result()["contents"], changed)
+
+        self._crawl_shares(snd_id, magic)
+        with self._lock:
+            self._db.execute("UPDATE sandboxes SET name = ?, info = ? WHERE snd_id = ?", (sandbox["name"], json.dumps(sandbox, ensure_ascii=False), snd_id))
+            self._save_watermark(snd_id, timestamp, seen)
+            self._db.commit()
+        return len(events)
+
+    # 增量更新所有 sandbox，新出现的 sandbox 完整抓取，已删除的 sandbox 从索引中移除，返回 {sandbox 名称: 处理的事件数}
+    def update(self, include_deleted=True) -> dict:
+        sandboxes = self._client.get_snd_info_by()
+        current = {sandbox["sandboxId"] for sandbox in sandboxes}
+        with self._lock:
+            for row in self._db.execute("SELECT snd_id FROM sandboxes").fetchall():
+                if row["snd_id"] in current: continue
+                for table in ("sandboxes", "entries", "shares", "watermarks"):
+                    self._db.execute("DELETE FROM " + table + " WHERE snd_id = ?", (row["snd_id"],))
+            self._db.commit()
+        return {sandbox["name"]: self._update_sandbox(sandbox, include_deleted) for sandbox in sandboxes}
+
+    ## 查询
+
+    def _full_path(self, sandbox_name, path) -> str:
+        return (sandbox_name or self._client.DEFAULT_SANDBOX_NAME) + path
+
+    def _entry(self, row) -> dict:
+        return {
+            "path": self._full_path(row["sandbox"], row["path"]),
+            "sandbox": row["sandbox"],
+            "sndId": row["snd_id"],
+            "name": row["name"],
+            "ext": row["ext"],
+            "isDir": bool(row["is_dir"]),
+            "size": row["size"],
+            "mtime": row["mtime"],
+            "rev": row["rev"],
+            "isDeleted": bool(row["is_deleted"]),
+        }
+
+    # 查询索引中的项目，条件之间为“且”的关系，返回与 path_cut 格式一致的完整路径
+    ## name 含 * 或 ? 时按通配符匹配；ext 可以是单个扩展名或列表（不含点，不区分大小写）；
+    ## prefix 为完整路径前缀，如 "我的坚果云/文档"；since、until 为修改时间范围（until 不含）
+    def query(self, name=None, ext=None, min_size=None, max_size=None, since=None, until=None, is_dir=None, is_deleted=False, prefix=None, sandbox=None, order_by="mtime", descending=True, limit=None) -> list:
+        conditions, params = ["e.is_deleted = ?"], [int(is_deleted)]
+        if name is not None:
+            conditions.append("e.name GLOB ?" if "*" in name or "?" in name else "e.name = ?")
+            params.append(name)
+        if ext is not None:
+            exts = [ext] if isinstance(ext, str) else list(ext)
+            conditions.append("e.ext IN (" + ", ".join("?" * len(exts)) + ")")
+            params.extend(item.lower().lstrip(".") for item in exts)
+        if min_size is not None:
+            conditions.append("e.size >= ?")
+            params.append(min_size)
+        if max_size is not None:
+            conditions.append("e.size <= ?")
+            params.append(max_size)
+        if since is not None:
+            conditions.append("e.mtime >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("e.mtime < ?")
+            params.append(until)
+        if is_dir is not None:
+            conditions.append("e.is_dir = ?")
+            params.append(int(is_dir))
+        if prefix is not None:
+            prefix_sandbox, _, inner = prefix.partition("/")
+            conditions.append("s.name = ?")
+            params.append("" if prefix_sandbox == self._client.DEFAULT_SANDBOX_NAME else prefix_sandbox)
+            if inner != "":
+                inner = "/" + inner.rstrip("/")
+                conditions.append("(e.path = ? OR (e.path >= ? AND e.path < ?))")
+                params.extend([inner, inner + "/", inner + "0"])
+        if sandbox is not None:
+            conditions.append("s.name = ?")
+            params.append("" if sandbox == self._client.DEFAULT_SANDBOX_NAME else sandbox)
+        if order_by not in self.ORDER_COLUMNS: raise ValueError("order_by must be one of " + ", ".join(self.ORDER_COLUMNS))
+
+        sql = "SELECT e.*, s.name AS sandbox FROM entries e JOIN sandboxes s ON e.snd_id = s.snd_id WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY e." + order_by + (" DESC" if descending else "")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [self._entry(row) for row in self._db.execute(sql, params)]
+
+    # 获取索引中的分享信息，可指定 sandbox 名称
+    def shares(self, sandbox=None) -> list:
+        sql = "SELECT sh.info, s.name FROM shares sh JOIN sandboxes s ON sh.snd_id = s.snd_id"
+        params = []
+        if sandbox is not None:
+            sql += " WHERE s.name = ?"
+            params.append("" if sandbox == self._client.DEFAULT_SANDBOX_NAME else sandbox)
+        with self._lock:
+            return [dict(json.loads(row["info"]), sandbox=row["name"]) for row in self._db.execute(sql, params)]
+
+    # 获取索引中的 sandbox 信息
+    def sandboxes(self) -> list:
+        with self._lock:
+            return [json.loads(row["info"]) for row in self._db.execute("SELECT info FROM sandboxes")]
+
+    # 获取索引统计：各 sandbox 的项目数、分享数和上次更新时间
+    def stats(self) -> dict:
+        result = {}
+        with self._lock:
+            for row in self._db.execute("SELECT s.snd_id, s.name, w.updated FROM sandboxes s LEFT JOIN watermarks w ON s.snd_id = w.snd_id"):
+                entries = self._db.execute("SELECT COUNT(*) FROM entries WHERE snd_id = ? AND is_deleted = 0", (row["snd_id"],)).fetchone()[0]
+                deleted = self._db.execute("SELECT COUNT(*) FROM entries WHERE snd_id = ? AND is_deleted = 1", (row["snd_id"],)).fetchone()[0]
+                shares = self._db.execute("SELECT COUNT(*) FROM shares WHERE snd_id = ?", (row["snd_id"],)).fetchone()[0]
+                result[self._full_path(row["name"], "")] = {"entries": entries, "deleted": deleted, "shares": shares, "updated": row["updated"]}
+        return result
@@ -0,0 +1,152 @@
+import json
+import zlib
+import codecs
+
+WHITESPACE = " \t\r\n"
+DELIMITERS = WHITESPACE + ",:]}"
+
+# 按 Content-Encoding 增量解压，decode(chunk) 返回已解压的部分，结束时调用 flush()
+class StreamDecoder(object):
+    def __init__(self, encoding=None):
+        self.encoding = (encoding or "").strip().lower()
+        self._decompressor = None
+        if self.encoding in ("gzip", "deflate"):
+            ## gzip 需要 16 + MAX_WBITS，deflate 先按带 zlib 头处理，失败时改为原始 deflate
+            self._wbits = 16 + zlib.MAX_WBITS if self.encoding == "gzip" else zlib.MAX_WBITS
+            self._decompressor = zlib.decompressobj(self._wbits)
+
+    def decode(self, chunk) -> bytes:
+        if self._decompressor is None: return chunk
+        try:
+            return self._decompressor.decompress(chunk)
+        except zlib.error:
+            if self.encoding != "deflate" or self._wbits < 0: raise
+            self._wbits = -zlib.MAX_WBITS
+            self._decompressor = zlib.decompressobj(self._wbits)
+            return self._decompressor.decompress(chunk)
+
+    def flush(self) -> bytes:
+        if self._decompressor is None: return b""
+        return self._decompressor.flush()
+
+# 按 Content-Encoding 逐块解压响应内容
+def iter_decoded(chunks, encoding=None):
+    decoder = StreamDecoder(encoding)
+    for chunk in chunks:
+        data = decoder.decode(chunk)
+        if data: yield data
+    data = decoder.flush()
+    if data: yield data
+
+# 从字节块中增量解析 JSON 对象，逐个生成顶层成员 key 对应数组中的元素
+## 内存中只保留未解析的缓冲区和当前元素；其他顶层成员在遍历结束后保存在 fields 中
+## chunks 为 None 时按推送方式使用：feed(chunk) 返回本块解析出的元素，数据结束后调用 close()，用于异步读取
+class JsonArrayStream(object):
+    def __init__(self, chunks, key):
+        self.key = key
+        self.fields = {}
+        self._chunks = chunks
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._state = "start"
+        self._name = None
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            yield from self.feed(chunk)
+        yield from self.close()
+
+    # 追加一块数据，返回已完整解析的元素
+    def feed(self, chunk) -> list:
+        text = self._decoder.decode(chunk)
+        if text == "": return []
+        ## 丢弃已解析的部分
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        return self._advance()
+
+    # 数据结束，返回剩余的元素，JSON 不完整时抛出 ValueError
+    def close(self) -> list:
+        self._buffer = self._buffer[self._pos:] + self._decoder.decode(b"", final=True)
+        self._pos = 0
+        self._eof = True
+        items = self._advance()
+        if self._state != "done": raise ValueError("incomplete JSON: expected more data in state " + repr(self._state))
+        return items
+
+    # 跳过空白，返回下一个字符，缓冲区已用完时返回 ""
+    def _peek(self) -> str:
+        while self._pos < len(self._buffer) and self._buffer[self._pos] in WHITESPACE: self._pos += 1
+        if self._pos < len(self._buffer): return self._buffer[self._pos]
+        return ""
+
+    def _expect(self, char, chars) -> str:
+        if char not in chars: raise ValueError("expected one of " + repr(chars) + " at offset " + str(self._pos) + ", got " + repr(char))
+        self._pos += 1
+        return char
+
+    # 解析下一个完整的 JSON 值，返回 (是否完整, 值)；值之后不是分隔符（如被截断的数字 "1." 只解析出 1）时视为不完整
+    def _value(self) -> tuple:
+        try:
+            value, end = self._json.raw_decode(self._buffer, self._pos)
+        except ValueError:
+            if self._eof: raise
+            return False, None
+        if (end < len(self._buffer) and self._buffer[end] in DELIMITERS) or self._eof:
+            self._pos = end
+            return True, value
+        return False, None
+
+    # 按当前状态解析尽可能多的内容，数据不足时停下等待下一块
+    def _advance(self) -> list:
+        items = []
+        while True:
+            char = self._peek()
+            if char == "": return items
+            state = self._state
+
+            if state == "start":
+                self._expect(char, "{")
+                self._state = "first_member"
+            elif state == "first_member":
+                if char == "}":
+                    self._pos += 1
+                    self._state = "done"
+                else:
+                    self._state = "name"
+            elif state == "name":
+                is_complete, self._name = self._value()
+                if not is_complete: return items
+                self._state = "colon"
+            elif state == "colon":
+                self._expect(char, ":")
+                self._state = "member"
+            elif state == "member":
+                if self._name == self.key and char == "[":
+                    self._pos += 1
+                    self._state = "first_item"
+                    continue
+                is_complete, value = self._value()
+                if not is_complete: return items
+                self.fields[self._name] = value
+                self._state = "after_member"
+            elif state == "first_item":
+                if char == "]":
+                    self._pos += 1
+                    self._state = "after_member"
+                else:
+                    self._state = "item"
+            elif state == "item":
+                is_complete, value = self._value()
+                if not is_complete: return items
+                items.append(value)
+                self._state = "after_item"
+            elif state == "after_item":
+                self._state = "item" if self._expect(char, ",]") == "," else "after_member"
+            elif state == "after_member":
+                self._state = "name" if self._expect(char, ",}") == "," else "done"
+            else:
+                raise ValueError("extra data at offset " + str(self._pos))
@@ -0,0 +1,181 @@
+import re
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from jianguo.api.utils import logger
+
+# 请求统计，按接口记录次数、耗时分布、响应字节数、错误数和重试次数，可导出为普通字典
+## pre_hook(method, url, headers) 在请求前调用，post_hook(method, url, info) 在请求后调用，
+## info 包含 endpoint、elapsed、bytes、status 和 error
+class Metrics(object):
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    ## 路径中带文件路径的接口只保留接口部分，WebDAV 请求统一记为 /dav
+    PATH_ENDPOINTS = re.compile(r"^(/d/ajax/(?:browse|listTrashDir|versions)|/dav)(?:/.*)?$")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._counters = []
+        self._pre_hooks = []
+        self._post_hooks = []
+
+    # 由 url 得到接口名称
+    def endpoint_of(self, url) -> str:
+        path = re.sub(r"^[a-z]+://[^/]+", "", url).split("?")[0]
+        match = self.PATH_ENDPOINTS.match(path)
+        if match: return match.group(1)
+        return path
+
+    def _stats(self, endpoint) -> dict:
+        stats = self._endpoints.get(endpoint)
+        if stats is None:
+            stats = self._endpoints[endpoint] = {
+                "count": 0,
+                "errors": 0,
+                "retries": 0,
+                "bytes": 0,
+                "total_time": 0.0,
+                "max_time": 0.0,
+                "histogram": [0] * (len(self.BUCKETS) + 1),
+            }
+        return stats
+
+    def add_pre_hook(self, hook):
+        self._pre_hooks.append(hook)
+
+    def add_post_hook(self, hook):
+        self._post_hooks.append(hook)
+
+    def remove_hook(self, hook):
+        if hook in self._pre_hooks: self._pre_hooks.remove(hook)
+        if hook in self._post_hooks: self._post_hooks.remove(hook)
+
+    def before(self, method, url, headers):
+        for hook in list(self._pre_hooks): hook(method, url, headers)
+
+    # 记录一次请求
+    def record(self, method, url, elapsed, nbytes=0, status=None, error=None):
+        endpoint = self.endpoint_of(url)
+        with self._lock:
+            stats = self._stats(endpoint)
+            stats["count"] += 1
+            stats["bytes"] += nbytes
+            stats["total_time"] += elapsed
+            stats["max_time"] = max(stats["max_time"], elapsed)
+            stats["histogram"][bisect.bisect_left(self.BUCKETS, elapsed)] += 1
+            if error is not None: stats["errors"] += 1
+            for counter in self._counters:
+                counter["requests"] += 1
+                counter["endpoints"][endpoint] = counter["endpoints"].get(endpoint, 0) + 1
+
+        info = {"endpoint": endpoint, "elapsed": elapsed, "bytes": nbytes, "status": status, "error": error}
+        for hook in list(self._post_hooks): hook(method, url, info)
+
+    # 记录一次重试
+    def record_retry(self, url):
+        with self._lock:
+            self._stats(self.endpoint_of(url))["retries"] += 1
+
+    # 导出统计结果
+    def snapshot(self) -> dict:
+        with self._lock:
+            result = {}
+            for endpoint, stats in self._endpoints.items():
+                result[endpoint] = dict(stats)
+                result[endpoint]["histogram"] = dict(zip([str(bucket) for bucket in self.BUCKETS] + ["+Inf"], stats["histogram"]))
+                result[endpoint]["avg_time"] = stats["total_time"] / stats["count"] if stats["count"] else 0.0
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+    # 统计代码块中发出的请求数，包括块内其他线程发出的请求
+    @contextmanager
+    def count(self):
+        counter = {"requests": 0, "endpoints": {}}
+        with self._lock:
+            self._counters.append(counter)
+        try:
+            yield counter
+        finally:
+            with self._lock:
+                self._counters.remove(counter)
+
+# 带统计的流式响应，包装 StreamResponse，关闭时将读取的字节数和从发出请求起的总耗时计入 metrics
+## 读取或处理内容时抛出异常则记为出错的请求
+class MeteredResponse(object):
+    def __init__(self, response, metrics, method, url, begin):
+        self.url = response.url
+        self.status = response.status
+        self.headers = response.headers
+        self.received = 0
+        self._response = response
+        self._metrics = metrics
+        self._method = method
+        self._request_url = url
+        self._begin = begin
+        self._error = None
+        self._is_closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if isinstance(exc_value, Exception) and self._error is None: self._error = repr(exc_value)
+        self.close()
+
+    def read(self, amt=None) -> bytes:
+        try:
+            data = self._response.read(amt)
+        except Exception as e:
+            self._error = repr(e)
+            raise
+        self.received += len(data)
+        return data
+
+    # 按 chunk_size 逐块读取，直到响应结束
+    def iter_chunks(self, chunk_size=65536):
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk: break
+            yield chunk
+
+    def close(self):
+        if self._is_closed: return
+        self._is_closed = True
+        self._response.close()
+
+        elapsed = time.monotonic() - self._begin
+        logger.debug("%s %s %d %dB %.3fs (stream)", self._method, self._request_url, self.status, self.received, elapsed)
+        self._metrics.record(self._method, self._request_url, elapsed, self.received, self.status, self._error)
+
+# MeteredResponse 的 asyncio 版本，包装 AsyncStreamResponse，read_chunk、iter_chunks 和 read 为协程
+class AsyncMeteredResponse(MeteredResponse):
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.__exit__(exc_type, exc_value, traceback)
+
+    # 读取最多 amt 个字节，响应结束时返回 b""
+    async def read_chunk(self, amt=65536) -> bytes:
+        try:
+            data = await self._response.read_chunk(amt)
+        except Exception as e:
+            self._error = repr(e)
+            raise
+        self.received += len(data)
+        return data
+
+    # 按 chunk_size 逐块读取，直到响应结束
+    async def iter_chunks(self, chunk_size=65536):
+        while True:
+            chunk = await self.read_chunk(chunk_size)
+            if not chunk: break
+            yield chunk
+
+    async def read(self) -> bytes:
+        return b"".join([chunk async for chunk in self.iter_chunks()])
@@ -0,0 +1,147 @@
+import time
+import heapq
+import asyncio
+import random
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# 异步操作进度跟踪器，由单个调度线程统一轮询任意数量的 uuid
+## poll(progress_path, uuid) 返回操作当前状态；每个操作按指数退避加随机抖动安排下一次轮询，
+## 进入最终状态后完成对应的 Future，结果为状态字符串，超过 timeout 秒仍未完成时结果为 "TIMEOUT"
+class OperationTracker(object):
+    RUNNING_STATES = ("", "INIT", "WAITING", "PENDING", "RUNNING", "PROCESSING")
+    TIMEOUT = "TIMEOUT"
+
+    def __init__(self, poll, initial_delay=0.2, max_delay=10, multiplier=2, jitter=0.2, timeout=600, max_workers=4):
+        self._poll = poll
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = 0
+        self._closed = False
+        self._thread = None
+
+    # 计算下一次轮询的间隔
+    def _next_delay(self, delay) -> float:
+        delay = min(delay * self.multiplier, self.max_delay)
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _schedule(self, when, operation):
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._heap, (when, self._seq, operation))
+            self._cond.notify()
+
+    # 跟踪一个操作，返回 Future；callback(state) 在操作完成时调用
+    def track(self, progress_path, uuid, callback=None) -> Future:
+        future = Future()
+        if callback is not None: future.add_done_callback(lambda f: callback(f.result()))
+
+        now = time.monotonic()
+        operation = {"path": progress_path, "uuid": uuid, "future": future, "delay": self.initial_delay, "deadline": now + self.timeout}
+        with self._cond:
+            if self._closed: raise RuntimeError("tracker is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="jianguo-tracker", daemon=True)
+                self._thread.start()
+        self._schedule(now + self.initial_delay, operation)
+        return future
+
+    # 调度线程：取出到期的操作交给线程池轮询
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and (self._heap == [] or self._heap[0][0] > time.monotonic()):
+                    self._cond.wait(None if self._heap == [] else self._heap[0][0] - time.monotonic())
+                if self._closed: return
+                _, _, operation = heapq.heappop(self._heap)
+            self._executor.submit(self._check, operation)
+
+    # 轮询一次操作状态，未完成时按退避间隔重新排队
+    def _check(self, operation):
+        future = operation["future"]
+        try:
+            state = self._poll(operation["path"], operation["uuid"])
+        except Exception as e:
+            future.set_exception(e)
+            return
+
+        if state not in self.RUNNING_STATES:
+            future.set_result(state)
+            return
+        if time.monotonic() >= operation["deadline"]:
+            future.set_result(self.TIMEOUT)
+            return
+
+        operation["delay"] = self._next_delay(operation["delay"])
+        self._schedule(time.monotonic() + operation["delay"], operation)
+
+    # 等待所有 Future 完成，返回结果列表（顺序与传入一致）
+    def wait_all(self, futures, timeout=None) -> list:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        results = []
+        for future in futures:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            results.append(future.result(remaining))
+        return results
+
+    # 停止调度，未完成的操作被取消
+    def close(self):
+        with self._cond:
+            self._closed = True
+            pending, self._heap = self._heap, []
+            self._cond.notify_all()
+        for _, _, operation in pending: operation["future"].cancel()
+        self._executor.shutdown(wait=False)
+
+# OperationTracker 的 asyncio 版本，poll(progress_path, uuid) 为协程，每个操作由一个任务按同样的退避规则轮询
+## track() 返回结果为最终状态的 Task，任务属于调用 track() 时的事件循环
+class AsyncOperationTracker(object):
+    RUNNING_STATES = OperationTracker.RUNNING_STATES
+    TIMEOUT = OperationTracker.TIMEOUT
+
+    def __init__(self, poll, initial_delay=0.2, max_delay=10, multiplier=2, jitter=0.2, timeout=600):
+        self._poll = poll
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.timeout = timeout
+        self._tasks = set()
+        self._closed = False
+
+    _next_delay = OperationTracker._next_delay
+
+    # 跟踪一个操作，返回 Task；callback(state) 在操作完成时调用
+    def track(self, progress_path, uuid, callback=None) -> asyncio.Task:
+        if self._closed: raise RuntimeError("tracker is closed")
+        task = asyncio.ensure_future(self._watch(progress_path, uuid))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        if callback is not None: task.add_done_callback(lambda t: t.cancelled() or callback(t.result()))
+        return task
+
+    # 轮询一个操作直到进入最终状态或超时
+    async def _watch(self, progress_path, uuid) -> str:
+        delay = self.initial_delay
+        deadline = time.monotonic() + self.timeout
+        while True:
+            await asyncio.sleep(delay)
+            state = await self._poll(progress_path, uuid)
+            if state not in self.RUNNING_STATES: return state
+            if time.monotonic() >= deadline: return self.TIMEOUT
+            delay = self._next_delay(delay)
+
+    # 等待所有 Task 完成，返回结果列表（顺序与传入一致）；超时不会取消这些 Task
+    async def wait_all(self, tasks, timeout=None) -> list:
+        return await asyncio.wait_for(asyncio.shield(asyncio.gather(*tasks)), timeout)
+
+    # 停止跟踪，未完成的操作被取消
+    def close(self):
+        self._closed = True
+        for task in list(self._tasks): task.cancel()
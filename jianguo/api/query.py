@@ -0,0 +1,121 @@
+import bisect
+
+# 范围条件，lower <= value < upper，为 None 的一端不限制
+class Range(object):
+    def __init__(self, lower=None, upper=None):
+        self.lower = lower
+        self.upper = upper
+
+    def __call__(self, value) -> bool:
+        if self.lower is not None and value < self.lower: return False
+        if self.upper is not None and value >= self.upper: return False
+        return True
+
+# 前缀条件，用于 path、name 等字符串
+class Prefix(object):
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    def __call__(self, value) -> bool:
+        return isinstance(value, str) and value.startswith(self.prefix)
+
+# 判断项目的 key 是否满足单个条件，可调用对象（包括 Range 和 Prefix）逐项调用，其他为等值比较
+def _check(item, key, condition) -> bool:
+    if key not in item: return False
+    if callable(condition): return condition(item[key])
+    return item[key] == condition
+
+# 由条件生成判断单个项目的函数，规则同 ResultSet.filter；逐项判断，不建立索引，适用于只查询一次的列表
+## 非贪婪时任一条件不满足即为 False，贪婪时任一条件满足即为 True
+def matcher(is_greedy=False, **kwargs):
+    conditions = list(kwargs.items())
+
+    def is_match(item) -> bool:
+        for key, condition in conditions:
+            if _check(item, key, condition) == is_greedy: return is_greedy
+        return not is_greedy
+    return is_match
+
+# 带索引的结果集，索引在首次按某键查询时建立
+## 等值条件使用哈希索引，Range 和 Prefix 使用有序索引二分查找，其他可调用对象逐项判断
+class ResultSet(object):
+    def __init__(self, items):
+        self.items = items
+        self._hash_indexes = {}
+        self._sorted_indexes = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    # 建立 {值: [位置]} 哈希索引，值不可哈希时返回 None
+    def _hash_index(self, key) -> dict:
+        if key not in self._hash_indexes:
+            index = {}
+            try:
+                for pos, item in enumerate(self.items):
+                    if key in item: index.setdefault(item[key], []).append(pos)
+            except TypeError:
+                index = None
+            self._hash_indexes[key] = index
+        return self._hash_indexes[key]
+
+    # 建立按值排序的 ([值], [位置]) 索引，值之间无法比较时返回 None
+    def _sorted_index(self, key) -> tuple:
+        if key not in self._sorted_indexes:
+            try:
+                pairs = sorted((item[key], pos) for pos, item in enumerate(self.items) if key in item and item[key] is not None)
+                index = [value for value, _ in pairs], [pos for _, pos in pairs]
+            except TypeError:
+                index = None
+            self._sorted_indexes[key] = index
+        return self._sorted_indexes[key]
+
+    # 获取满足单个条件的位置集合
+    def _positions(self, key, condition) -> set:
+        if isinstance(condition, Range):
+            index = self._sorted_index(key)
+            if index is not None:
+                values, positions = index
+                start = 0 if condition.lower is None else bisect.bisect_left(values, condition.lower)
+                end = len(values) if condition.upper is None else bisect.bisect_left(values, condition.upper)
+                return set(positions[start:end])
+        elif isinstance(condition, Prefix):
+            index = self._sorted_index(key)
+            if index is not None and (index[0] == [] or isinstance(index[0][0], str)):
+                values, positions = index
+                start = bisect.bisect_left(values, condition.prefix)
+                end = start
+                while end < len(values) and isinstance(values[end], str) and values[end].startswith(condition.prefix): end += 1
+                return set(positions[start:end])
+        elif not callable(condition):
+            try:
+                index = self._hash_index(key)
+                if index is not None: return set(index.get(condition, []))
+            except TypeError:
+                pass
+
+        ## 无法使用索引时逐项判断
+        return {pos for pos, item in enumerate(self.items) if _check(item, key, condition)}
+
+    # 按条件筛选，返回惰性迭代器，顺序与原列表一致
+    ## 默认所有条件都满足（AND），is_greedy 为 True 时满足任一条件即可（OR）
+    def filter(self, is_greedy=False, **kwargs):
+        if kwargs == {}:
+            if is_greedy: return iter(())
+            return iter(self.items)
+
+        if is_greedy:
+            matched = set()
+            for key, condition in kwargs.items(): matched |= self._positions(key, condition)
+        else:
+            matched = None
+            for key, condition in kwargs.items():
+                positions = self._positions(key, condition)
+                matched = positions if matched is None else matched & positions
+                if matched == set(): break
+
+        return (self.items[pos] for pos in sorted(matched))
+
+    # 返回第一个满足条件的项目，没有时返回 None
+    def first(self, is_greedy=False, **kwargs) -> dict:
+        return next(self.filter(is_greedy, **kwargs), None)
@@ -0,0 +1,251 @@
+import time
+import random
+import asyncio
+import socket
+import threading
+import http.client
+import urllib.error
+from collections import deque
+from jianguo.api.status import NETWORK_ERROR, OFFICIAL_LIMITED
+
+# 重试后仍然失败的请求，code 为 NETWORK_ERROR 或 OFFICIAL_LIMITED
+class RequestError(Exception):
+    def __init__(self, code, url, cause):
+        super().__init__("request to " + url + " failed (code " + str(code) + "): " + repr(cause))
+        self.code = code
+        self.url = url
+        self.cause = cause
+
+# 令牌桶，每秒补充 rate 个令牌，最多积累 burst 个
+class TokenBucket(object):
+    def __init__(self, rate, burst=None):
+        if rate <= 0 or (burst is not None and burst < 1): raise ValueError("rate must be > 0 and burst >= 1")
+        self.rate = rate
+        self.burst = burst or max(1, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    # 取得一个令牌，不足时等待
+    def acquire(self):
+        while True:
+            wait = self.try_acquire()
+            if wait == 0: return
+            time.sleep(wait)
+
+    # 尝试取得一个令牌，成功时返回 0，否则返回需要等待的秒数
+    def try_acquire(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+# 自适应并发限制（AIMD）：请求成功时并发上限缓慢增加，服务端限流时成倍减少
+class AdaptiveLimiter(object):
+    def __init__(self, initial=8, minimum=1, maximum=64, increase=1.0, decrease=0.5, cooldown=1.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.inflight = 0
+        self.throttled = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    # 设置上限及其调整范围，上限提高时唤醒等待中的线程
+    def configure(self, initial, minimum, maximum):
+        with self._cond:
+            self.limit, self.minimum, self.maximum = float(initial), minimum, maximum
+            self._cond.notify_all()
+
+    def acquire(self):
+        with self._cond:
+            while self.inflight >= int(self.limit): self._cond.wait()
+            self.inflight += 1
+
+    def release(self):
+        with self._cond:
+            self.inflight -= 1
+            self._cond.notify()
+
+    # 每个成功的请求使上限增加 increase / limit，约等于每轮增加 increase
+    def on_success(self):
+        with self._cond:
+            previous = int(self.limit)
+            self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+            if int(self.limit) > previous: self._cond.notify_all()
+
+    # 限流时上限乘以 decrease，cooldown 秒内的多次限流只计一次
+    def on_throttle(self):
+        with self._cond:
+            self.throttled += 1
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown: return
+            self._last_decrease = now
+            self.limit = max(self.minimum, self.limit * self.decrease)
+
+# 请求调度器：按接口类别限速，限制并发并自动调整，对临时性错误进行退避重试
+## 限流（429、503）对所有请求重试；网络错误和 5xx 只对 GET 请求重试，避免重复执行写操作
+class RequestScheduler(object):
+    THROTTLE_STATUS = (429, 503)
+    TRANSIENT_STATUS = (500, 502, 504)
+    TRANSIENT_ERRORS = (ConnectionError, socket.timeout, socket.gaierror, http.client.RemoteDisconnected, http.client.IncompleteRead)
+    LIST_ENDPOINTS = ("/d/ajax/browse", "/d/ajax/listTrashDir", "/d/ajax/getEvents", "/d/ajax/pubops/list", "/d/ajax/versions")
+
+    def __init__(self, max_retries=4, backoff=0.5, max_backoff=30, limiter=None):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limiter = limiter or AdaptiveLimiter()
+        self.on_retry = None
+        self._buckets = {}
+
+    # 接口类别：list（列表类 GET）、read（其他 GET）、write（POST）
+    def classify(self, method, url) -> str:
+        if method != "GET": return "write"
+        path = url.split("://", 1)[-1]
+        path = path[path.find("/"):] if "/" in path else "/"
+        if path.startswith(self.LIST_ENDPOINTS): return "list"
+        return "read"
+
+    # 设置某类接口的速率（每秒请求数），rate 为 None 时不限速
+    def set_rate(self, endpoint_class, rate, burst=None):
+        if rate is None: self._buckets.pop(endpoint_class, None)
+        else: self._buckets[endpoint_class] = TokenBucket(rate, burst)
+
+    # 设置并发上限及其调整范围
+    def set_concurrency(self, initial, minimum, maximum):
+        self.limiter.configure(initial, minimum, maximum)
+
+    # 判断错误类型，返回 "throttle"、"transient" 或 None（不重试）
+    def _error_kind(self, method, error) -> str:
+        if isinstance(error, urllib.error.HTTPError):
+            if error.code in self.THROTTLE_STATUS: return "throttle"
+            if error.code in self.TRANSIENT_STATUS and method == "GET": return "transient"
+            return None
+        ## 只重试连接和超时错误；InvalidURL 等客户端错误重试也不会成功
+        if isinstance(error, urllib.error.URLError): error = error.reason
+        if isinstance(error, self.TRANSIENT_ERRORS):
+            if method == "GET": return "transient"
+        return None
+
+    # 退避时间，优先使用服务端的 Retry-After
+    def _delay(self, attempt, error) -> float:
+        headers = getattr(error, "headers", None)
+        retry_after = headers.get("Retry-After") if headers is not None else None
+        if retry_after is not None and retry_after.strip().isdigit(): return min(self.max_backoff, float(retry_after))
+        delay = min(self.max_backoff, self.backoff * (2 ** (attempt - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    # 在限速和并发限制下执行 send()，失败时按错误类型重试
+    def execute(self, method, url, send):
+        bucket = self._buckets.get(self.classify(method, url))
+        attempt = 0
+        while True:
+            if bucket is not None: bucket.acquire()
+            self.limiter.acquire()
+            try:
+                result = send()
+            except Exception as e:
+                self.limiter.release()
+                kind = self._error_kind(method, e)
+                if kind is None: raise
+                if kind == "throttle": self.limiter.on_throttle()
+                if attempt >= self.max_retries:
+                    raise RequestError(OFFICIAL_LIMITED if kind == "throttle" else NETWORK_ERROR, url, e) from e
+
+                attempt += 1
+                if self.on_retry is not None: self.on_retry(url)
+                time.sleep(self._delay(attempt, e))
+                continue
+
+            self.limiter.release()
+            self.limiter.on_success()
+            return result
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limiter.limit,
+            "inflight": self.limiter.inflight,
+            "throttled": self.limiter.throttled,
+            "rates": {name: bucket.rate for name, bucket in self._buckets.items()},
+        }
+
+# RequestScheduler 的 asyncio 版本，execute 为协程，send 为返回协程的函数
+## 限速、重试和 AIMD 规则相同；等待令牌和并发名额时让出事件循环而不是阻塞线程，只能在同一个事件循环中使用
+## 等待并发名额的协程按先后排队，名额释放时直接交给队首，避免大量协程同时被唤醒
+class AsyncRequestScheduler(RequestScheduler):
+    def __init__(self, max_retries=4, backoff=0.5, max_backoff=30, limiter=None):
+        super().__init__(max_retries, backoff, max_backoff, limiter)
+        self._waiters = deque()
+
+    async def _acquire(self):
+        limiter = self.limiter
+        if not self._waiters and limiter.inflight < int(limiter.limit):
+            limiter.inflight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            ## 已经分到名额后才被取消时归还名额
+            if waiter.done() and not waiter.cancelled(): self._release()
+            raise
+
+    def _release(self):
+        self.limiter.inflight -= 1
+        self._wake()
+
+    # 上限提高后立即把空出的名额交给排队的协程
+    def set_concurrency(self, initial, minimum, maximum):
+        super().set_concurrency(initial, minimum, maximum)
+        self._wake()
+
+    # 按当前上限把空出的名额依次交给排队的协程
+    def _wake(self):
+        limiter = self.limiter
+        while self._waiters and limiter.inflight < int(limiter.limit):
+            waiter = self._waiters.popleft()
+            if waiter.done(): continue
+            limiter.inflight += 1
+            waiter.set_result(None)
+
+    async def execute(self, method, url, send):
+        bucket = self._buckets.get(self.classify(method, url))
+        attempt = 0
+        while True:
+            if bucket is not None:
+                wait = bucket.try_acquire()
+                while wait > 0:
+                    await asyncio.sleep(wait)
+                    wait = bucket.try_acquire()
+            await self._acquire()
+            try:
+                result = await send()
+            except Exception as e:
+                self._release()
+                kind = self._error_kind(method, e)
+                if kind is None: raise
+                if kind == "throttle": self.limiter.on_throttle()
+                if attempt >= self.max_retries:
+                    raise RequestError(OFFICIAL_LIMITED if kind == "throttle" else NETWORK_ERROR, url, e) from e
+
+                attempt += 1
+                if self.on_retry is not None: self.on_retry(url)
+                await asyncio.sleep(self._delay(attempt, e))
+                continue
+            except BaseException:
+                self._release()
+                raise
+
+            self.limiter.on_success()
+            self._release()
+            return result
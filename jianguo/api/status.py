@@ -0,0 +1,14 @@
+# 状态码，Jianguo 及各模块共用同一份定义
+FAILED = -1
+SUCCESS = 0
+ID_ERROR = 1
+PASSWORD_ERROR = 2
+LACK_PASSWORD = 3
+ZIP_ERROR = 4
+MKDIR_ERROR = 5
+URL_INVALID = 6
+FILE_CANCELLED = 7
+PATH_ERROR = 8
+NETWORK_ERROR = 9
+CAPTCHA_ERROR = 10
+OFFICIAL_LIMITED = 11
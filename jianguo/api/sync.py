@@ -0,0 +1,261 @@
+import os
+import json
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from jianguo.api import status
+
+# 本地镜像同步，只传输变化的部分
+## direction 为 "download" 时以远端为准更新本地，为 "upload" 时以本地为准更新远端
+## 同步状态保存在本地目录下的 MANIFEST_NAME 中；下载方向另外保存操作历史水位 CHECKPOINT_NAME，
+## 远端没有新事件且本地文件未变化时，不需要再列出远端目录
+class SyncEngine(object):
+    MANIFEST_NAME = ".jianguo-sync.json"
+    CHECKPOINT_NAME = ".jianguo-sync.events.json"
+    ## 列表项中可以确定内容或文件身份的字段，下载方向只依据这些字段判断改名；rev 只是单个条目的版本号，不能用来判断
+    IDENTITY_KEYS = ("hash", "sha1", "md5", "fileId")
+
+    def __init__(self, client, remote_path, local_dir, direction="download", max_workers=4):
+        if direction not in ("download", "upload"): raise ValueError("direction must be 'download' or 'upload'")
+        self._client = client
+        self.remote_path = remote_path.rstrip("/")
+        self.local_dir = local_dir
+        self.direction = direction
+        self.max_workers = max_workers
+        self._manifest_path = os.path.join(local_dir, self.MANIFEST_NAME)
+        self._checkpoint_path = os.path.join(local_dir, self.CHECKPOINT_NAME)
+
+    # 读取同步状态，远端路径或方向不一致时视为首次同步
+    def _load_manifest(self) -> dict:
+        if not os.path.exists(self._manifest_path): return None
+        with open(self._manifest_path, "r") as f:
+            manifest = json.load(f)
+        if manifest.get("remote") != self.remote_path or manifest.get("direction") != self.direction: return None
+        return manifest
+
+    def _save_manifest(self, files, dirs):
+        manifest = {"remote": self.remote_path, "direction": self.direction, "files": files, "dirs": sorted(dirs)}
+        with open(self._manifest_path + ".tmp", "w") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(self._manifest_path + ".tmp", self._manifest_path)
+
+    # 扫描本地目录，返回 ({相对路径: {"size", "mtime"}}, {相对目录})
+    def _scan_local(self) -> tuple:
+        files, dirs = {}, set()
+        for root, dir_names, file_names in os.walk(self.local_dir):
+            rel_root = os.path.relpath(root, self.local_dir).replace(os.sep, "/")
+            if rel_root == ".": rel_root = ""
+            for name in dir_names: dirs.add((rel_root + "/" + name).lstrip("/"))
+            for name in file_names:
+                rel = (rel_root + "/" + name).lstrip("/")
+                if rel in (self.MANIFEST_NAME, self.CHECKPOINT_NAME) or rel.endswith(".part") or rel.endswith(".part.json") or rel.endswith(".tmp"): continue
+                stat = os.stat(os.path.join(root, name))
+                files[rel] = {"size": stat.st_size, "mtime": stat.st_mtime}
+        return files, dirs
+
+    # 遍历远端目录树，返回 ({相对路径: 列表项}, {相对目录})
+    def _scan_remote(self) -> tuple:
+        files, dirs = {}, set()
+        for dir_path, dir_items, file_items in self._client.walk(self.remote_path, max_workers=self.max_workers):
+            rel_root = dir_path[len(self.remote_path):].strip("/")
+            for item in dir_items: dirs.add((rel_root + "/" + item["name"]).lstrip("/"))
+            for item in file_items: files[(rel_root + "/" + item["name"]).lstrip("/")] = item
+        return files, dirs
+
+    # 列表项的内容摘要或文件标识，如 "hash:..."，没有时返回 None
+    def _identity(self, item) -> str:
+        for key in self.IDENTITY_KEYS:
+            if item.get(key) is not None: return key + ":" + str(item[key])
+        return None
+
+    def _local(self, rel) -> str:
+        return os.path.join(self.local_dir, *rel.split("/"))
+
+    def _remote(self, rel) -> str:
+        return self.remote_path + "/" + rel
+
+    # 检查远端自上次同步后是否有新的操作历史，新的水位先写入临时文件，同步成功后再生效
+    def _has_remote_changes(self) -> bool:
+        pending_path = self._checkpoint_path + ".pending"
+        if os.path.exists(self._checkpoint_path): shutil.copyfile(self._checkpoint_path, pending_path)
+        elif os.path.exists(pending_path): os.remove(pending_path)
+
+        ## 首次同步只需获取第一页来确定水位
+        page_limit = None if os.path.exists(pending_path) else 1
+        events = list(self._client.iter_events(self.remote_path, page_limit=page_limit, checkpoint=pending_path))
+        return events != [] or not os.path.exists(self._checkpoint_path)
+
+    def _commit_checkpoint(self):
+        pending_path = self._checkpoint_path + ".pending"
+        if os.path.exists(pending_path): os.replace(pending_path, self._checkpoint_path)
+
+    # 在线程池中执行 [(动作, 相对路径, 函数, 参数)]，返回 (成功列表, 失败字典)
+    def _execute(self, jobs) -> tuple:
+        done, failed = [], {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [(action, rel, executor.submit(func, *args)) for action, rel, func, args in jobs]
+            for action, rel, future in futures:
+                try:
+                    future.result()
+                    done.append((action, rel))
+                except Exception as e:
+                    failed[rel] = action + ": " + repr(e)
+        return done, failed
+
+    # 生成远端到本地的同步计划
+    def plan_download(self, manifest, remote_files, remote_dirs, local_files) -> dict:
+        known = manifest["files"] if manifest else {}
+        plan = {"mkdir": sorted(remote_dirs - set(self._manifest_dirs(manifest))), "download": [], "rename": [], "delete": [], "rmdir": []}
+
+        for rel, item in remote_files.items():
+            record, local = known.get(rel), local_files.get(rel)
+            if record is None or local is None or record.get("rev") != item.get("rev") or record["local_size"] != local["size"] or record["local_mtime"] != local["mtime"]:
+                plan["download"].append(rel)
+
+        ## 远端新出现、且与某个已消失的文件内容摘要（或文件标识）和大小相同的，视为改名，直接在本地移动
+        ## 列表项没有这类字段时总是重新下载；本地副本在上次同步后被改动过的也不移动
+        missing = {}
+        for rel, record in known.items():
+            local = local_files.get(rel)
+            if rel in remote_files or local is None or record.get("identity") is None: continue
+            if record["local_size"] != local["size"] or record["local_mtime"] != local["mtime"]: continue
+            missing[(record["identity"], record.get("size"))] = rel
+        for rel in list(plan["download"]):
+            item = remote_files[rel]
+            identity = self._identity(item)
+            if identity is None or rel in known: continue
+            source = missing.pop((identity, item.get("size")), None)
+            if source is not None:
+                plan["download"].remove(rel)
+                plan["rename"].append((source, rel))
+
+        renamed = {source for source, _ in plan["rename"]}
+        plan["delete"] = sorted(rel for rel in known if rel not in remote_files and rel not in renamed)
+        plan["rmdir"] = sorted((set(self._manifest_dirs(manifest)) - remote_dirs), reverse=True)
+        return plan
+
+    # 生成本地到远端的同步计划
+    def plan_upload(self, manifest, local_files, local_dirs) -> dict:
+        known = manifest["files"] if manifest else {}
+        plan = {"mkdir": sorted(local_dirs - set(self._manifest_dirs(manifest))), "upload": [], "rename": [], "delete": [], "rmdir": []}
+
+        for rel, local in local_files.items():
+            record = known.get(rel)
+            if record is None or record["local_size"] != local["size"] or record["local_mtime"] != local["mtime"]:
+                plan["upload"].append(rel)
+
+        ## 同一目录下新出现、且与某个已消失的文件大小和修改时间相同的，视为改名
+        missing = {(rel.rsplit("/", 1)[0] if "/" in rel else "", record["local_size"], record["local_mtime"]): rel for rel, record in known.items() if rel not in local_files}
+        for rel in list(plan["upload"]):
+            if rel in known: continue
+            local = local_files[rel]
+            source = missing.pop((rel.rsplit("/", 1)[0] if "/" in rel else "", local["size"], local["mtime"]), None)
+            if source is not None:
+                plan["upload"].remove(rel)
+                plan["rename"].append((source, rel))
+
+        renamed = {source for source, _ in plan["rename"]}
+        plan["delete"] = sorted(rel for rel in known if rel not in local_files and rel not in renamed)
+        plan["rmdir"] = sorted(set(self._manifest_dirs(manifest)) - local_dirs, reverse=True)
+        return plan
+
+    def _manifest_dirs(self, manifest) -> list:
+        return manifest["dirs"] if manifest else []
+
+    # 执行下载方向的同步
+    def _run_download(self, manifest, dry_run) -> dict:
+        local_files, _ = self._scan_local()
+        is_remote_changed = self._has_remote_changes()
+        if manifest is not None and not is_remote_changed:
+            ## 远端无变化时只需处理本地被改动或删除的文件
+            plan = {"mkdir": [], "download": [], "rename": [], "delete": [], "rmdir": []}
+            for rel, record in manifest["files"].items():
+                local = local_files.get(rel)
+                if local is None or record["local_size"] != local["size"] or record["local_mtime"] != local["mtime"]:
+                    plan["download"].append(rel)
+            if dry_run or plan["download"] == []:
+                return {"unchanged": plan["download"] == [], "plan": plan, "failed": {}}
+            remote_files = manifest["files"]
+            remote_dirs = set(manifest["dirs"])
+        else:
+            remote_files, remote_dirs = self._scan_remote()
+            plan = self.plan_download(manifest, remote_files, remote_dirs, local_files)
+            if dry_run: return {"unchanged": False, "plan": plan, "failed": {}}
+
+        for rel in plan["mkdir"]: os.makedirs(self._local(rel), exist_ok=True)
+        for source, rel in plan["rename"]:
+            os.makedirs(os.path.dirname(self._local(rel)), exist_ok=True)
+            os.replace(self._local(source), self._local(rel))
+        for rel in plan["delete"]:
+            if os.path.exists(self._local(rel)): os.remove(self._local(rel))
+        for rel in plan["rmdir"]:
+            if os.path.isdir(self._local(rel)) and os.listdir(self._local(rel)) == []: os.rmdir(self._local(rel))
+
+        jobs = []
+        for rel in plan["download"]:
+            os.makedirs(os.path.dirname(self._local(rel)), exist_ok=True)
+            jobs.append(("download", rel, self._client.download, (self._remote(rel), self._local(rel))))
+        done, failed = self._execute(jobs)
+
+        ## 记录远端 rev 以及下载后本地文件的大小和修改时间
+        files = {}
+        known = manifest["files"] if manifest else {}
+        succeeded = {rel for _, rel in done} | {rel for _, rel in plan["rename"]}
+        for rel, item in remote_files.items():
+            if rel in failed: continue
+            if rel not in succeeded and rel not in known: continue
+            stat = os.stat(self._local(rel))
+            files[rel] = {"rev": item.get("rev"), "identity": self._identity(item), "size": item.get("size"), "mtime": item.get("mtime"), "local_size": stat.st_size, "local_mtime": stat.st_mtime}
+        self._save_manifest(files, remote_dirs)
+        if failed == {}: self._commit_checkpoint()
+        return {"unchanged": False, "plan": plan, "failed": failed}
+
+    # 执行上传方向的同步
+    def _run_upload(self, manifest, dry_run) -> dict:
+        local_files, local_dirs = self._scan_local()
+        plan = self.plan_upload(manifest, local_files, local_dirs)
+        is_unchanged = all(plan[key] == [] for key in plan)
+        if dry_run or is_unchanged: return {"unchanged": is_unchanged, "plan": plan, "failed": {}}
+
+        failed = {}
+        for rel in plan["mkdir"]:
+            try:
+                self._client.creat_dir(self._remote(rel))
+            except Exception as e:
+                failed[rel] = "mkdir: " + repr(e)
+
+        jobs = [("rename", rel, self._client.rename, (self._remote(source), rel.rsplit("/", 1)[-1])) for source, rel in plan["rename"]]
+        done, rename_failed = self._execute(jobs)
+        failed.update(rename_failed)
+
+        if plan["upload"]:
+            uploads = self._client.upload_many([(self._local(rel), self._remote(rel)) for rel in plan["upload"]], max_workers=self.max_workers)
+            for rel in plan["upload"]:
+                if uploads.get(self._remote(rel)) != status.SUCCESS: failed[rel] = "upload: " + str(uploads.get(self._remote(rel)))
+
+        ## 先删除文件再删除目录，已不存在的项目（PATH_ERROR）视为成功
+        for key in ("delete", "rmdir"):
+            if plan[key] == []: continue
+            deletes = self._client.delete_many([self._remote(rel) for rel in plan[key]], max_workers=self.max_workers)
+            for rel in plan[key]:
+                if deletes.get(self._remote(rel)) not in (status.SUCCESS, status.PATH_ERROR): failed[rel] = key + ": " + str(deletes.get(self._remote(rel)))
+
+        ## 失败的项目不写入状态，下次同步时重试
+        files = {}
+        known = manifest["files"] if manifest else {}
+        renamed = {rel: source for source, rel in plan["rename"]}
+        for rel, local in local_files.items():
+            if rel in failed: continue
+            if rel in renamed or rel in plan["upload"] or rel in known:
+                files[rel] = {"local_size": local["size"], "local_mtime": local["mtime"]}
+        for rel in plan["delete"]:
+            if rel in failed: files[rel] = known[rel]
+        dirs = (local_dirs - {rel for rel in plan["mkdir"] if rel in failed}) | {rel for rel in plan["rmdir"] if rel in failed}
+        self._save_manifest(files, dirs)
+        return {"unchanged": False, "plan": plan, "failed": failed}
+
+    # 执行同步，返回 {"unchanged": 是否无需变更, "plan": 同步计划, "failed": {相对路径: 错误}}，dry_run 时只返回计划
+    def run(self, dry_run=False) -> dict:
+        os.makedirs(self.local_dir, exist_ok=True)
+        manifest = self._load_manifest()
+        if self.direction == "download": return self._run_download(manifest, dry_run)
+        return self._run_upload(manifest, dry_run)
@@ -0,0 +1,252 @@
+import zlib
+import socket
+import gzip
+import threading
+import http.client
+import urllib.error
+import urllib.parse
+import urllib.request
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+
+# 请求结果
+class Response(object):
+    def __init__(self, url, status, headers, body):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def text(self, encoding="utf-8") -> str:
+        return self.body.decode(encoding)
+
+# 流式请求结果，需逐块 read() 读取，使用后 close() 归还连接
+class StreamResponse(object):
+    def __init__(self, url, status, headers, raw, release=None):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self._raw = raw
+        self._release = release
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def read(self, amt=None) -> bytes:
+        return self._raw.read(amt)
+
+    # 按 chunk_size 逐块读取，直到响应结束
+    def iter_chunks(self, chunk_size=65536):
+        while True:
+            chunk = self._raw.read(chunk_size)
+            if not chunk: break
+            yield chunk
+
+    def close(self):
+        if self._release is None:
+            self._raw.close()
+            return
+        release, self._release = self._release, None
+        release()
+
+# 传输层基类，子类实现 request(method, url, headers, body) 并返回 Response
+## open(method, url, headers, body) 返回不解压、不预读内容的 StreamResponse，用于下载等大响应
+## on_retry(url) 在传输层自行重发请求时调用
+class Transport(object):
+    on_retry = None
+
+    def request(self, method, url, headers=None, body=None) -> Response:
+        raise NotImplementedError
+
+    def open(self, method, url, headers=None, body=None) -> StreamResponse:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+# 基于 urllib 的传输层，每次请求新建连接（原有行为）
+class UrllibTransport(Transport):
+    def __init__(self, timeout=None):
+        self._timeout = timeout
+
+    def request(self, method, url, headers=None, body=None) -> Response:
+        request = urllib.request.Request(url=url, headers=headers or {}, data=body, method=method)
+        if self._timeout is None: response = urllib.request.urlopen(request)
+        else: response = urllib.request.urlopen(request, timeout=self._timeout)
+
+        with response:
+            return Response(response.geturl(), response.status, response.headers, response.read())
+
+    def open(self, method, url, headers=None, body=None) -> StreamResponse:
+        request = urllib.request.Request(url=url, headers=headers or {}, data=body, method=method)
+        if self._timeout is None: response = urllib.request.urlopen(request)
+        else: response = urllib.request.urlopen(request, timeout=self._timeout)
+
+        return StreamResponse(response.geturl(), response.status, response.headers, response)
+
+# 持久连接池传输层，每个 host 保持有限数量的 keep-alive 连接，并支持 gzip/deflate 压缩
+class PooledTransport(Transport):
+    def __init__(self, pool_size=8, connect_timeout=10, read_timeout=60, compress=True):
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.compress = compress
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._slots = {}
+
+    # 连接池的键为 (scheme, host, port)
+    def _pool_key(self, parts) -> tuple:
+        port = parts.port
+        if port is None: port = 443 if parts.scheme == "https" else 80
+        return parts.scheme, parts.hostname, port
+
+    def _new_connection(self, key):
+        scheme, host, port = key
+        if scheme == "https": conn = http.client.HTTPSConnection(host, port, timeout=self.connect_timeout)
+        else: conn = http.client.HTTPConnection(host, port, timeout=self.connect_timeout)
+
+        ## 建立连接时使用 connect_timeout，之后的读写使用 read_timeout；
+        ## 关闭 Nagle 算法，避免持久连接上请求头和请求体分开发送时等待延迟确认
+        conn.connect()
+        conn.sock.settimeout(self.read_timeout)
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conn
+
+    # 取出一个连接，返回 (conn, is_reused)，池满时阻塞等待
+    def _acquire(self, key) -> tuple:
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = threading.BoundedSemaphore(self.pool_size)
+        slot.acquire()
+
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle: return idle.pop(), True
+        try:
+            return self._new_connection(key), False
+        except BaseException:
+            ## 任何异常（包括 KeyboardInterrupt）都要先归还名额再抛出
+            slot.release()
+            raise
+
+    # 归还连接，不可复用的连接直接关闭
+    def _release(self, key, conn, is_reusable):
+        if is_reusable:
+            with self._lock:
+                self._idle.setdefault(key, []).append(conn)
+        else:
+            conn.close()
+        self._slots[key].release()
+
+    # 根据 Content-Encoding 解压响应内容
+    def _decode_body(self, body, encoding) -> bytes:
+        encoding = (encoding or "").strip().lower()
+        if encoding == "gzip":
+            return gzip.decompress(body)
+        if encoding == "deflate":
+            ## 部分服务端返回不带 zlib 头的原始 deflate 数据
+            try:
+                return zlib.decompress(body)
+            except zlib.error:
+                return zlib.decompress(body, -zlib.MAX_WBITS)
+        return body
+
+    # 在池中的连接上发送一次请求并完整读取响应
+    def _send(self, method, parts, headers, body) -> tuple:
+        response, release = self._send_stream(method, parts, headers, body)
+        try:
+            data = response.read()
+        finally:
+            release()
+        return response, data
+
+    def request(self, method, url, headers=None, body=None) -> Response:
+        headers = dict(headers or {})
+        if self.compress: headers["Accept-Encoding"] = "gzip, deflate"
+
+        for redirect in range(MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            response, data = self._send(method, parts, headers, body)
+
+            if response.status in REDIRECT_CODES and response.getheader("Location"):
+                url = urllib.parse.urljoin(url, response.getheader("Location"))
+                ## 与 urllib 保持一致，除 307/308 外重定向后均改为 GET
+                if response.status not in (307, 308):
+                    method, body = "GET", None
+                    headers.pop("Content-Type", None)
+                continue
+
+            data = self._decode_body(data, response.getheader("Content-Encoding"))
+            if response.status >= 400:
+                raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+            return Response(url, response.status, response.headers, data)
+
+        raise urllib.error.HTTPError(url, response.status, "Too many redirects", response.headers, None)
+
+    # 在池中的连接上发送一次请求，只读取响应头，返回 (response, release)，复用的连接失效时重连一次
+    def _send_stream(self, method, parts, headers, body) -> tuple:
+        key = self._pool_key(parts)
+        target = parts.path or "/"
+        if parts.query: target += "?" + parts.query
+
+        for attempt in range(2):
+            conn, is_reused = self._acquire(key)
+            try:
+                conn.request(method, target, body=body, headers=headers)
+                response = conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self._release(key, conn, False)
+                if is_reused and attempt == 0:
+                    if hasattr(body, "seek"): body.seek(0) ### 流式请求体需回到开头重发
+                    if self.on_retry is not None: self.on_retry(urllib.parse.urlunsplit(parts))
+                    continue
+                raise
+            except BaseException:
+                ## 其他异常（包括 KeyboardInterrupt）不重试，关闭连接后抛出
+                self._release(key, conn, False)
+                raise
+
+            ## 只有完整读取过的响应，其连接才能复用
+            def release(key=key, conn=conn, response=response):
+                is_finished = response.isclosed()
+                if not is_finished: response.close()
+                self._release(key, conn, is_finished and not response.will_close)
+
+            return response, release
+
+    def open(self, method, url, headers=None, body=None) -> StreamResponse:
+        headers = dict(headers or {})
+
+        for redirect in range(MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            response, release = self._send_stream(method, parts, headers, body)
+
+            if response.status in REDIRECT_CODES and response.getheader("Location"):
+                response.read()
+                release()
+                url = urllib.parse.urljoin(url, response.getheader("Location"))
+                if response.status not in (307, 308):
+                    method, body = "GET", None
+                    headers.pop("Content-Type", None)
+                continue
+
+            if response.status >= 400:
+                release()
+                raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+            return StreamResponse(url, response.status, response.headers, response, release)
+
+        release()
+        raise urllib.error.HTTPError(url, response.status, "Too many redirects", response.headers, None)
+
+    # 关闭所有空闲连接
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns: conn.close()
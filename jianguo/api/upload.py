@@ -0,0 +1,111 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from jianguo.api import status
+from jianguo.api.ratelimit import RequestError
+
+# 文件中 [offset, offset + length) 区间的只读视图，用于流式上传，避免整体读入内存
+class FileSegment(object):
+    def __init__(self, local_path, offset=0, length=None):
+        self._file = open(local_path, "rb")
+        self._offset = offset
+        if length is None: length = os.path.getsize(local_path) - offset
+        self.length = length
+        self.seek(0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.length
+
+    def read(self, amt=-1) -> bytes:
+        remaining = self._offset + self.length - self._file.tell()
+        if amt is None or amt < 0 or amt > remaining: amt = remaining
+        return self._file.read(amt)
+
+    # 位置相对于区间起点，连接失效重发时回到开头
+    def seek(self, pos, whence=0) -> int:
+        self._file.seek(self._offset + pos)
+        return pos
+
+    def tell(self) -> int:
+        return self._file.tell() - self._offset
+
+    def close(self):
+        self._file.close()
+
+# 并发上传器，同时上传中的字节数不超过 max_inflight_bytes
+## send(remote_path, body, length) 负责实际发送并返回状态码；超过 max_size 的文件按 on_oversize 拒绝或拆分
+class Uploader(object):
+    SUCCESS = status.SUCCESS
+    FAILED = status.FAILED
+
+    def __init__(self, send, max_size, max_workers=4, max_inflight_bytes=256 << 20):
+        self._send = send
+        self.max_size = max_size
+        self.max_workers = max_workers
+        self.max_inflight_bytes = max_inflight_bytes
+        self._inflight = 0
+        self._cond = threading.Condition()
+
+    # 生成上传计划 [(remote_path, offset, length)]，超限且不拆分时返回 None
+    ## 拆分后的分卷依次命名为 remote_path.001、remote_path.002 ...
+    def plan(self, local_path, remote_path, on_oversize="reject") -> list:
+        size = os.path.getsize(local_path)
+        if size <= self.max_size: return [(remote_path, 0, size)]
+        if on_oversize != "split": return None
+
+        parts = []
+        for index, offset in enumerate(range(0, size, self.max_size)):
+            parts.append((remote_path + "." + str(index + 1).zfill(3), offset, min(self.max_size, size - offset)))
+        return parts
+
+    # 占用上传额度，单个超过总额度的分卷在没有其他上传时放行
+    def _reserve(self, length):
+        with self._cond:
+            while self._inflight > 0 and self._inflight + length > self.max_inflight_bytes:
+                self._cond.wait()
+            self._inflight += length
+
+    def _free(self, length):
+        with self._cond:
+            self._inflight -= length
+            self._cond.notify_all()
+
+    def _upload_part(self, local_path, remote_path, offset, length) -> int:
+        self._reserve(length)
+        try:
+            with FileSegment(local_path, offset, length) as body:
+                return self._send(remote_path, body, length)
+        finally:
+            self._free(length)
+
+    # 批量上传 [(local_path, remote_path)]，返回 {remote_path: 状态码}
+    ## 以目标路径为键，同一个本地文件可以上传到多个位置；目标路径重复时任一次失败即视为失败
+    def upload_many(self, items, on_oversize="reject") -> dict:
+        results = {}
+        jobs = []
+        for local_path, remote_path in items:
+            parts = self.plan(local_path, remote_path, on_oversize)
+            if parts is None:
+                results[remote_path] = Uploader.FAILED
+                continue
+            for remote_part, offset, length in parts:
+                jobs.append((remote_path, (local_path, remote_part, offset, length)))
+
+        ## 按目标路径汇总各分卷结果，任一分卷失败即视为失败
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [(remote_path, executor.submit(self._upload_part, *job)) for remote_path, job in jobs]
+            for remote_path, future in futures:
+                try:
+                    code = future.result()
+                except RequestError as e:
+                    code = e.code
+                except Exception:
+                    code = Uploader.FAILED
+                if results.get(remote_path, Uploader.SUCCESS) == Uploader.SUCCESS: results[remote_path] = code
+        return results
@@ -0,0 +1,253 @@
+import os
+import time
+import base64
+import urllib.error
+import urllib.parse
+import email.utils
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from jianguo.api import status
+from jianguo.api.transport import PooledTransport
+from jianguo.api.download import Downloader
+from jianguo.api.upload import FileSegment
+from jianguo.api.ratelimit import RequestError
+
+DAV = "{DAV:}"
+
+PROPFIND_BODY = (
+    b'<?xml version="1.0" encoding="utf-8"?>'
+    b'<d:propfind xmlns:d="DAV:"><d:prop>'
+    b'<d:resourcetype/><d:getcontentlength/><d:getlastmodified/><d:getetag/>'
+    b'</d:prop></d:propfind>'
+)
+
+# 坚果云 WebDAV 客户端，使用应用密码登录，适合大量文件的传输
+## 路径格式与 Jianguo 相同，如 "我的坚果云/文档/a.txt"；列表项包含 name、isDir、size、mtime（毫秒）和 rev（ETag）
+## depth 为 "infinity" 时遍历目录树只发送一次 PROPFIND，服务端不支持时自动改为 "batched"，即逐层并发发送 Depth: 1 的 PROPFIND
+class WebDAV(object):
+    FAILED = status.FAILED
+    SUCCESS = status.SUCCESS
+    PATH_ERROR = status.PATH_ERROR
+    DEFAULT_URL = "https://dav.jianguoyun.com/dav/"
+
+    def __init__(self, user, password, base_url=DEFAULT_URL, depth="infinity", transport=None, scheduler=None, metrics=None, max_workers=8):
+        if depth not in ("infinity", "batched"): raise ValueError("depth must be 'infinity' or 'batched'")
+        self.base_url = base_url.rstrip("/") + "/"
+        self.depth = depth
+        self.max_workers = max_workers
+        self._base_path = urllib.parse.urlsplit(self.base_url).path
+        self._transport = transport or PooledTransport()
+        self._scheduler = scheduler
+        self._metrics = metrics
+        token = base64.b64encode((user + ":" + password).encode("utf-8")).decode("ascii")
+        self._headers = {"Authorization": "Basic " + token}
+
+    ## 请求
+
+    def url_of(self, path) -> str:
+        return self.base_url + urllib.parse.quote(path.strip("/"))
+
+    # 发送一次请求并记录统计信息
+    def _send(self, method, url, headers, body):
+        if hasattr(body, "seek"): body.seek(0)
+        if self._metrics is not None: self._metrics.before(method, url, headers)
+        begin = time.monotonic()
+        try:
+            response = self._transport.request(method, url, headers, body)
+        except Exception as e:
+            if self._metrics is not None: self._metrics.record(method, url, time.monotonic() - begin, status=getattr(e, "code", None), error=repr(e))
+            raise
+        if self._metrics is not None: self._metrics.record(method, url, time.monotonic() - begin, len(response.body), response.status)
+        return response
+
+    # 通过调度器（如有）发送请求，状态码 >= 400 时抛出 HTTPError
+    def _request(self, method, path, headers=None, body=None):
+        url = self.url_of(path)
+        headers = dict(self._headers, **(headers or {}))
+        if self._scheduler is None: return self._send(method, url, headers, body)
+        return self._scheduler.execute(method, url, lambda: self._send(method, url, headers, body))
+
+    ## 列表
+
+    # 将 PROPFIND 响应中的 href 转换为路径
+    def _path_of(self, href) -> str:
+        path = urllib.parse.unquote(urllib.parse.urlsplit(href).path)
+        if path.startswith(self._base_path): path = path[len(self._base_path):]
+        return path.strip("/")
+
+    def _item_of(self, response) -> tuple:
+        path = self._path_of(response.findtext(DAV + "href", ""))
+        prop = response.find(DAV + "propstat/" + DAV + "prop")
+        if prop is None: prop = ET.Element("prop")
+
+        is_dir = prop.find(DAV + "resourcetype/" + DAV + "collection") is not None
+        modified = prop.findtext(DAV + "getlastmodified")
+        etag = prop.findtext(DAV + "getetag")
+        item = {
+            "name": path.rsplit("/", 1)[-1],
+            "isDir": is_dir,
+            "size": int(prop.findtext(DAV + "getcontentlength") or 0),
+            "mtime": int(email.utils.parsedate_to_datetime(modified).timestamp() * 1000) if modified else None,
+            "rev": etag.strip('"') if etag else None,
+        }
+        return path, item
+
+    # 发送 PROPFIND，返回 [(路径, 列表项)]，响应从连接中逐块解析
+    def _propfind(self, path, depth) -> list:
+        url = self.url_of(path)
+        headers = dict(self._headers, **{"Depth": depth, "Content-Type": "application/xml; charset=utf-8", "Accept-Encoding": "identity"})
+
+        def send():
+            if self._metrics is not None: self._metrics.before("PROPFIND", url, headers)
+            begin = time.monotonic()
+            parser = ET.XMLPullParser(events=("end",))
+            items, received = [], 0
+            try:
+                with self._transport.open("PROPFIND", url, headers, PROPFIND_BODY) as response:
+                    for chunk in response.iter_chunks():
+                        received += len(chunk)
+                        parser.feed(chunk)
+                        for _, element in parser.read_events():
+                            if element.tag != DAV + "response": continue
+                            items.append(self._item_of(element))
+                            element.clear()
+                    parser.close()
+            except Exception as e:
+                if self._metrics is not None: self._metrics.record("PROPFIND", url, time.monotonic() - begin, received, getattr(e, "code", None), repr(e))
+                raise
+            if self._metrics is not None: self._metrics.record("PROPFIND", url, time.monotonic() - begin, received, response.status)
+            return items
+
+        if self._scheduler is None: return send()
+        return self._scheduler.execute("PROPFIND", url, send)
+
+    # 获取目录下的项目列表，返回 {"contents": [列表项]}，与 Jianguo.get_file_list 一致
+    def get_file_list(self, path) -> dict:
+        path = path.strip("/")
+        return {"contents": [item for item_path, item in self._propfind(path, "1") if item_path != path]}
+
+    # 获取单个项目的信息，不存在时返回 None
+    def get_file_info(self, path) -> dict:
+        try:
+            items = self._propfind(path.strip("/"), "0")
+        except urllib.error.HTTPError as e:
+            if e.code == 404: return None
+            raise
+        return items[0][1] if items else None
+
+    # 按目录分组 [(路径, 列表项)]，返回 {目录: [列表项]}
+    def _group(self, root, items) -> dict:
+        children = {}
+        for item_path, item in items:
+            if item_path == root: continue
+            children.setdefault(item_path.rsplit("/", 1)[0] if "/" in item_path else "", []).append(item)
+        return children
+
+    # 广度优先遍历目录树，逐个生成 (dir, dirs, files)，与 Jianguo.walk 一致
+    ## depth 为 "infinity" 时一次获取整个目录树后按目录分组；否则每层并发发送 Depth: 1 的 PROPFIND，同时进行的请求不超过 max_workers 个
+    def walk(self, path, max_workers=None, max_depth=None):
+        path = path.strip("/")
+        max_workers = max_workers or self.max_workers
+
+        if self.depth == "infinity":
+            try:
+                children = self._group(path, self._propfind(path, "infinity"))
+            except urllib.error.HTTPError as e:
+                if e.code != 403: raise
+                ## 服务端不允许 Depth: infinity（propfind-finite-depth），之后改为逐层获取
+                self.depth = "batched"
+            else:
+                pending = deque([(path, 0)])
+                while pending:
+                    dir_path, depth = pending.popleft()
+                    contents = children.get(dir_path, [])
+                    dirs = [item for item in contents if item["isDir"]]
+                    if max_depth is None or depth < max_depth:
+                        for item in dirs: pending.append(((dir_path + "/" + item["name"]).lstrip("/"), depth + 1))
+                    yield dir_path, dirs, [item for item in contents if not item["isDir"]]
+                return
+
+        pending = deque([(path, 0)])
+        running = {}
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            while pending or running:
+                while pending and len(running) < max_workers:
+                    dir_path, depth = pending.popleft()
+                    running[executor.submit(self.get_file_list, dir_path)] = (dir_path, depth)
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    dir_path, depth = running.pop(future)
+                    contents = future.result()["contents"]
+                    dirs = [item for item in contents if item["isDir"]]
+                    if max_depth is None or depth < max_depth:
+                        for item in dirs: pending.append(((dir_path + "/" + item["name"]).lstrip("/"), depth + 1))
+                    yield dir_path, dirs, [item for item in contents if not item["isDir"]]
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    ## 文件操作
+
+    # 下载文件到本地，dest 为目录时使用原文件名；大文件分段并发下载并支持续传，参数同 Downloader
+    def download(self, path, dest, resume=True, progress=None, **kwargs) -> dict:
+        if os.path.isdir(dest): dest = os.path.join(dest, os.path.basename(path.rstrip("/")))
+        downloader = Downloader(self._transport, self._headers, **kwargs)
+        return downloader.download(self.url_of(path), dest, resume, progress)
+
+    # 流式上传本地文件，已存在时覆盖
+    def upload(self, local_path, remote_path) -> int:
+        with FileSegment(local_path) as body:
+            self._request("PUT", remote_path, {"Content-Length": str(len(body)), "Content-Type": "application/octet-stream"}, body)
+        return WebDAV.SUCCESS
+
+    # 并发上传 [(local_path, remote_path)]，返回 {remote_path: 状态码}
+    def upload_many(self, items, max_workers=4) -> dict:
+        return self._run_many(lambda remote_path, local_path: self.upload(local_path, remote_path), [(remote_path, local_path) for local_path, remote_path in items], max_workers)
+
+    # 新建文件夹
+    def creat_dir(self, path) -> int:
+        self._request("MKCOL", path)
+        return WebDAV.SUCCESS
+
+    # 删除文件或文件夹
+    def delete(self, path) -> int:
+        self._request("DELETE", path)
+        return WebDAV.SUCCESS
+
+    # 并发删除，返回 {path: 状态码}，不存在的项目为 PATH_ERROR
+    def delete_many(self, paths, max_workers=4) -> dict:
+        return self._run_many(self.delete, [(path,) for path in paths], max_workers)
+
+    # 移动/复制到 dst_path（完整的目标路径），overwrite 为 False 时目标已存在会失败
+    def move(self, src_path, dst_path, is_copy=False, overwrite=False) -> int:
+        headers = {"Destination": self.url_of(dst_path), "Overwrite": "T" if overwrite else "F"}
+        self._request("COPY" if is_copy else "MOVE", src_path, headers)
+        return WebDAV.SUCCESS
+
+    def copy(self, src_path, dst_path, overwrite=False) -> int:
+        return self.move(src_path, dst_path, True, overwrite)
+
+    # 并发移动/复制 [(src_path, dst_path)]，返回 {src_path: 状态码}
+    def move_many(self, items, is_copy=False, max_workers=4) -> dict:
+        return self._run_many(lambda src_path, dst_path: self.move(src_path, dst_path, is_copy), items, max_workers)
+
+    # 并发执行 func(*args)，以第一个参数为键汇总状态码，404 为 PATH_ERROR
+    def _run_many(self, func, items, max_workers) -> dict:
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [(args[0], executor.submit(func, *args)) for args in items]
+            for key, future in futures:
+                try:
+                    results[key] = future.result()
+                except urllib.error.HTTPError as e:
+                    results[key] = WebDAV.PATH_ERROR if e.code == 404 else WebDAV.FAILED
+                except RequestError as e:
+                    results[key] = e.code
+                except Exception:
+                    results[key] = WebDAV.FAILED
+        return results
+
+    def close(self):
+        self._transport.close()
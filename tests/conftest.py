@@ -0,0 +1,30 @@
+import pytest
+from jianguo.api import Jianguo
+from benchmarks.fake_server import FakeJianguoServer
+
+# 启动模拟服务，参数同 FakeJianguoServer，测试结束后关闭
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(**kwargs) -> FakeJianguoServer:
+        server = FakeJianguoServer(**kwargs).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers: server.stop()
+
+# 连接到模拟服务的客户端
+@pytest.fixture
+def connect():
+    clients = []
+
+    def open_client(server) -> Jianguo:
+        client = Jianguo()
+        client._host_url = server.url
+        clients.append(client)
+        return client
+
+    yield open_client
+    for client in clients: client._transport.close()
@@ -0,0 +1,36 @@
+import os
+import pytest
+from jianguo.api import Jianguo
+
+R = Jianguo.DEFAULT_SANDBOX_NAME
+
+# 分段下载中途失败后，再次下载从已完成的位置继续，最终内容完整
+def test_download_resume(serve, connect, tmp_path):
+    server = serve(depth=0, files=0, events=0)
+    content = bytes(range(256)) * 1024
+    with server._lock: server._add("/big.bin", False, len(content), content)
+    client = connect(server)
+    dest = str(tmp_path / "big.bin")
+
+    def interrupt(done, total):
+        if done > 100 << 10: raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        client.download(R + "/big.bin", dest, progress=interrupt, segment_size=64 << 10, chunk_size=16 << 10, max_workers=1)
+    assert os.path.exists(dest + ".part") and os.path.exists(dest + ".part.json")
+
+    report = client.download(R + "/big.bin", dest, segment_size=64 << 10, chunk_size=16 << 10, max_workers=1)
+    assert report["resumed"] > 0
+    assert report["resumed"] + report["transferred"] == len(content)
+    with open(dest, "rb") as f: assert f.read() == content
+    assert not os.path.exists(dest + ".part") and not os.path.exists(dest + ".part.json")
+
+# 空文件的 Range 探测返回 416，应下载为 0 字节文件
+def test_download_empty_file(serve, connect, tmp_path):
+    server = serve(depth=0, files=0, events=0)
+    client = connect(server)
+    client.creat_file(R + "/empty.txt")
+
+    report = client.download(R + "/empty.txt", str(tmp_path))
+    assert report["size"] == 0
+    assert os.path.getsize(tmp_path / "empty.txt") == 0
+    assert sorted(os.listdir(tmp_path)) == ["empty.txt"]
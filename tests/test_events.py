@@ -0,0 +1,18 @@
+from jianguo.api import Jianguo
+
+R = Jianguo.DEFAULT_SANDBOX_NAME
+
+# 使用 checkpoint 时，再次遍历只生成上次水位之后的新事件
+def test_iter_events_checkpoint_resume(serve, connect, tmp_path):
+    server = serve(depth=0, files=0, events=250)
+    client = connect(server)
+    checkpoint = str(tmp_path / "events.json")
+
+    assert len(list(client.iter_events(R, checkpoint=checkpoint))) == 250
+    assert list(client.iter_events(R, checkpoint=checkpoint)) == []
+
+    with server._lock:
+        for i in range(3): server._record("/new" + str(i), "CREATE")
+    events = list(client.iter_events(R, checkpoint=checkpoint))
+    assert [event["path"] for event in events] == ["/new2", "/new1", "/new0"]
+    assert list(client.iter_events(R, checkpoint=checkpoint)) == []
@@ -0,0 +1,48 @@
+from jianguo.api import Jianguo
+
+R = Jianguo.DEFAULT_SANDBOX_NAME
+
+# 新事件只使涉及的目录失效，其他目录继续命中缓存
+def test_poll_list_cache_invalidates_touched_dirs(serve, connect):
+    server = serve(depth=1, dirs=2, files=3, events=10)
+    client = connect(server)
+    client.enable_list_cache()
+    snd_id, snd_magic, _ = client.path_cut(R)
+
+    client.get_file_list(R + "/dir0")
+    client.get_file_list(R + "/dir1")
+    assert client.get_list_cache_stats()["entries"] == 2
+
+    with server._lock:
+        server._add("/dir1/new.txt", False, 0, b"")
+        server._record("/dir1/new.txt", "CREATE")
+    assert client.poll_list_cache(snd_id, snd_magic, force=True) == Jianguo.SUCCESS
+    assert client.get_list_cache_stats()["entries"] == 1
+
+    hits = client.get_list_cache_stats()["hits"]
+    client.get_file_list(R + "/dir0")
+    assert client.get_list_cache_stats()["hits"] == hits + 1
+    assert "new.txt" in [item["name"] for item in client.get_file_list(R + "/dir1")["contents"]]
+
+# 页数上限内找不到上次水位时，清空该 sandbox 的全部缓存
+def test_poll_list_cache_clears_when_watermark_not_reached(serve, connect):
+    server = serve(depth=1, dirs=2, files=3, events=10)
+    client = connect(server)
+    client.enable_list_cache()
+    snd_id, snd_magic, _ = client.path_cut(R)
+
+    client.get_file_list(R + "/dir0")
+    client.get_file_list(R + "/dir1")
+    with server._lock:
+        for i in range(300): server._record("/other/f" + str(i), "CREATE")
+    client.MIX_EVENT_PAGE_NUM = 2
+    client.poll_list_cache(snd_id, snd_magic, force=True)
+    assert client.get_list_cache_stats()["entries"] == 0
+
+    ## 清空后重新确定水位，之后的新事件照常只使涉及的目录失效
+    del client.MIX_EVENT_PAGE_NUM
+    client.get_file_list(R + "/dir0")
+    client.get_file_list(R + "/dir1")
+    with server._lock: server._record("/dir0/x", "CREATE")
+    client.poll_list_cache(snd_id, snd_magic, force=True)
+    assert client.get_list_cache_stats()["entries"] == 1
@@ -0,0 +1,28 @@
+import os
+from jianguo.api import Jianguo
+
+R = Jianguo.DEFAULT_SANDBOX_NAME
+
+# 远端改名和删除后再次同步，本地按改名移动文件、删除已删除的文件，不重新下载
+def test_sync_rename_and_delete(serve, connect, tmp_path):
+    server = serve(depth=1, dirs=1, files=3, events=0)
+    client = connect(server)
+    local_dir = str(tmp_path)
+
+    report = client.sync(R + "/dir0", local_dir)
+    assert sorted(report["plan"]["download"]) == ["file0.txt", "file1.txt", "file2.txt"]
+    assert report["failed"] == {}
+
+    assert client.rename(R + "/dir0/file0.txt", "renamed.txt") == Jianguo.SUCCESS
+    assert client.delete(R + "/dir0/file2.txt") == Jianguo.SUCCESS
+
+    report = client.sync(R + "/dir0", local_dir)
+    assert report["plan"]["rename"] == [("file0.txt", "renamed.txt")]
+    assert report["plan"]["delete"] == ["file2.txt"]
+    assert report["plan"]["download"] == []
+    assert report["failed"] == {}
+    assert sorted(name for name in os.listdir(local_dir) if not name.startswith(".")) == ["file1.txt", "renamed.txt"]
+    with open(os.path.join(local_dir, "renamed.txt"), "rb") as f: assert f.read() == server._contents["/dir0/renamed.txt"]
+
+    ## 没有新变化时不需要再列出远端目录
+    assert client.sync(R + "/dir0", local_dir)["unchanged"]
@@ -0,0 +1,20 @@
+from jianguo.api import Jianguo
+
+R = Jianguo.DEFAULT_SANDBOX_NAME
+
+def _tree(results) -> dict:
+    return {path: (sorted(item["name"] for item in dirs), sorted(item["name"] for item in files)) for path, dirs, files in results}
+
+# 服务端拒绝 Depth: infinity（403）时改为逐层获取，结果与一次获取整个目录树相同
+def test_walk_falls_back_when_infinity_forbidden(serve, connect):
+    expected_server = serve(depth=2, dirs=2, files=2, events=0)
+    dav = connect(expected_server).open_webdav("user", "password", base_url=expected_server.url + "/dav/")
+    expected = _tree(dav.walk(R))
+    assert dav.depth == "infinity"
+
+    server = serve(depth=2, dirs=2, files=2, events=0, allow_infinity=False)
+    dav = connect(server).open_webdav("user", "password", base_url=server.url + "/dav/")
+    assert _tree(dav.walk(R)) == expected
+    assert dav.depth == "batched"
+    assert len(expected) == 1 + 2 + 4
+    assert _tree(dav.walk(R, max_depth=0)) == {R: expected[R]}